@@ -1,15 +1,18 @@
-﻿from typing import Dict, List, Any
+﻿from typing import Dict, List, Any, Optional
 from langchain.llms.base import BaseLLM
 
 from memory.qdrant_memory import QdrantMemoryStore
-from prompts.competitor_analysis_prompts import COMPETITOR_ANALYSIS_PROMPT_TEMPLATE
+from prompts.competitor_analysis_prompts import COMPETITOR_ANALYSIS_PROMPT
+from prompts.prompt_assembly import assemble_prompt
+from utils.context_distillation import ContextDistiller, log_prompt_tokens
 
 class CompetitorAnalysisAgent:
     """Agent responsible for analyzing competitors."""
     
-    def __init__(self, llm: BaseLLM, memory: QdrantMemoryStore):
+    def __init__(self, llm: BaseLLM, memory: QdrantMemoryStore, distiller: Optional[ContextDistiller] = None):
         self.llm = llm
         self.memory = memory
+        self.distiller = distiller
     
     def analyze_competitors(
         self, 
@@ -27,16 +30,21 @@ class CompetitorAnalysisAgent:
             Dictionary containing competitor analysis
         """
         # Create a prompt for competitor analysis
-        prompt = COMPETITOR_ANALYSIS_PROMPT_TEMPLATE.format(
-            startup_name=startup_info["name"],
-            industry=startup_info["industry"],
-            problem_statement=startup_info["problem_statement"],
-            solution=startup_info["solution"],
-            market_trends=research_results["market_trends"]
-        )
+        market_trends = research_results["market_trends"]
+        
+        # Swap raw market trends for a compact fact sheet
+        if self.distiller is not None:
+            raw_trends = market_trends
+            market_trends = self.distiller.distill(market_trends, kind="market trends")
+            log_prompt_tokens(
+                "competitor_analysis",
+                COMPETITOR_ANALYSIS_PROMPT.render(market_trends=raw_trends),
+                COMPETITOR_ANALYSIS_PROMPT.render(market_trends=market_trends)
+            )
+        prompt = assemble_prompt(COMPETITOR_ANALYSIS_PROMPT, startup_info, market_trends=market_trends)
         
         # Get competitor analysis from LLM
-        analysis_response = self.llm.generate([prompt])
+        analysis_response = self.llm.generate([prompt.user], profile="competitor_analysis", system=prompt.system)
         analysis_text = analysis_response.generations[0][0].text
         
         # Parse the analysis response into structured data
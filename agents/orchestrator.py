@@ -1,15 +1,20 @@
-﻿from typing import Dict, List, Any
+﻿from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
+import threading
 from langchain.callbacks.base import BaseCallbackHandler
 from custom_llm import GroqHuggingFaceLLM
 from agents.research_agent import ResearchAgent
 from agents.pitch_creation_agent import PitchCreationAgent
 from agents.competitor_analysis_agent import CompetitorAnalysisAgent
-from agents.slide_design_agent import SlideDesignAgent
+from agents.slide_design_agent import SlideDesignAgent, SLIDE_CONTENT_SECTIONS
 from agents.visual_generation_agent import VisualGenerationAgent
 from memory.qdrant_memory import QdrantMemoryStore
+from utils.context_distillation import ContextDistiller
 from utils.reflection_loops import ReflectionSystem
 from utils.memory_pruning import prune_memory
+from utils.token_accounting import TokenLedger, submit_in_context
+from utils.visual_planning import plan_visuals
 from config import PitchPilotConfig
 
 class PitchPilotOrchestrator:
@@ -26,6 +31,8 @@ class PitchPilotOrchestrator:
             api_key=config.api_key,
             temperature=config.temperature,
             max_tokens=config.max_tokens,
+            generation_profiles=config.generation_profiles,
+            output_length_log=config.output_length_log,
         )
 
         # Initialize memory
@@ -33,64 +40,206 @@ class PitchPilotOrchestrator:
             url=config.qdrant_url,
             api_key=config.qdrant_api_key,
             collection_name=config.collection_name,
-            vector_dimension=config.vector_dimension
+            vector_dimension=config.vector_dimension,
+            model_name=config.embedding_model_name,
+            embedding_backend=config.embedding_backend,
+            onnx_file_name=config.embedding_onnx_file,
+            quantization=config.qdrant_quantization,
+            quantization_rescore=config.qdrant_quantization_rescore,
+            quantization_oversampling=config.qdrant_quantization_oversampling,
+            on_disk_vectors=config.qdrant_on_disk_vectors,
+            hnsw_m=config.qdrant_hnsw_m,
+            hnsw_ef_construct=config.qdrant_hnsw_ef_construct,
+            search_ef=config.qdrant_search_ef,
+            prefer_grpc=config.qdrant_prefer_grpc,
+            grpc_port=config.qdrant_grpc_port,
+            dedupe_enabled=config.memory_dedupe_enabled,
+            dedupe_max_distance=config.memory_dedupe_max_distance,
+            dedupe_vector_threshold=config.memory_dedupe_vector_threshold,
+            dedupe_mode=config.memory_dedupe_mode
         )
         
+        # Initialize the context distiller on a smaller, faster model
+        self.distiller = None
+        if config.distillation_enabled:
+            self.distillation_llm = GroqHuggingFaceLLM(
+                model=config.distillation_model,
+                provider="groq",
+                api_key=config.api_key,
+                temperature=0.0,
+                max_tokens=config.distillation_token_budget * 2,
+                generation_profiles=config.generation_profiles,
+                output_length_log=config.output_length_log,
+            )
+            self.distiller = ContextDistiller(
+                self.distillation_llm,
+                token_budget=config.distillation_token_budget,
+                cache_size=config.distillation_cache_size
+            )
+        
         # Initialize agents
-        self.research_agent = ResearchAgent(self.llm, self.memory)
-        self.pitch_creation_agent = PitchCreationAgent(self.llm, self.memory)
-        self.competitor_analysis_agent = CompetitorAnalysisAgent(self.llm, self.memory)
+        self.research_agent = ResearchAgent(
+            self.llm,
+            self.memory,
+            cache_enabled=config.research_cache_enabled,
+            cache_threshold=config.research_cache_threshold,
+            cache_candidates=config.research_cache_candidates
+        )
+        self.pitch_creation_agent = PitchCreationAgent(
+            self.llm,
+            self.memory,
+            context_limit=config.context_limit,
+            context_fetch_k=config.context_fetch_k,
+            context_mmr_lambda=config.context_mmr_lambda,
+            context_token_budget=config.context_token_budget,
+            distiller=self.distiller
+        )
+        self.competitor_analysis_agent = CompetitorAnalysisAgent(self.llm, self.memory, distiller=self.distiller)
         self.slide_design_agent = SlideDesignAgent(self.llm, self.memory)
-        self.visual_generation_agent = VisualGenerationAgent(self.llm)
+        self.visual_generation_agent = VisualGenerationAgent(
+            self.llm,
+            render_workers=config.render_workers,
+            render_timeout=config.render_timeout,
+            render_memory_limit_mb=config.render_memory_limit_mb,
+            use_chart_specs=config.visual_chart_specs,
+            theme=config.visual_theme,
+            box_size_in=config.visual_box_in[2:],
+            ppi=config.visual_ppi,
+            png_colors=config.visual_png_colors,
+            cache_enabled=config.visual_cache_enabled,
+            cache_max_mb=config.visual_cache_max_mb
+        )
         # Initialize reflection system
         self.reflection_system = ReflectionSystem(
             llm=self.llm,
-            threshold=config.reflection_threshold
+            threshold=config.reflection_threshold,
+            max_iterations=config.reflection_max_iterations,
+            max_workers=config.reflection_max_workers
         )
     
-    def generate_pitch_deck(self, startup_info: Dict[str, str]) -> Dict[str, Any]:
+    def generate_pitch_deck(self, startup_info: Dict[str, str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Generate a complete pitch deck based on startup information.
         
         Args:
             startup_info: Dictionary containing information about the startup
+            options: Optional deck options: "slide_count" (keep the highest-priority
+                slides), "include_financials" and "include_competition" (both default
+                True). Slides left out cost no LLM calls, memory writes or visuals.
             
         Returns:
-            Dictionary containing the generated pitch deck
+            Dictionary containing the generated pitch deck, with its token usage
+            under "token_usage"
+
+        Raises:
+            TokenBudgetExceeded: If config.deck_token_budget runs out before a required stage
         """
-        # Step 1: Research phase
-        research_results = self.research_agent.research_startup(startup_info)
-        
-        # Step 2: Competitor analysis
-        competitor_analysis = self.competitor_analysis_agent.analyze_competitors(
-            startup_info, 
-            research_results
-        )
-        
-        # Step 3: Create pitch content
-        pitch_content = self.pitch_creation_agent.create_pitch_content(
-            startup_info,
-            research_results,
-            competitor_analysis
+        ledger = TokenLedger(
+            budget=self.config.deck_token_budget,
+            costs_per_million=self.config.token_costs_per_million
         )
+        with ledger.active():
+            pitch_deck = self._generate_pitch_deck(startup_info, self._plan_slides(options or {}), ledger)
+        pitch_deck["token_usage"] = ledger.summary()
+        total = pitch_deck["token_usage"]["total"]
+        print(f"[Tokens] {total['total_tokens']} tokens over {total['calls']} calls "
+              f"(~${pitch_deck['token_usage']['estimated_cost_usd']:.4f}, "
+              f"{total['cached_ratio']:.0%} of prompt tokens cached)")
+        return pitch_deck
+
+    def _plan_slides(self, options: Dict[str, Any]) -> List[str]:
+        """Slide templates for a deck, in deck order, honouring the deck options."""
+        excluded = set()
+        if not options.get("include_financials", True):
+            excluded.add("Financials")
+        if not options.get("include_competition", True):
+            excluded.add("Competition")
+        slide_templates = [slide for slide in self.config.default_slides if slide not in excluded]
+
+        slide_count = options.get("slide_count")
+        if slide_count and slide_count < len(slide_templates):
+            priority = {slide: rank for rank, slide in enumerate(self.config.slide_priority)}
+            kept = set(sorted(slide_templates, key=lambda slide: priority.get(slide, len(priority)))[:slide_count])
+            slide_templates = [slide for slide in slide_templates if slide in kept]
+        return slide_templates
+
+    def _pitch_sections(self, slide_templates: List[str]) -> List[str]:
+        """Pitch content section headings needed by the given slides, e.g. "Market Size"."""
+        sections = []
+        for slide_template in slide_templates:
+            heading = SLIDE_CONTENT_SECTIONS.get(slide_template, "overview").replace("_", " ").title()
+            if heading not in sections:
+                sections.append(heading)
+        return sections
+
+    def _generate_pitch_deck(
+        self,
+        startup_info: Dict[str, str],
+        slide_templates: List[str],
+        ledger: TokenLedger
+    ) -> Dict[str, Any]:
+        # Step 1: Research phase
+        ledger.check_budget("research")
+        with ledger.stage("research"):
+            research_results = self.research_agent.research_startup(startup_info)
         
-        # Apply reflection loop to improve content
-        pitch_content = self.reflection_system.improve_content(pitch_content)
+        # Step 2: Competitor analysis, only when the deck has a Competition slide
+        if "Competition" in slide_templates:
+            ledger.check_budget("competitor_analysis")
+            with ledger.stage("competitor_analysis"):
+                competitor_analysis = self.competitor_analysis_agent.analyze_competitors(
+                    startup_info, 
+                    research_results
+                )
+        else:
+            competitor_analysis = {"competitors": [], "competitive_advantages": []}
         
-        # Step 4: Design slides
-        slides = self.slide_design_agent.design_slides(
-            startup_info,
-            pitch_content,
-            self.config.default_slides
-        )
+        ledger.check_budget("pitch_creation")
+        if self.config.stream_pitch_content:
+            # Steps 3-4 overlapped: each streamed section is reflected on and its
+            # slides designed while later sections are still generating
+            pitch_content, slides = self._create_and_design_streaming(
+                startup_info,
+                research_results,
+                competitor_analysis,
+                slide_templates,
+                ledger
+            )
+        else:
+            # Step 3: Create pitch content
+            with ledger.stage("pitch_creation"):
+                pitch_content = self.pitch_creation_agent.create_pitch_content(
+                    startup_info,
+                    research_results,
+                    competitor_analysis,
+                    sections=self._pitch_sections(slide_templates)
+                )
+            
+            # Apply reflection loop to the sections this deck uses; optional, so
+            # skipped once over budget
+            if not ledger.exhausted:
+                used_sections = {SLIDE_CONTENT_SECTIONS.get(slide, "overview") for slide in slide_templates}
+                with ledger.stage("reflection"):
+                    pitch_content = {
+                        **pitch_content,
+                        **self.reflection_system.improve_content(
+                            {section: lines for section, lines in pitch_content.items() if section in used_sections},
+                            startup_info
+                        )
+                    }
+            
+            # Step 4: Design slides
+            ledger.check_budget("slide_design")
+            with ledger.stage("slide_design"):
+                slides = self.slide_design_agent.design_slides(
+                    startup_info,
+                    pitch_content,
+                    slide_templates
+                )
 
-        for idx, slide in enumerate(slides):
-            generated_visuals = []
-            for vis_desc in slide.get("visual_elements", []):
-                img_path = self.visual_generation_agent.generate_visual_from_description(vis_desc, idx)
-                if img_path:
-                    generated_visuals.append(img_path)
-            slide["generated_visuals"] = generated_visuals
+        # Visuals are optional too; slides past the budget keep their text only
+        with ledger.stage("visuals"):
+            self._generate_visuals(slides, ledger)
         
         # Compile the final pitch deck
         pitch_deck = {
@@ -100,3 +249,146 @@ class PitchPilotOrchestrator:
         }
         
         return pitch_deck
+
+    def _generate_visuals(self, slides: List[Dict[str, Any]], ledger: TokenLedger):
+        """
+        Generate the deck's planned visuals concurrently into slide["generated_visuals"],
+        as PNG bytes ready to embed.
+
+        The visual planner picks at most visual_max_per_slide / visual_max_per_deck
+        visuals, best first, and they are scheduled in that order. Code generation
+        runs on threads and rendering on the sandboxed worker processes, so visuals
+        for the whole deck overlap.
+        """
+        planned = plan_visuals(
+            slides,
+            max_per_slide=self.config.visual_max_per_slide,
+            max_per_deck=self.config.visual_max_per_deck
+        )
+        print(f"[Visuals] Generating {len(planned)} of "
+              f"{sum(len(slide.get('visual_elements', [])) for slide in slides)} suggested visuals")
+
+        def generate(vis_desc: str):
+            if ledger.exhausted:
+                return None
+            return self.visual_generation_agent.generate_visual_image(vis_desc)
+
+        for slide in slides:
+            slide["generated_visuals"] = []
+        with ThreadPoolExecutor(max_workers=self.config.pipeline_workers) as executor:
+            futures = [
+                (visual["slide_index"], submit_in_context(executor, generate, visual["description"]))
+                for visual in planned
+            ]
+            for slide_index, future in futures:
+                image = future.result()
+                if image:
+                    slides[slide_index]["generated_visuals"].append(image)
+
+    def _create_and_design_streaming(
+        self,
+        startup_info: Dict[str, str],
+        research_results: Dict[str, Any],
+        competitor_analysis: Dict[str, Any],
+        slide_templates: List[str],
+        ledger: TokenLedger
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Stream pitch content and pipeline reflection and slide design per section.
+
+        Finished sections queue up for reflection; one drain task at a time takes
+        everything queued so far and reflects on it in a single improve_content call
+        (one batched scoring pass per iteration, as in the non-streaming path), then
+        submits the designs of those sections' slides. Sections arriving meanwhile
+        form the next batch.
+
+        Pool tasks are submitted with the caller's context so their LLM calls land
+        in the deck's ledger under the right stage.
+
+        Returns:
+            The reflected pitch content and the designed slides, in slide_templates order
+        """
+        slides_by_section: Dict[str, List[str]] = {}
+        for slide_template in slide_templates:
+            section = SLIDE_CONTENT_SECTIONS.get(slide_template, "overview")
+            slides_by_section.setdefault(section, []).append(slide_template)
+
+        reflected_content: Dict[str, Any] = {}
+        slide_futures: Dict[str, Future] = {}
+        pending: Dict[str, List[str]] = {}
+        state_lock = threading.Lock()
+        draining = False
+
+        def reflect_and_design(batch: Dict[str, List[str]]):
+            if not ledger.exhausted:
+                with ledger.stage("reflection"):
+                    batch = {**batch, **self.reflection_system.improve_content(batch, startup_info)}
+            with state_lock:
+                reflected_content.update(batch)
+            with ledger.stage("slide_design"):
+                for section, lines in batch.items():
+                    for slide_template in slides_by_section[section]:
+                        future = submit_in_context(
+                            executor,
+                            self.slide_design_agent.design_slide,
+                            startup_info,
+                            {section: lines},
+                            slide_template
+                        )
+                        with state_lock:
+                            slide_futures[slide_template] = future
+
+        def drain():
+            nonlocal draining
+            while True:
+                with state_lock:
+                    batch = dict(pending)
+                    pending.clear()
+                    if not batch:
+                        draining = False
+                        return
+                reflect_and_design(batch)
+
+        with ThreadPoolExecutor(max_workers=self.config.pipeline_workers) as executor:
+            section_futures = []
+
+            def on_section(section: str, lines: List[str]):
+                nonlocal draining
+                # Sections without a slide in this deck aren't worth reflecting on
+                if not lines or section not in slides_by_section:
+                    with state_lock:
+                        reflected_content[section] = list(lines)
+                    return
+                with state_lock:
+                    pending[section] = list(lines)
+                    start_drain = not draining
+                    draining = True
+                if start_drain:
+                    section_futures.append(submit_in_context(executor, drain))
+
+            with ledger.stage("pitch_creation"):
+                self.pitch_creation_agent.create_pitch_content(
+                    startup_info,
+                    research_results,
+                    competitor_analysis,
+                    on_section=on_section,
+                    sections=self._pitch_sections(slide_templates)
+                )
+            # Drains are only started from this thread, so the list is complete here
+            for future in section_futures:
+                future.result()
+
+            # Slides whose section never appeared in the completion
+            with ledger.stage("slide_design"):
+                for slide_template in slide_templates:
+                    if slide_template not in slide_futures:
+                        slide_futures[slide_template] = submit_in_context(
+                            executor,
+                            self.slide_design_agent.design_slide,
+                            startup_info,
+                            reflected_content,
+                            slide_template
+                        )
+            slides = [slide_futures[slide_template].result() for slide_template in slide_templates]
+
+        return reflected_content, slides
@@ -1,22 +1,42 @@
-﻿from typing import Dict, List, Any
+﻿from typing import Callable, Dict, List, Any, Optional
 from langchain.llms.base import BaseLLM
 
 from memory.qdrant_memory import QdrantMemoryStore
-from prompts.pitch_creation_prompts import PITCH_CREATION_PROMPT_TEMPLATE
+from prompts.pitch_creation_prompts import DEFAULT_PITCH_SECTIONS, PITCH_CREATION_PROMPT
+from prompts.prompt_assembly import AssembledPrompt, assemble_prompt
+from utils.context_distillation import ContextDistiller, format_items, log_prompt_tokens
 from utils.context_prioritization import prioritize_context
+from utils.section_stream import SectionStreamParser
+from utils.token_counting import pack_to_token_budget
 
 class PitchCreationAgent:
     """Agent responsible for creating the pitch content."""
     
-    def __init__(self, llm: BaseLLM, memory: QdrantMemoryStore):
+    def __init__(
+        self,
+        llm: BaseLLM,
+        memory: QdrantMemoryStore,
+        context_limit: int = 10,
+        context_fetch_k: int = 30,
+        context_mmr_lambda: float = 0.5,
+        context_token_budget: int = 800,
+        distiller: Optional[ContextDistiller] = None
+    ):
         self.llm = llm
         self.memory = memory
+        self.context_limit = context_limit
+        self.context_fetch_k = context_fetch_k
+        self.context_mmr_lambda = context_mmr_lambda
+        self.context_token_budget = context_token_budget
+        self.distiller = distiller
     
     def create_pitch_content(
         self, 
         startup_info: Dict[str, str], 
         research_results: Dict[str, Any],
-        competitor_analysis: Dict[str, Any]
+        competitor_analysis: Dict[str, Any],
+        on_section: Optional[Callable[[str, List[str]], None]] = None,
+        sections: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Create pitch content based on startup information, research results, and competitor analysis.
@@ -25,44 +45,63 @@ class PitchCreationAgent:
             startup_info: Dictionary containing information about the startup
             research_results: Dictionary containing research results
             competitor_analysis: Dictionary containing competitor analysis
+            on_section: If given, the completion is streamed and this is called with
+                (section key, lines) as soon as each section is complete
+            sections: Section headings to write, in order (defaults to a full deck)
             
         Returns:
             Dictionary containing pitch content for each slide
         """
-        # Retrieve relevant context from memory
-        context_items = self.memory.retrieve_relevant(
+        # Retrieve relevant, mutually diverse context from memory
+        context_items = self.memory.retrieve_diverse(
             query=f"{startup_info['name']} {startup_info['industry']} pitch deck",
-            limit=10
+            limit=self.context_limit,
+            fetch_k=self.context_fetch_k,
+            lambda_mult=self.context_mmr_lambda
         )
         
-        # Prioritize context items
-        prioritized_context = prioritize_context(context_items, startup_info)
+        # Prioritize context items and keep only what fits the token budget
+        prioritized_context = pack_to_token_budget(
+            prioritize_context(context_items, startup_info),
+            self.context_token_budget
+        )
         
         # Create a prompt with prioritized context
-        prompt = PITCH_CREATION_PROMPT_TEMPLATE.format(
-            startup_name=startup_info["name"],
-            industry=startup_info["industry"],
-            problem_statement=startup_info["problem_statement"],
-            solution=startup_info["solution"],
-            target_market=startup_info["target_market"],
-            business_model=startup_info["business_model"],
-            traction=startup_info["traction"],
-            team=startup_info["team"],
-            market_trends=research_results["market_trends"],
-            market_size=research_results["market_size"],
-            customer_segments=research_results["customer_segments"],
-            potential_challenges=research_results["potential_challenges"],
-            competitors=competitor_analysis["competitors"],
-            competitive_advantages=competitor_analysis["competitive_advantages"],
-            context="\n".join(prioritized_context)
-        )
+        research_fields = {
+            "market_trends": research_results["market_trends"],
+            "market_size": research_results["market_size"],
+            "customer_segments": research_results["customer_segments"],
+            "potential_challenges": research_results["potential_challenges"]
+        }
+        competitor_fields = {
+            "competitors": format_items(competitor_analysis["competitors"]),
+            "competitive_advantages": format_items(competitor_analysis["competitive_advantages"])
+        }
+        sections = sections or DEFAULT_PITCH_SECTIONS
+        prompt = self._build_prompt(startup_info, research_fields, competitor_fields, prioritized_context, sections)
         
-        # Generate pitch content
-        pitch_response = self.llm.generate([prompt])
-        pitch_text = pitch_response.generations[0][0].text
+        # Swap raw research and competitor output for compact fact sheets
+        if self.distiller is not None:
+            raw_prompt = prompt
+            prompt = self._build_prompt(
+                startup_info,
+                self.distiller.distill_fields(research_fields),
+                self.distiller.distill_fields(competitor_fields),
+                prioritized_context,
+                sections
+            )
+            log_prompt_tokens("pitch_creation", raw_prompt.user, prompt.user)
         
-        # Parse pitch content into structured data
-        pitch_content = self._parse_pitch_content(pitch_text)
+        if on_section is not None:
+            # Stream the completion and hand off sections as they finish
+            pitch_text, pitch_content = self._stream_pitch_content(prompt, on_section)
+        else:
+            # Generate pitch content
+            pitch_response = self.llm.generate([prompt.user], profile="pitch_creation", system=prompt.system)
+            pitch_text = pitch_response.generations[0][0].text
+            
+            # Parse pitch content into structured data
+            pitch_content = self._parse_pitch_content(pitch_text)
         
         # Store pitch content in memory
         self.memory.add_to_memory(
@@ -72,19 +111,43 @@ class PitchCreationAgent:
         
         return pitch_content
     
+    def _build_prompt(
+        self,
+        startup_info: Dict[str, str],
+        research_fields: Dict[str, str],
+        competitor_fields: Dict[str, str],
+        context: List[str],
+        sections: List[str]
+    ) -> AssembledPrompt:
+        """Fill the pitch creation template."""
+        return assemble_prompt(
+            PITCH_CREATION_PROMPT,
+            startup_info,
+            context="\n".join(context),
+            sections="\n".join(f"{i}. {name}" for i, name in enumerate(sections, 1)),
+            **research_fields,
+            **competitor_fields
+        )
+
+    def _stream_pitch_content(
+        self,
+        prompt: AssembledPrompt,
+        on_section: Callable[[str, List[str]], None]
+    ):
+        """Stream the pitch completion, emitting each section once it is complete."""
+        parser = SectionStreamParser()
+        chunks = []
+        for chunk in self.llm.stream(prompt.user, profile="pitch_creation", system=prompt.system):
+            chunks.append(chunk)
+            for section, lines in parser.feed(chunk):
+                on_section(section, lines)
+        for section, lines in parser.close():
+            on_section(section, lines)
+        return "".join(chunks), parser.content
+
     def _parse_pitch_content(self, pitch_text: str) -> Dict[str, Any]:
         """Parse pitch content from text into structured data."""
-        # This is a simplified implementation
-        lines = pitch_text.split("\n")
-        current_section = "overview"
-        pitch_content = {"overview": []}
-        
-        for line in lines:
-            if line.startswith("# "):
-                current_section = line[2:].lower().replace(" ", "_")
-                pitch_content[current_section] = []
-            else:
-                if line.strip():
-                    pitch_content[current_section].append(line)
-        
-        return pitch_content
+        parser = SectionStreamParser()
+        parser.feed(pitch_text)
+        parser.close()
+        return parser.content
@@ -1,15 +1,31 @@
-﻿from typing import Dict, List, Any
+﻿from typing import Dict, List, Any, Optional
 from langchain.llms.base import BaseLLM
 
 from memory.qdrant_memory import QdrantMemoryStore
-from prompts.research_prompts import RESEARCH_PROMPT_TEMPLATE
+from prompts.prompt_assembly import assemble_prompt
+from prompts.research_prompts import RESEARCH_PROMPT
+from utils.similarity import cosine_similarities
 
 class ResearchAgent:
     """Agent responsible for conducting research about the startup and its market."""
     
-    def __init__(self, llm: BaseLLM, memory: QdrantMemoryStore):
+    def __init__(
+        self,
+        llm: BaseLLM,
+        memory: QdrantMemoryStore,
+        cache_enabled: bool = False,
+        cache_threshold: float = 0.93,
+        cache_candidates: int = 5
+    ):
         self.llm = llm
         self.memory = memory
+
+        # Semantic cache over prior research for near-identical startups
+        self.cache_enabled = cache_enabled
+        self.cache_threshold = cache_threshold
+        self.cache_candidates = cache_candidates
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.cache_events: List[Dict[str, Any]] = []
     
     def research_startup(self, startup_info: Dict[str, str]) -> Dict[str, Any]:
         """
@@ -21,16 +37,19 @@ class ResearchAgent:
         Returns:
             Dictionary containing research results
         """
+        research_inputs = self._research_inputs(startup_info)
+
+        # Reuse research stored for an almost identical startup if allowed
+        if self.cache_enabled:
+            cached_text = self._lookup_cached_research(research_inputs, startup_info)
+            if cached_text is not None:
+                return self._parse_research_results(cached_text)
+
         # Create a research prompt based on startup info
-        prompt = RESEARCH_PROMPT_TEMPLATE.format(
-            startup_name=startup_info["name"],
-            industry=startup_info["industry"],
-            problem_statement=startup_info["problem_statement"],
-            solution=startup_info["solution"]
-        )
+        prompt = assemble_prompt(RESEARCH_PROMPT, startup_info, industry=startup_info["industry"])
         
         # Get research results from LLM
-        research_response = self.llm.generate([prompt])
+        research_response = self.llm.generate([prompt.user], profile="research", system=prompt.system)
         research_text = research_response.generations[0][0].text
         
         # Parse the research response into structured data
@@ -39,10 +58,74 @@ class ResearchAgent:
         # Store research results in memory
         self.memory.add_to_memory(
             text=research_text,
-            metadata={"type": "research", "startup": startup_info["name"]}
+            metadata={
+                "type": "research",
+                "startup": startup_info["name"],
+                "industry": startup_info["industry"],
+                "research_inputs": research_inputs
+            }
         )
         
         return research_results
+
+    def _research_inputs(self, startup_info: Dict[str, str]) -> str:
+        """Canonical text of the fields that drive research, used as the cache key."""
+        return (
+            f"Industry: {startup_info['industry'].strip()}\n"
+            f"Problem: {startup_info['problem_statement'].strip()}\n"
+            f"Solution: {startup_info['solution'].strip()}"
+        )
+
+    def _lookup_cached_research(self, research_inputs: str, startup_info: Dict[str, str]) -> Optional[str]:
+        """
+        Find prior research whose inputs are near-identical to these ones.
+
+        Candidates are fetched from Qdrant by similarity to the stored research text,
+        then re-scored against the inputs they were generated from.
+
+        Returns:
+            Adapted research text on a hit, None on a miss
+        """
+        query_vector = self.memory.embedding_model.embed_query(research_inputs)
+        candidates = [
+            candidate for candidate in self.memory.search(
+                limit=self.cache_candidates,
+                metadata_filter={"type": "research", "industry": startup_info["industry"]},
+                query_vector=query_vector
+            )
+            if candidate["metadata"].get("research_inputs")
+        ]
+
+        similarity = 0.0
+        best = None
+        if candidates:
+            candidate_vectors = self.memory.embedding_model.embed_documents(
+                [candidate["metadata"]["research_inputs"] for candidate in candidates]
+            )
+            similarities = cosine_similarities(query_vector, candidate_vectors)
+            best_idx = int(similarities.argmax())
+            similarity = float(similarities[best_idx])
+            best = candidates[best_idx]
+
+        hit = best is not None and similarity >= self.cache_threshold
+        self.cache_stats["hits" if hit else "misses"] += 1
+        self.cache_events.append({
+            "startup": startup_info["name"],
+            "hit": hit,
+            "similarity": similarity,
+            "source_startup": best["metadata"].get("startup") if best else None
+        })
+        print(f"[ResearchCache] {'hit' if hit else 'miss'} for {startup_info['name']!r} (similarity={similarity:.3f})")
+
+        if not hit:
+            return None
+        return self._adapt_cached_research(best["text"], best["metadata"].get("startup"), startup_info["name"])
+
+    def _adapt_cached_research(self, research_text: str, source_startup: Optional[str], startup_name: str) -> str:
+        """Point reused research at the current startup."""
+        if source_startup and source_startup != startup_name:
+            research_text = research_text.replace(source_startup, startup_name)
+        return research_text
     
     def _parse_research_results(self, research_text: str) -> Dict[str, Any]:
         """Parse research results from text into structured data."""
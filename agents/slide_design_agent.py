@@ -2,7 +2,23 @@
 from langchain.llms.base import BaseLLM
 
 from memory.qdrant_memory import QdrantMemoryStore
-from prompts.slide_design_prompts import SLIDE_DESIGN_PROMPT_TEMPLATE
+from prompts.prompt_assembly import assemble_prompt
+from prompts.slide_design_prompts import SLIDE_DESIGN_PROMPT
+
+# Map slide types to content sections
+SLIDE_CONTENT_SECTIONS = {
+    "Title Slide": "overview",
+    "Problem": "problem",
+    "Solution": "solution",
+    "Market Size": "market_size",
+    "Product": "product",
+    "Business Model": "business_model",
+    "Traction": "traction",
+    "Competition": "competition",
+    "Team": "team",
+    "Financials": "financials",
+    "Ask": "ask"
+}
 
 class SlideDesignAgent:
     """Agent responsible for designing slides."""
@@ -28,52 +44,58 @@ class SlideDesignAgent:
         Returns:
             List of dictionaries containing slide content
         """
-        slides = []
+        return [
+            self.design_slide(startup_info, pitch_content, slide_template)
+            for slide_template in slide_templates
+        ]
+
+    def design_slide(
+        self,
+        startup_info: Dict[str, str],
+        pitch_content: Dict[str, Any],
+        slide_template: str
+    ) -> Dict[str, Any]:
+        """
+        Design a single slide.
+
+        Only the pitch content section this slide type draws on is needed, so a slide
+        can be designed as soon as its section is available.
+
+        Args:
+            startup_info: Dictionary containing information about the startup
+            pitch_content: Dictionary containing (at least the relevant) pitch content
+            slide_template: Slide type to design
+
+        Returns:
+            Dictionary containing slide content
+        """
+        # Create a prompt for slide design
+        prompt = assemble_prompt(
+            SLIDE_DESIGN_PROMPT,
+            startup_info,
+            slide_type=slide_template,
+            relevant_content=self._get_relevant_content(pitch_content, slide_template)
+        )
         
-        for slide_template in slide_templates:
-            # Create a prompt for slide design
-            prompt = SLIDE_DESIGN_PROMPT_TEMPLATE.format(
-                startup_name=startup_info["name"],
-                slide_type=slide_template,
-                relevant_content=self._get_relevant_content(pitch_content, slide_template),
-                industry=startup_info["industry"]
-            )
-            
-            # Get slide design from LLM
-            design_response = self.llm.generate([prompt])
-            design_text = design_response.generations[0][0].text
-            
-            # Parse the design response into structured data
-            slide = self._parse_slide_design(design_text, slide_template)
-            slides.append(slide)
-            
-            # Store slide design in memory
-            self.memory.add_to_memory(
-                text=design_text,
-                metadata={"type": "slide_design", "startup": startup_info["name"], "slide": slide_template}
-            )
+        # Get slide design from LLM
+        design_response = self.llm.generate([prompt.user], profile="slide_design", system=prompt.system)
+        design_text = design_response.generations[0][0].text
+        
+        # Parse the design response into structured data
+        slide = self._parse_slide_design(design_text, slide_template)
         
-        return slides
+        # Store slide design in memory
+        self.memory.add_to_memory(
+            text=design_text,
+            metadata={"type": "slide_design", "startup": startup_info["name"], "slide": slide_template}
+        )
+        
+        return slide
     
     def _get_relevant_content(self, pitch_content: Dict[str, Any], slide_type: str) -> str:
         """Get relevant content for a slide type."""
-        # Map slide types to content sections
-        content_map = {
-            "Title Slide": "overview",
-            "Problem": "problem",
-            "Solution": "solution",
-            "Market Size": "market_size",
-            "Product": "product",
-            "Business Model": "business_model",
-            "Traction": "traction",
-            "Competition": "competition",
-            "Team": "team",
-            "Financials": "financials",
-            "Ask": "ask"
-        }
-        
         # Get the relevant content section
-        section = content_map.get(slide_type, "overview")
+        section = SLIDE_CONTENT_SECTIONS.get(slide_type, "overview")
         content = pitch_content.get(section, [])
         
         return "\n".join(content)
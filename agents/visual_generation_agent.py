@@ -1,33 +1,112 @@
 # agents/visual_generation_agent.py
 import os
-import io
 import ast
+import threading
 import time
 import traceback
-from typing import List, Optional
+from typing import Any, Dict, Optional, Tuple
 from langchain.llms.base import BaseLLM
-import matplotlib
-matplotlib.use('Agg')  # Non-GUI backend
-import matplotlib.pyplot as plt
+
+from prompts.visual_generation_prompts import CHART_SPEC_PROMPT
+from utils.chart_renderer import CHART_TYPES, ChartSpecError, normalize_chart_spec, render_chart
+from utils.image_optimization import box_pixels, optimize_png, render_dpi
+from utils.json_extraction import extract_json
+from utils.render_pool import RenderError, RenderPool, get_render_pool
+from utils.visual_cache import VisualCache, visual_cache_key
 
 class VisualGenerationAgent:
     """
-    Agent that takes visual descriptions, calls an LLM to write safe matplotlib code,
-    executes it, and returns generated image file paths.
+    Agent that takes visual descriptions and returns generated images.
+
+    The LLM first describes the visual as a JSON chart spec, which is drawn by the
+    deterministic chart renderer. Descriptions that aren't charts, or specs that
+    don't validate, fall back to LLM-written matplotlib code executed in a
+    sandboxed worker process.
+
+    Images are sized to the slide placement box (box_size_in at ppi), palette
+    optimized, and stored in a content-addressed cache keyed on the description
+    (or chart spec), theme and size, so repeated visuals cost no LLM call or render.
     """
 
-    def __init__(self, llm: BaseLLM, output_dir: str = "generated_visuals"):
+    def __init__(
+        self,
+        llm: BaseLLM,
+        output_dir: str = "generated_visuals",
+        render_pool: Optional[RenderPool] = None,
+        render_workers: int = 2,
+        render_timeout: float = 20.0,
+        render_memory_limit_mb: Optional[int] = 1024,
+        use_chart_specs: bool = True,
+        theme: str = "default",
+        image_size: Tuple[float, float] = (8.0, 4.5),
+        box_size_in: Tuple[float, float] = (3.0, 2.25),
+        ppi: int = 150,
+        png_colors: int = 256,
+        cache_enabled: bool = True,
+        cache_max_mb: Optional[int] = 200
+    ):
         self.llm = llm
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def generate_visual_from_description(self, description: str, slide_index: int) -> Optional[str]:
+        # Warm worker processes are started on the first render
+        self._render_pool = render_pool
+        self.render_workers = render_workers
+        self.render_timeout = render_timeout
+        self.render_memory_limit_mb = render_memory_limit_mb
+
+        self.use_chart_specs = use_chart_specs
+        self.theme = theme
+        # Figure design size in inches; the DPI is chosen so the rendered pixels
+        # match the placement box and the image needs no scaling in the slide
+        self.image_size = image_size
+        self.max_pixels = box_pixels(*box_size_in, ppi)
+        self.dpi = render_dpi(image_size[0], self.max_pixels[0])
+        self.png_colors = png_colors
+        self.stats = {"chart_spec": 0, "code": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+        self.cache = None
+        if cache_enabled:
+            self.cache = VisualCache(
+                self.output_dir,
+                max_bytes=cache_max_mb * 1024 * 1024 if cache_max_mb else None
+            )
+
+    @property
+    def render_pool(self) -> RenderPool:
+        if self._render_pool is None:
+            self._render_pool = get_render_pool(
+                workers=self.render_workers,
+                timeout=self.render_timeout,
+                memory_limit_mb=self.render_memory_limit_mb
+            )
+        return self._render_pool
+
+    def generate_chart_spec(self, description: str) -> Optional[Dict[str, Any]]:
         """
-        Given a textual description of a visual, generate a matplotlib plot and save it.
-        
-        Returns path to saved image, or None on failure.
+        Ask the LLM for a JSON chart spec for a visual description.
+
+        Returns the normalized spec, or None if the description isn't a chart or
+        the spec doesn't validate.
+        """
+        prompt = CHART_SPEC_PROMPT.render(description=description, chart_types=", ".join(CHART_TYPES))
+        spec_response = self.llm.generate([prompt], profile="visual_spec")
+        spec = extract_json(spec_response.generations[0][0].text, expected_type=dict)
+        if spec is None or str(spec.get("type", "")).lower() == "none":
+            return None
+        try:
+            return normalize_chart_spec(spec)
+        except ChartSpecError as e:
+            print(f"[VisualGen] Invalid chart spec: {e}")
+            return None
+
+    def generate_visual_code(self, description: str) -> Optional[str]:
+        """
+        Ask the LLM for matplotlib code for a visual description.
+
+        Returns the code if it passes the safety check, or None.
         """
-        # Step 1: Ask LLM for matplotlib code
         prompt = (
             f"Write Python matplotlib code to generate a clear, professional business-style chart/illustration "
             f"based on the following description:\n\n"
@@ -37,39 +116,116 @@ class VisualGenerationAgent:
             f"- No file save in the code, just create the plot\n"
             f"- Use plt.figure() and plt.show() at the end\n"
         )
+        code_response = self.llm.generate([prompt], profile="visual_code")
+        code_text = code_response.generations[0][0].text.strip()
 
-        try:
-            code_response = self.llm.generate([prompt])
-            code_text = code_response.generations[0][0].text.strip()
-
-            # Step 2: Extract code block if wrapped in markdown
-            if "```" in code_text:
-                code_text = "\n".join(line for line in code_text.splitlines() if not line.strip().startswith("```"))
+        # Extract code block if wrapped in markdown
+        if "```" in code_text:
+            code_text = "\n".join(line for line in code_text.splitlines() if not line.strip().startswith("```"))
 
-            # Step 3: Validate with AST to avoid unsafe operations
-            if not self._is_code_safe(code_text):
-                print(f"[VisualGen] Unsafe code detected for slide {slide_index}")
-                return None
+        # Validate with AST to avoid unsafe operations
+        if not self._is_code_safe(code_text):
+            return None
+        return code_text
 
-            # Step 4: Execute the code in a restricted environment
-            fig = plt.figure()
-            exec_globals = {"plt": plt}
-            exec_locals = {}
-            exec(code_text, exec_globals, exec_locals)
+    def render_visual(self, description: str) -> Optional[bytes]:
+        """
+        Generate and render a visual for a description.
 
-            # Step 5: Save image
-            filename = f"slide_{slide_index}_{int(time.time())}.png"
-            filepath = os.path.join(self.output_dir, filename)
-            plt.savefig(filepath, bbox_inches='tight')
-            plt.close(fig)
+        Safe to call from several threads; renders run in parallel across the
+        pool's worker processes.
 
-            return filepath
+        Returns PNG image bytes, or None on failure.
+        """
+        try:
+            if self.use_chart_specs:
+                spec = self.generate_chart_spec(description)
+                if spec is not None:
+                    try:
+                        image_bytes = self._render_spec(spec)
+                        self._count("chart_spec")
+                        return image_bytes
+                    except Exception as e:
+                        print(f"[VisualGen] Chart spec failed to render, falling back to code: {e}")
 
+            # Fallback: free-form plotting code in the sandbox
+            code_text = self.generate_visual_code(description)
+            if code_text is None:
+                print(f"[VisualGen] Unsafe code detected for: {description[:60]}")
+                self._count("failed")
+                return None
+            image_bytes = self._finalize(self.render_pool.render(code_text))
+            self._count("code")
+            return image_bytes
+        except RenderError as e:
+            print(f"[VisualGen] Render failed: {e}")
+            self._count("failed")
+            return None
         except Exception as e:
             print(f"[VisualGen] Error generating visual: {e}")
             traceback.print_exc()
+            self._count("failed")
+            return None
+
+    def _render_spec(self, spec: Dict[str, Any]) -> bytes:
+        """Render a chart spec, reusing the image of an identical spec if cached."""
+        if self.cache is not None:
+            spec_key = visual_cache_key("spec", spec, self.theme, self._render_size())
+            cached = self.cache.get_bytes(spec_key)
+            if cached is not None:
+                return cached
+        width, height = self.image_size
+        image_bytes = self._finalize(render_chart(spec, width=width, height=height, dpi=self.dpi, theme=self.theme))
+        if self.cache is not None:
+            self.cache.put(spec_key, image_bytes)
+        return image_bytes
+
+    def _finalize(self, image_bytes: bytes) -> bytes:
+        """Fit a rendered image to the placement box and shrink it for embedding."""
+        return optimize_png(image_bytes, self.max_pixels, self.png_colors)
+
+    def _render_size(self) -> Tuple[Any, ...]:
+        return (*self.image_size, self.dpi, *self.max_pixels, self.png_colors)
+
+    def generate_visual_image(self, description: str) -> Optional[bytes]:
+        """
+        Generate a visual for a description and return its PNG bytes.
+
+        Goes through the cache like generate_visual_from_description, but the bytes
+        stay in memory for the exporter instead of being reopened from disk.
+        """
+        if self.cache is not None:
+            key = visual_cache_key("description", description, self.theme, self._render_size())
+            return self.cache.get_or_create_bytes(key, lambda: self.render_visual(description))
+        return self.render_visual(description)
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def generate_visual_from_description(self, description: str, slide_index: int, visual_index: int = 0) -> Optional[str]:
+        """
+        Given a textual description of a visual, generate a matplotlib plot and save it.
+
+        With the cache enabled the image is stored under its content address, and an
+        identical description (in this deck or an earlier one) returns the stored path.
+        
+        Returns path to saved image, or None on failure.
+        """
+        if self.cache is not None:
+            key = visual_cache_key("description", description, self.theme, self._render_size())
+            return self.cache.get_or_create(key, lambda: self.render_visual(description))
+
+        image_bytes = self.render_visual(description)
+        if image_bytes is None:
             return None
 
+        filename = f"slide_{slide_index}_{visual_index}_{int(time.time())}.png"
+        filepath = os.path.join(self.output_dir, filename)
+        with open(filepath, "wb") as f:
+            f.write(image_bytes)
+        return filepath
+
     def _is_code_safe(self, code: str) -> bool:
         """
         Naive safety check: disallow imports, file I/O, and OS/system calls.
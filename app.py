@@ -1,4 +1,5 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import os
 from dotenv import load_dotenv
 import json
@@ -12,8 +13,11 @@ load_dotenv()
 
 # Import your existing modules
 from utils.presentation_exporter import save_as_powerpoint
+from utils.image_fetcher import prefetch_slide_images
+from utils.preview_renderer import render_html, render_markdown
 from agents.orchestrator import PitchPilotOrchestrator
 from config import PitchPilotConfig
+from utils.token_accounting import TokenBudgetExceeded
 
 # Page configuration
 st.set_page_config(
@@ -203,7 +207,8 @@ def generate_pitch_interface():
         col3, col4 = st.columns(2)
         
         with col3:
-            slide_count = st.slider("Number of Slides", 8, 15, 11)
+            max_slides = len(PitchPilotConfig().default_slides)
+            slide_count = st.slider("Number of Slides", 5, max_slides, max_slides)
             include_financials = st.checkbox("Include Financial Projections", True)
             include_competition = st.checkbox("Include Competitor Analysis", True)
         
@@ -231,12 +236,25 @@ def generate_pitch_interface():
             "team": team
         }
         
+        # Deck options; disabled slides skip their LLM calls entirely
+        options = {
+            "slide_count": slide_count,
+            "include_financials": include_financials,
+            "include_competition": include_competition
+        }
+        
         # Generate pitch deck with progress tracking
-        generate_pitch_deck_with_progress(startup_info, template_style)
+        generate_pitch_deck_with_progress(startup_info, template_style, options)
+    
+    # Latest deck survives reruns (e.g. the export button) via session state
+    if st.session_state.get("current_deck"):
+        display_generated_deck(st.session_state["current_deck"])
 
-def generate_pitch_deck_with_progress(startup_info, template_style):
+def generate_pitch_deck_with_progress(startup_info, template_style, options=None):
     """Generate pitch deck with real-time progress updates"""
     
+    st.session_state.pop("current_deck", None)
+    
     # Progress container
     progress_container = st.container()
     
@@ -262,9 +280,10 @@ def generate_pitch_deck_with_progress(startup_info, template_style):
             time.sleep(2)
             
             # Step 2: Competitor Analysis
-            status_text.text("🏢 Analyzing competitors...")
-            progress_bar.progress(45)
-            time.sleep(2)
+            if (options or {}).get("include_competition", True):
+                status_text.text("🏢 Analyzing competitors...")
+                progress_bar.progress(45)
+                time.sleep(2)
             
             # Step 3: Content Creation
             status_text.text("✍️ Creating pitch content...")
@@ -282,49 +301,86 @@ def generate_pitch_deck_with_progress(startup_info, template_style):
             time.sleep(1)
             
             # Generate the actual pitch deck
-            pitch_deck = orchestrator.generate_pitch_deck(startup_info)
+            pitch_deck = orchestrator.generate_pitch_deck(startup_info, options)
             
-            # Step 6: Export
-            status_text.text("💾 Exporting PowerPoint...")
-            progress_bar.progress(95)
+            # Step 6: Illustrations (optional); the PowerPoint itself is only built on request
+            illustrations = None
+            if config.illustrations_enabled:
+                status_text.text("🖼️ Fetching illustrations...")
+                progress_bar.progress(95)
+                illustrations = prefetch_slide_images(
+                    pitch_deck, startup_info['industry'], base_url=config.image_base_url,
+                    max_concurrency=config.image_fetch_concurrency, timeout=config.image_fetch_timeout,
+                    retries=config.image_fetch_retries
+                )
             
             output_filename = f"{startup_info['name'].replace(' ', '_')}_Pitch_Deck.pptx"
-            save_as_powerpoint(pitch_deck, output_filename, industry=startup_info['industry'])
+            st.session_state["current_deck"] = {
+                "pitch_deck": pitch_deck,
+                "file_name": output_filename,
+                "industry": startup_info['industry'],
+                "illustrations": illustrations,
+                "visual_box": config.visual_box_in
+            }
+            # A regenerated deck replaces any earlier export under the same name
+            st.session_state.setdefault("generated_decks", {}).pop(output_filename, None)
             
             progress_bar.progress(100)
             status_text.text("✅ Pitch deck generated successfully!")
             
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Success message
-            st.markdown(f"""
-            <div class="success-message">
-                <h3>🎉 Success! Your pitch deck is ready!</h3>
-                <p><strong>File:</strong> {output_filename}</p>
-                <p><strong>Slides Generated:</strong> {len(pitch_deck.get('slides', []))}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            # Keep token usage for the dashboard
+            st.session_state.setdefault("token_usage_history", []).append({
+                "name": startup_info['name'],
+                "file": output_filename,
+                "usage": pitch_deck.get("token_usage", {})
+            })
             
-            # Display pitch deck summary
-            display_pitch_summary(pitch_deck)
-            
-            # Download button
-            if os.path.exists(output_filename):
-                with open(output_filename, "rb") as file:
-                    st.download_button(
-                        label="📥 Download Pitch Deck",
-                        data=file.read(),
-                        file_name=output_filename,
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                        type="primary",
-                        use_container_width=True
-                    )
+            st.markdown('</div>', unsafe_allow_html=True)
             
+        except TokenBudgetExceeded as e:
+            st.error(f"❌ {str(e)}. Raise DECK_TOKEN_BUDGET or shorten the inputs.")
+            display_token_usage(e.usage)
         except Exception as e:
             st.error(f"❌ Error generating pitch deck: {str(e)}")
             st.exception(e)
 
-def display_pitch_summary(pitch_deck):
+def display_generated_deck(deck):
+    """Show the latest deck with an instant preview; the PowerPoint is exported lazily"""
+    pitch_deck = deck["pitch_deck"]
+    file_name = deck["file_name"]
+    
+    # Success message
+    st.markdown(f"""
+    <div class="success-message">
+        <h3>🎉 Success! Your pitch deck is ready!</h3>
+        <p><strong>File:</strong> {file_name}</p>
+        <p><strong>Slides Generated:</strong> {len(pitch_deck.get('slides', []))}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Display pitch deck summary and preview
+    display_pitch_summary(pitch_deck, deck.get("illustrations"))
+    
+    # Export only when asked; the bytes are kept for the dashboard
+    decks = st.session_state.setdefault("generated_decks", {})
+    if file_name not in decks:
+        if st.button("💾 Export PowerPoint", type="primary", use_container_width=True):
+            with st.spinner("💾 Exporting PowerPoint..."):
+                decks[file_name] = save_as_powerpoint(pitch_deck, industry=deck["industry"],
+                                                      visual_box=deck["visual_box"],
+                                                      illustrations=deck.get("illustrations"))
+    
+    if file_name in decks:
+        st.download_button(
+            label="📥 Download Pitch Deck",
+            data=decks[file_name],
+            file_name=file_name,
+            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            type="primary",
+            use_container_width=True
+        )
+
+def display_pitch_summary(pitch_deck, illustrations=None):
     """Display a summary of the generated pitch deck"""
     
     st.markdown("## 📋 Pitch Deck Summary")
@@ -367,51 +423,95 @@ def display_pitch_summary(pitch_deck):
         </div>
         """, unsafe_allow_html=True)
     
-    # Slide preview
-    st.markdown("### 📑 Slide Overview")
-    for i, slide in enumerate(pitch_deck.get('slides', [])[:5]):  # Show first 5 slides
-        with st.expander(f"Slide {i+1}: {slide.get('title', 'Untitled')}"):
-            st.write("**Content:**")
-            for bullet in slide.get('content', []):
-                st.write(f"• {bullet}")
-            
-            if slide.get('visual_elements'):
-                st.write("**Visual Elements:**")
-                for visual in slide.get('visual_elements', []):
-                    st.write(f"🎨 {visual}")
+    # Slide preview: the whole deck as self-contained HTML, rendered in milliseconds
+    st.markdown("### 📑 Slide Preview")
+    preview_html = render_html(pitch_deck, illustrations)
+    components.html(preview_html, height=620, scrolling=True)
+    
+    col1, col2 = st.columns(2)
+    file_stem = pitch_deck.get('startup_info', {}).get('name', 'Pitch').replace(' ', '_')
+    with col1:
+        st.download_button("🌐 Download HTML Preview", data=preview_html,
+                           file_name=f"{file_stem}_Preview.html", mime="text/html",
+                           use_container_width=True)
+    with col2:
+        st.download_button("📝 Download Markdown", data=render_markdown(pitch_deck, illustrations),
+                           file_name=f"{file_stem}_Pitch_Deck.md", mime="text/markdown",
+                           use_container_width=True)
+    
+    if pitch_deck.get('token_usage'):
+        st.markdown("### 🔢 Token Usage")
+        display_token_usage(pitch_deck['token_usage'])
+
+def display_token_usage(usage):
+    """Display token totals, estimated cost and per-agent/per-stage breakdowns"""
+    if not usage:
+        return
+    total = usage.get('total', {})
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Tokens", f"{total.get('total_tokens', 0):,}")
+    col2.metric("LLM Calls", total.get('calls', 0))
+    col3.metric("Est. Cost", f"${usage.get('estimated_cost_usd', 0):.4f}")
+    if usage.get('budget'):
+        col4.metric("Budget Used", f"{total.get('total_tokens', 0) / usage['budget']:.0%}")
+    else:
+        col4.metric("Prompt Cache Hits", f"{total.get('cached_ratio', 0):.0%}")
+    
+    col5, col6 = st.columns(2)
+    with col5:
+        st.write("**By Agent:**")
+        st.table([
+            {"agent": name, "calls": u["calls"], "prompt": u["prompt_tokens"], "cached": u["cached_tokens"], "completion": u["completion_tokens"]}
+            for name, u in usage.get('by_agent', {}).items()
+        ])
+    with col6:
+        st.write("**By Stage:**")
+        st.table([
+            {"stage": name, "calls": u["calls"], "prompt": u["prompt_tokens"], "cached": u["cached_tokens"], "completion": u["completion_tokens"]}
+            for name, u in usage.get('by_stage', {}).items()
+        ])
 
 def dashboard_interface():
     st.markdown("## 📊 Dashboard")
     
-    # Check for existing pitch decks
-    pptx_files = list(Path(".").glob("*_Pitch_Deck.pptx"))
+    # Token usage of decks generated in this session
+    token_history = st.session_state.get("token_usage_history", [])
+    if token_history:
+        st.markdown(f"### 🔢 Token Usage This Session ({sum(h['usage'].get('total', {}).get('total_tokens', 0) for h in token_history):,} tokens)")
+        for entry in reversed(token_history):
+            total = entry['usage'].get('total', {})
+            with st.expander(f"{entry['name']}: {total.get('total_tokens', 0):,} tokens, ~${entry['usage'].get('estimated_cost_usd', 0):.4f}"):
+                display_token_usage(entry['usage'])
+        st.markdown("---")
+    
+    # Pitch decks generated in this session (kept in memory, per user)
+    decks = st.session_state.get("generated_decks", {})
     
-    if not pptx_files:
+    if not decks:
         st.info("No pitch decks generated yet. Create your first pitch deck in the 'Generate Pitch' tab!")
         return
     
-    st.markdown(f"### 📁 Generated Pitch Decks ({len(pptx_files)})")
+    st.markdown(f"### 📁 Generated Pitch Decks ({len(decks)})")
     
-    for file_path in pptx_files:
+    for file_name, data in list(decks.items()):
         col1, col2, col3 = st.columns([3, 1, 1])
         
         with col1:
-            st.write(f"📄 **{file_path.name}**")
-            st.write(f"Size: {file_path.stat().st_size / 1024:.1f} KB")
+            st.write(f"📄 **{file_name}**")
+            st.write(f"Size: {len(data) / 1024:.1f} KB")
         
         with col2:
-            if st.button("📥 Download", key=f"download_{file_path.name}"):
-                with open(file_path, "rb") as file:
-                    st.download_button(
-                        label="Download",
-                        data=file.read(),
-                        file_name=file_path.name,
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                    )
+            st.download_button(
+                label="📥 Download",
+                data=data,
+                file_name=file_name,
+                mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                key=f"download_{file_name}"
+            )
         
         with col3:
-            if st.button("🗑️ Delete", key=f"delete_{file_path.name}"):
-                os.remove(file_path)
+            if st.button("🗑️ Delete", key=f"delete_{file_name}"):
+                del decks[file_name]
                 st.rerun()
         
         st.markdown("---")
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for context prioritization at thousands of items.
+
+Compares the original per-item set-overlap implementation with ContextScorer
+(byte-level numpy tokenization, bulk BM25, partial-sort top-k) on synthetic
+context items.
+
+Usage:
+    python -m benchmarks.context_prioritization_benchmark --items 1000 5000 20000
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from utils.context_prioritization import ContextScorer
+
+STARTUP_INFO = {
+    "name": "Example Startup",
+    "industry": "FinTech",
+    "problem_statement": "Small businesses struggle with cash flow management.",
+    "solution": "AI-powered cash flow prediction and management platform.",
+    "target_market": "Small to medium-sized businesses in the US.",
+    "business_model": "SaaS subscription, $49/month/user.",
+    "traction": "500 beta users, 15% MoM growth.",
+    "team": "3 co-founders with fintech and ML backgrounds."
+}
+
+FILLER = (
+    "market growth revenue customers platform investors pricing churn retention funnel "
+    "enterprise healthcare logistics education payments lending compliance analytics"
+).split()
+
+
+def legacy_prioritize(context_items: List[str], startup_info: Dict[str, str]) -> List[str]:
+    """The previous implementation, kept here as the baseline."""
+    startup_text = " ".join(startup_info.values())
+    scored_items = []
+    for item in context_items:
+        words = set(startup_text.lower().split())
+        item_words = set(item.lower().split())
+        scored_items.append((item, len(words.intersection(item_words))))
+    scored_items.sort(key=lambda x: x[1], reverse=True)
+    return [item for item, _ in scored_items]
+
+
+def make_items(count: int, seed: int = 3) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = FILLER + " ".join(STARTUP_INFO.values()).lower().split()
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(40, 200))) for _ in range(count)]
+
+
+def best_of(func, repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    scorer = ContextScorer(STARTUP_INFO)
+    print(f"{'items':>8}{'legacy ms':>12}{'scorer ms':>12}{'top-k ms':>12}")
+    for count in args.items:
+        items = make_items(count)
+        legacy = best_of(lambda: legacy_prioritize(items, STARTUP_INFO))
+        full = best_of(lambda: scorer.top_k(items))
+        top = best_of(lambda: scorer.top_k(items, args.top_k))
+        print(f"{count:>8}{legacy * 1000:>12.1f}{full * 1000:>12.1f}{top * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare cold-start cost of the embedding backends.
+
+Each backend is measured in a fresh interpreter so import caches and already
+loaded shared libraries don't leak between runs. Reported per backend:
+import time of the loader module, model load time, first-embed latency,
+steady-state embed latency and peak RSS.
+
+Usage:
+    python -m benchmarks.embedding_startup_benchmark --backends torch onnx onnx-int8 fastembed
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import List, Optional
+
+from memory.embeddings import EMBEDDING_BACKENDS
+
+MEASURE_SNIPPET = """
+import json, resource, sys, time
+start = time.perf_counter()
+from memory.embeddings import LazyEmbeddings
+embeddings = LazyEmbeddings(sys.argv[1], backend=sys.argv[2])
+imported = time.perf_counter()
+embeddings.model
+loaded = time.perf_counter()
+embeddings.embed_query("AI-powered cash flow prediction for small businesses")
+first = time.perf_counter()
+for _ in range(20):
+    embeddings.embed_query("Small businesses struggle with cash flow management.")
+steady = (time.perf_counter() - first) / 20
+print(json.dumps({
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_embed_ms": (first - loaded) * 1000,
+    "steady_embed_ms": steady * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def measure(model_name: str, backend: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", MEASURE_SNIPPET, model_name, backend],
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<12}{'import s':>10}{'load s':>10}{'first ms':>10}{'embed ms':>10}{'RSS MB':>10}")
+    for backend in args.backends:
+        row = measure(args.model, backend)
+        if "error" in row:
+            print(f"{backend:<12}  error: {row['error']}")
+            continue
+        print(
+            f"{backend:<12}{row['import_s']:>10.2f}{row['load_s']:>10.2f}{row['first_embed_ms']:>10.1f}"
+            f"{row['steady_embed_ms']:>10.2f}{row['rss_mb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark Qdrant quantization and HNSW settings on a synthetic corpus.
+
+For every setting a throwaway collection is created, filled with the same
+clustered unit vectors and queried with the same held-out queries. Recall@k is
+measured against exact brute-force cosine search, latency is wall-clock per
+query, and RAM is an estimate of vectors + quantized vectors + HNSW links.
+
+Usage:
+    python -m benchmarks.qdrant_index_benchmark --url http://localhost:6333 --points 20000
+"""
+import argparse
+import time
+import uuid
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from memory.qdrant_memory import build_hnsw_config, build_quantization_config, build_search_params
+
+SETTINGS: List[Dict[str, Any]] = [
+    {"name": "float32"},
+    {"name": "float32-ef128", "search_ef": 128},
+    {"name": "hnsw-m32", "hnsw_m": 32, "hnsw_ef_construct": 200},
+    {"name": "scalar-int8", "quantization": "scalar"},
+    {"name": "scalar-int8-norescore", "quantization": "scalar", "rescore": False},
+    {"name": "scalar-int8-ondisk", "quantization": "scalar", "on_disk": True},
+    {"name": "binary", "quantization": "binary", "rescore": False},
+    {"name": "binary-rescore", "quantization": "binary", "oversampling": 3.0},
+    {"name": "binary-rescore-ondisk", "quantization": "binary", "oversampling": 3.0, "on_disk": True},
+]
+
+
+def make_corpus(points: int, queries: int, dimension: int, clusters: int = 64, seed: int = 7):
+    """Generate clustered, L2-normalised vectors that look roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=points + queries)
+    data = centers[labels] + 0.6 * rng.normal(size=(points + queries, dimension)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data[:points], data[points:]
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force top-k indices by cosine similarity (vectors are normalised)."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return top
+
+
+def estimate_ram_bytes(points: int, dimension: int, setting: Dict[str, Any]) -> int:
+    """Rough RAM footprint: original vectors (unless on disk), quantized copy and HNSW links."""
+    ram = 0 if setting.get("on_disk") else points * dimension * 4
+    if setting.get("quantization") == "scalar":
+        ram += points * dimension
+    elif setting.get("quantization") == "binary":
+        ram += points * dimension // 8
+    m = setting.get("hnsw_m") or 16
+    ram += points * m * 2 * 4
+    return ram
+
+
+def wait_for_index(client: QdrantClient, collection_name: str, timeout: float = 600.0):
+    """Block until the optimizer has finished building the index."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(collection_name)
+        if str(info.status).lower().endswith("green"):
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"Collection {collection_name} was not indexed within {timeout}s")
+
+
+def run_setting(
+    client: QdrantClient,
+    setting: Dict[str, Any],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int
+) -> Dict[str, Any]:
+    collection_name = f"pitchpilot_bench_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=corpus.shape[1],
+            distance=Distance.COSINE,
+            on_disk=setting.get("on_disk", False)
+        ),
+        hnsw_config=build_hnsw_config(setting.get("hnsw_m"), setting.get("hnsw_ef_construct")),
+        quantization_config=build_quantization_config(setting.get("quantization"))
+    )
+    try:
+        start = time.perf_counter()
+        batch_size = 512
+        for offset in range(0, len(corpus), batch_size):
+            batch = corpus[offset:offset + batch_size]
+            client.upsert(
+                collection_name=collection_name,
+                points=[
+                    PointStruct(id=offset + i, vector=vector.tolist(), payload={})
+                    for i, vector in enumerate(batch)
+                ]
+            )
+        wait_for_index(client, collection_name)
+        build_seconds = time.perf_counter() - start
+
+        search_params = build_search_params(
+            quantization=setting.get("quantization"),
+            search_ef=setting.get("search_ef"),
+            rescore=setting.get("rescore", True),
+            oversampling=setting.get("oversampling")
+        )
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = client.search(
+                collection_name=collection_name,
+                query_vector=query.tolist(),
+                limit=k,
+                search_params=search_params
+            )
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(expected.tolist()) & {result.id for result in results})
+
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            "name": setting["name"],
+            "recall": hits / (len(queries) * k),
+            "p50_ms": float(np.percentile(latencies_ms, 50)),
+            "p95_ms": float(np.percentile(latencies_ms, 95)),
+            "build_s": build_seconds,
+            "ram_mb": estimate_ram_bytes(len(corpus), corpus.shape[1], setting) / 2**20,
+        }
+    finally:
+        client.delete_collection(collection_name)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    client = QdrantClient(url=args.url, api_key=args.api_key)
+    corpus, queries = make_corpus(args.points, args.queries, args.dimension)
+    truth = exact_neighbours(corpus, queries, args.k)
+
+    print(f"{'setting':<24}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}{'build s':>10}{'RAM MB':>10}")
+    for setting in SETTINGS:
+        row = run_setting(client, setting, corpus, queries, truth, args.k)
+        print(
+            f"{row['name']:<24}{row['recall']:>10.3f}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['build_s']:>10.1f}{row['ram_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
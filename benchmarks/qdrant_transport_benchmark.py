@@ -0,0 +1,113 @@
+"""
+Compare Qdrant transports: sync REST, sync gRPC, async REST and async gRPC.
+
+Random vectors are used so only the transport is measured, not embedding. Each
+transport runs the same mix of single-point upserts and searches; the async
+variants keep up to --concurrency requests in flight on one shared client.
+
+Usage:
+    python -m benchmarks.qdrant_transport_benchmark --url http://localhost:6333 --requests 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import List, Optional
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import PointStruct
+
+from memory.qdrant_memory import build_collection_config, get_qdrant_client
+from utils.latency import LatencyRecorder
+
+
+def random_vector(dimension: int) -> List[float]:
+    return [random.uniform(-1, 1) for _ in range(dimension)]
+
+
+def run_sync(client, collection_name: str, requests: int, dimension: int, recorder: LatencyRecorder, label: str):
+    for i in range(requests):
+        if i % 4 == 0:
+            point = PointStruct(id=str(uuid.uuid4()), vector=random_vector(dimension), payload={"text": "x"})
+            with recorder.time(f"{label}.upsert"):
+                client.upsert(collection_name=collection_name, points=[point])
+        else:
+            with recorder.time(f"{label}.search"):
+                client.search(collection_name=collection_name, query_vector=random_vector(dimension), limit=5)
+
+
+async def run_async(
+    url: str,
+    api_key: Optional[str],
+    prefer_grpc: bool,
+    collection_name: str,
+    requests: int,
+    dimension: int,
+    concurrency: int,
+    recorder: LatencyRecorder,
+    label: str
+):
+    # A private client: closing it must not affect the shared per-loop clients
+    client = AsyncQdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            if i % 4 == 0:
+                point = PointStruct(id=str(uuid.uuid4()), vector=random_vector(dimension), payload={"text": "x"})
+                with recorder.time(f"{label}.upsert"):
+                    await client.upsert(collection_name=collection_name, points=[point])
+            else:
+                with recorder.time(f"{label}.search"):
+                    await client.search(collection_name=collection_name, query_vector=random_vector(dimension), limit=5)
+
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await client.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    collection_name = f"pitchpilot_transport_{uuid.uuid4().hex[:8]}"
+    admin = get_qdrant_client(args.url, args.api_key)
+    admin.create_collection(collection_name=collection_name, **build_collection_config(args.dimension))
+    recorder = LatencyRecorder()
+    wall = {}
+    try:
+        for label, prefer_grpc in (("sync.rest", False), ("sync.grpc", True)):
+            client = get_qdrant_client(args.url, args.api_key, prefer_grpc=prefer_grpc)
+            start = time.perf_counter()
+            run_sync(client, collection_name, args.requests, args.dimension, recorder, label)
+            wall[label] = time.perf_counter() - start
+        for label, prefer_grpc in (("async.rest", False), ("async.grpc", True)):
+            start = time.perf_counter()
+            asyncio.run(run_async(
+                args.url, args.api_key, prefer_grpc, collection_name,
+                args.requests, args.dimension, args.concurrency, recorder, label
+            ))
+            wall[label] = time.perf_counter() - start
+    finally:
+        admin.delete_collection(collection_name)
+
+    print(f"{'operation':<22}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in sorted(recorder.summary().items()):
+        print(
+            f"{name:<22}{row['count']:>7}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+        )
+    print()
+    for label, seconds in wall.items():
+        print(f"{label:<22}{args.requests / seconds:>10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
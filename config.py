@@ -11,17 +11,118 @@ class PitchPilotConfig:
         # LangChain settings
         self.temperature = 0.2
         self.max_tokens = 2048
+
+        # Generation profiles per agent/prompt; each overrides max_tokens, temperature and stop.
+        # Derive budgets from recorded output lengths with: python -m utils.generation_budgets
+        self.generation_profiles = {
+            "research": {"max_tokens": 1200},
+            "competitor_analysis": {"max_tokens": 1000},
+            "pitch_creation": {"max_tokens": 900},
+            "slide_design": {"max_tokens": 200, "stop": ["\nNote:"]},
+            "reflection_score": {"max_tokens": 700, "temperature": 0.0},
+            "reflection_improve": {"max_tokens": 200},
+            "distillation": {"max_tokens": 500, "temperature": 0.0},
+            "visual_spec": {"max_tokens": 300, "temperature": 0.0},
+            "visual_code": {"max_tokens": 700},
+        }
+        self.output_length_log = os.getenv("OUTPUT_LENGTH_LOG")  # JSONL path, e.g. "output_lengths.jsonl"
+        # Budget recommendation from that log: cover this percentile of observed completion
+        # lengths plus headroom, rounded up; profiles truncated (finish_reason "length") more
+        # often than the tolerance have their current limit grown by the growth factor instead
+        self.budget_percentile = 99
+        self.budget_headroom = 1.2
+        self.budget_round_to = 16
+        self.budget_truncation_tolerance = 0.02
+        self.budget_truncation_growth = 1.5
+
+        # Token accounting
+        deck_token_budget = os.getenv("DECK_TOKEN_BUDGET")
+        self.deck_token_budget = int(deck_token_budget) if deck_token_budget else None  # per deck; None = unlimited
+        # USD per million (input, output) tokens, for cost estimates
+        self.token_costs_per_million = {
+            "meta-llama/Llama-3.3-70B-Instruct": (0.59, 0.79),
+            "meta-llama/Llama-3.1-8B-Instruct": (0.05, 0.08),
+        }
         
         # Qdrant settings
         self.qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
         self.qdrant_api_key = os.getenv("QDRANT_API_KEY")
+        self.qdrant_prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+        self.qdrant_grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
         self.collection_name = "pitchpilot_memory"
         self.vector_dimension = 384
+        self.embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        self.embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch")  # torch, onnx, onnx-int8 or fastembed
+        self.embedding_onnx_file = None  # ONNX weights file for onnx-int8, e.g. "onnx/model_qint8_arm64.onnx"
+
+        # Qdrant index settings (applied when the collection is first created)
+        self.qdrant_quantization = os.getenv("QDRANT_QUANTIZATION") or None  # None, "scalar" or "binary"
+        self.qdrant_quantization_rescore = True
+        self.qdrant_quantization_oversampling = 2.0
+        self.qdrant_on_disk_vectors = os.getenv("QDRANT_ON_DISK_VECTORS", "false").lower() == "true"
+        self.qdrant_hnsw_m = None  # None keeps the server default (16)
+        self.qdrant_hnsw_ef_construct = None  # None keeps the server default (100)
+        self.qdrant_search_ef = None  # None lets Qdrant pick ef at query time
         
         # Agent settings
         self.max_iterations = 5
         self.reflection_threshold = 0.7
+        self.reflection_max_iterations = 3
+        self.reflection_max_workers = 4  # sections rewritten in parallel
         self.memory_pruning_threshold = 0.5
+
+        # Pipeline settings
+        self.stream_pitch_content = True  # design slides while the pitch content is still streaming
+        self.pipeline_workers = 6  # threads for per-section reflection and slide design
+
+        # Sandboxed rendering of generated matplotlib code
+        self.render_workers = min(4, os.cpu_count() or 1)  # warm worker processes
+        self.render_timeout = 20.0  # seconds per visual before the worker is killed
+        self.render_memory_limit_mb = 1024  # address-space limit per worker
+        self.visual_chart_specs = True  # ask for a JSON chart spec first, free-form code as fallback
+        self.visual_theme = "default"  # chart palette: default, blue, purple, green, orange
+        self.visual_max_per_slide = 1  # visuals are ranked by slide type and description
+        self.visual_max_per_deck = 6
+        self.visual_cache_enabled = True  # content-addressed image cache in generated_visuals/
+        self.visual_cache_max_mb = 200  # least recently used images are evicted beyond this
+        # Where visuals sit on a content slide, in inches: left, top, width, height.
+        # Images are rendered to the box's pixel size at visual_ppi.
+        self.visual_box_in = (6.0, 1.5, 3.0, 2.25)
+        self.visual_ppi = 150
+        self.visual_png_colors = 256  # palette size for PNG quantization; 0 keeps full color
+
+        # Remote illustrations for key slides, prefetched concurrently before export
+        self.illustrations_enabled = False
+        self.image_fetch_concurrency = 4  # requests in flight over one pooled client
+        self.image_fetch_timeout = 10.0  # seconds per download
+        self.image_fetch_retries = 2  # retries for connection errors, timeouts and 429/5xx responses
+        self.image_base_url = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai")
+
+        # Bulk (cohort) export of many decks at once
+        self.export_workers = min(4, os.cpu_count() or 1)  # processes running python-pptx in parallel
+
+        # Context distillation (compress research/competitor output before templating)
+        self.distillation_enabled = True
+        self.distillation_model = "meta-llama/Llama-3.1-8B-Instruct"
+        self.distillation_token_budget = 250  # per distilled field
+        self.distillation_cache_size = 256
+
+        # Memory near-duplicate detection (SimHash, plus optional vector check)
+        self.memory_dedupe_enabled = True
+        self.memory_dedupe_max_distance = 8  # max differing SimHash bits out of 64
+        self.memory_dedupe_vector_threshold = None  # e.g. 0.97 to also compare embeddings before upserting
+        self.memory_dedupe_mode = "skip"  # "skip" or "merge" (bump duplicate_count on the kept memory)
+
+        # Pitch context retrieval (MMR over fetched candidates, packed into a token budget)
+        self.context_limit = 10
+        self.context_fetch_k = 30
+        self.context_mmr_lambda = 0.5
+        self.context_token_budget = 800
+
+        # Semantic research cache (reuse research for near-identical startups)
+        self.research_cache_enabled = os.getenv("RESEARCH_CACHE_ENABLED", "false").lower() == "true"
+        self.research_cache_threshold = 0.93
+        self.research_cache_candidates = 5
         
         # Pitch deck settings
         self.default_slides = [
@@ -37,3 +138,17 @@ class PitchPilotConfig:
             "Financials",
             "Ask"
         ]
+        # Order in which slides are kept when a shorter deck is requested
+        self.slide_priority = [
+            "Title Slide",
+            "Problem",
+            "Solution",
+            "Market Size",
+            "Business Model",
+            "Ask",
+            "Traction",
+            "Team",
+            "Product",
+            "Competition",
+            "Financials"
+        ]
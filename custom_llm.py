@@ -1,33 +1,136 @@
 # custom_llm.py
 import os
-from typing import List, Optional, Any
+import json
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Any
 from huggingface_hub import InferenceClient
 from langchain_core.language_models import LLM
 from langchain_core.outputs import Generation
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun
 from langchain_core.outputs import GenerationChunk
 
+from utils.token_counting import count_tokens
+from utils.token_accounting import get_current_ledger
+
+_output_log_lock = threading.Lock()
+
 class GroqHuggingFaceLLM(LLM):
     model: str
     provider: str = "groq"
     api_key: Optional[str] = None
     temperature: float = 0.7
     max_tokens: int = 512
+    # Named per-agent/per-prompt overrides of max_tokens, temperature and stop
+    generation_profiles: Dict[str, Dict[str, Any]] = {}
+    # JSONL file recording output length per profile, for deriving budgets
+    output_length_log: Optional[str] = None
+
+    def _generation_params(self, profile: Optional[str], stop: Optional[List[str]], **kwargs) -> Dict[str, Any]:
+        """Merge defaults, the named profile and explicit call arguments (highest precedence)."""
+        params = {"max_tokens": self.max_tokens, "temperature": self.temperature, "stop": None}
+        params.update(self.generation_profiles.get(profile, {}) if profile else {})
+        params.update({key: value for key, value in kwargs.items() if key in params and value is not None})
+        if stop:
+            params["stop"] = stop
+        return params
+
+    def _record_output_length(self, profile: Optional[str], params: Dict[str, Any], text: str,
+                              completion_tokens: Optional[int], finish_reason: Optional[str]):
+        if not self.output_length_log:
+            return
+        record = {
+            "ts": time.time(),
+            "model": self.model,
+            "profile": profile or "default",
+            "max_tokens": params["max_tokens"],
+            "completion_tokens": completion_tokens if completion_tokens is not None else count_tokens(text),
+            "finish_reason": finish_reason,
+        }
+        with _output_log_lock:
+            with open(self.output_length_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _messages(self, prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        """Chat messages; the system block goes first so providers can cache it as a prefix."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _record_usage(self, profile: Optional[str], prompt: str, text: str, usage: Any):
+        """Record provider-reported usage (or a local estimate) into the active token ledger."""
+        ledger = get_current_ledger()
+        if ledger is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        ledger.record(
+            self.model,
+            profile,
+            prompt_tokens if prompt_tokens is not None else count_tokens(prompt),
+            completion_tokens if completion_tokens is not None else count_tokens(text),
+            cached_tokens=getattr(details, "cached_tokens", None) or 0
+        )
 
-    def _call(self, prompt: str, stop=None, run_manager=None) -> str:
+    def _call(self, prompt: str, stop=None, run_manager=None, profile: Optional[str] = None,
+              system: Optional[str] = None, **kwargs) -> str:
+        params = self._generation_params(profile, stop, **kwargs)
         client = InferenceClient(provider=self.provider, api_key=self.api_key or os.environ["HF_TOKEN"])
         completion = client.chat.completions.create(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=self.temperature,
-            max_tokens=self.max_tokens
+            messages=self._messages(prompt, system),
+            temperature=params["temperature"],
+            max_tokens=params["max_tokens"],
+            stop=params["stop"]
+        )
+        text = completion.choices[0].message["content"]
+        usage = getattr(completion, "usage", None)
+        self._record_output_length(
+            profile, params, text,
+            getattr(usage, "completion_tokens", None),
+            completion.choices[0].finish_reason
+        )
+        self._record_usage(profile, (system or "") + prompt, text, usage)
+        return text
+
+    def _stream(self, prompt: str, stop=None, run_manager=None, profile: Optional[str] = None,
+                system: Optional[str] = None, **kwargs) -> Iterator[GenerationChunk]:
+        params = self._generation_params(profile, stop, **kwargs)
+        client = InferenceClient(provider=self.provider, api_key=self.api_key or os.environ["HF_TOKEN"])
+        stream = client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            temperature=params["temperature"],
+            max_tokens=params["max_tokens"],
+            stop=params["stop"],
+            stream=True,
+            stream_options={"include_usage": True}
         )
-        return completion.choices[0].message["content"]
+        chunks = []
+        finish_reason = None
+        usage = None
+        for chunk in stream:
+            # With include_usage the final chunk carries usage and no choices
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            text = chunk.choices[0].delta.content or ""
+            if text:
+                chunks.append(text)
+                if run_manager:
+                    run_manager.on_llm_new_token(text)
+                yield GenerationChunk(text=text)
+        text = "".join(chunks)
+        self._record_output_length(profile, params, text, getattr(usage, "completion_tokens", None), finish_reason)
+        self._record_usage(profile, (system or "") + prompt, text, usage)
 
-    def generate(self, prompts: List[str], stop: Optional[List[str]] = None) -> Any:
+    def generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                 profile: Optional[str] = None, system: Optional[str] = None, **kwargs) -> Any:
         generations = []
         for prompt in prompts:
-            result = self._call(prompt)
+            result = self._call(prompt, stop=stop, profile=profile, system=system, **kwargs)
             generations.append([Generation(text=result)])
         return type("LLMResult", (object,), {"generations": generations})
 
@@ -0,0 +1,202 @@
+﻿from typing import Dict, List, Any, Optional
+import asyncio
+import threading
+import uuid
+import weakref
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import PointStruct
+
+from memory.embeddings import LazyEmbeddings
+from memory.qdrant_memory import build_collection_config, build_metadata_filter, build_search_params
+from utils.latency import LatencyRecorder
+
+# AsyncQdrantClient connections are bound to the event loop that opened them,
+# so clients are shared per endpoint per loop. Keyed weakly on the loop object:
+# a closed, collected loop drops its clients, and a new loop never inherits them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncQdrantClient]]" = \
+    weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_qdrant_client(
+    url: str,
+    api_key: Optional[str] = None,
+    prefer_grpc: bool = False,
+    grpc_port: int = 6334
+) -> AsyncQdrantClient:
+    """Return the async client for this endpoint, transport and running event loop."""
+    loop = asyncio.get_running_loop()
+    key = (url, api_key, prefer_grpc, grpc_port)
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = AsyncQdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
+        return clients[key]
+
+
+async def close_async_qdrant_clients():
+    """Close and forget the shared clients of the running event loop (call before the loop ends)."""
+    with _async_clients_lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+class AsyncQdrantMemoryStore:
+    """
+    asyncio variant of QdrantMemoryStore.
+
+    Searches and upserts are awaited on a shared AsyncQdrantClient, so many of them
+    can be in flight at once; embedding runs in a worker thread so it doesn't block
+    the event loop. Use `await AsyncQdrantMemoryStore.create(...)` to construct.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: Optional[str] = None,
+        collection_name: str = "pitchpilot",
+        vector_dimension: int = 384,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "torch",
+        onnx_file_name: Optional[str] = None,
+        quantization: Optional[str] = None,
+        quantization_rescore: bool = True,
+        quantization_oversampling: Optional[float] = None,
+        on_disk_vectors: bool = False,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        search_ef: Optional[int] = None,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        max_concurrency: int = 16
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.transport = "grpc" if prefer_grpc else "rest"
+        self.collection_name = collection_name
+        self.vector_dimension = vector_dimension
+        self.embedding_model = LazyEmbeddings(model_name, backend=embedding_backend, onnx_file_name=onnx_file_name)
+        self.collection_config = build_collection_config(
+            vector_dimension,
+            quantization=quantization,
+            on_disk_vectors=on_disk_vectors,
+            hnsw_m=hnsw_m,
+            hnsw_ef_construct=hnsw_ef_construct
+        )
+        self.search_params = build_search_params(
+            quantization=quantization,
+            search_ef=search_ef,
+            rescore=quantization_rescore,
+            oversampling=quantization_oversampling
+        )
+        self.max_concurrency = max_concurrency
+        self.latency = LatencyRecorder()
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "AsyncQdrantMemoryStore":
+        """Construct the store and make sure its collection exists."""
+        store = cls(*args, **kwargs)
+        await store._ensure_collection()
+        return store
+
+    @property
+    def client(self) -> AsyncQdrantClient:
+        return get_async_qdrant_client(self.url, self.api_key, self.prefer_grpc, self.grpc_port)
+
+    async def _ensure_collection(self):
+        """Create collection if it doesn't exist."""
+        if not await self.client.collection_exists(self.collection_name):
+            await self.client.create_collection(collection_name=self.collection_name, **self.collection_config)
+
+    async def add_to_memory(self, text: str, metadata: Dict[str, Any] = None) -> str:
+        """
+        Add text to memory with associated metadata.
+
+        Args:
+            text: The text to store
+            metadata: Associated metadata
+
+        Returns:
+            ID of the stored memory
+        """
+        return (await self.add_many([text], [metadata]))[0]
+
+    async def add_many(self, texts: List[str], metadatas: List[Optional[Dict[str, Any]]] = None) -> List[str]:
+        """
+        Embed a batch of texts in one call and upsert them as a single request.
+
+        Returns:
+            IDs of the stored memories, aligned with texts
+        """
+        metadatas = metadatas or [None] * len(texts)
+        vectors = await asyncio.to_thread(self.embedding_model.embed_documents, texts)
+        memory_ids = [str(uuid.uuid4()) for _ in texts]
+        points = [
+            PointStruct(id=memory_id, vector=vector, payload={"text": text, "metadata": metadata or {}})
+            for memory_id, vector, text, metadata in zip(memory_ids, vectors, texts, metadatas)
+        ]
+        with self.latency.time(f"upsert.async.{self.transport}"):
+            await self.client.upsert(collection_name=self.collection_name, points=points)
+        return memory_ids
+
+    async def search(
+        self,
+        query: Optional[str] = None,
+        limit: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search memories and return them with their metadata and similarity scores.
+
+        Returns:
+            List of dicts with id, text, metadata and score, best match first
+        """
+        if query_vector is None:
+            query_vector = await asyncio.to_thread(self.embedding_model.embed_query, query)
+
+        with self.latency.time(f"search.async.{self.transport}"):
+            search_results = await self.client.search(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                query_filter=build_metadata_filter(metadata_filter),
+                limit=limit,
+                search_params=self.search_params
+            )
+
+        return [
+            {
+                "id": result.id,
+                "text": result.payload["text"],
+                "metadata": result.payload.get("metadata", {}),
+                "score": result.score
+            }
+            for result in search_results
+        ]
+
+    async def retrieve_relevant(self, query: str, limit: int = 5) -> List[str]:
+        """Retrieve relevant memory texts based on a query."""
+        return [result["text"] for result in await self.search(query, limit=limit)]
+
+    async def retrieve_many(self, queries: List[str], limit: int = 5) -> List[List[str]]:
+        """
+        Run several searches concurrently.
+
+        Query embeddings are computed in one batch, then the searches are pipelined
+        over the shared client with at most max_concurrency in flight.
+
+        Returns:
+            One list of memory texts per query, aligned with queries
+        """
+        vectors = await asyncio.to_thread(self.embedding_model.embed_documents, queries)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(vector):
+            async with semaphore:
+                return [result["text"] for result in await self.search(limit=limit, query_vector=vector)]
+
+        return list(await asyncio.gather(*(run(vector) for vector in vectors)))
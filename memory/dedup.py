@@ -0,0 +1,76 @@
+﻿from typing import Dict, List, Optional, Set, Tuple
+import hashlib
+import re
+import threading
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text: str, bits: int = 64, shingle_size: int = 2) -> int:
+    """
+    SimHash fingerprint of a text over word shingles.
+
+    Texts that differ only in whitespace, case, punctuation or a few words end up
+    within a small Hamming distance of each other.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * bits
+    for shingle in shingles:
+        digest = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class FingerprintIndex:
+    """
+    In-process index of SimHash fingerprints, partitioned by scope (e.g. startup).
+
+    Fingerprints are split into max_distance + 1 bands; by the pigeonhole principle
+    two fingerprints within max_distance bits share at least one identical band,
+    so only those candidates need an exact Hamming check.
+    """
+
+    def __init__(self, max_distance: int = 8, bits: int = 64):
+        self.max_distance = max_distance
+        self.bits = bits
+        self.bands = max_distance + 1
+        self.band_width = -(-bits // self.bands)
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        # Ids per (scope, fingerprint): the same text stored under two scopes is two entries
+        self._ids: Dict[Tuple[Optional[str], int], List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint: int, scope: Optional[str]):
+        mask = (1 << self.band_width) - 1
+        for band in range(self.bands):
+            yield (scope, band, fingerprint >> (band * self.band_width) & mask)
+
+    def find(self, fingerprint: int, scope: Optional[str] = None) -> Optional[str]:
+        """Return the memory id of a stored near-duplicate in the same scope, if any."""
+        with self._lock:
+            for key in self._band_keys(fingerprint, scope):
+                for candidate in self._buckets.get(key, ()):
+                    if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                        return self._ids[(scope, candidate)][0]
+        return None
+
+    def add(self, fingerprint: int, memory_id: str, scope: Optional[str] = None):
+        with self._lock:
+            self._ids.setdefault((scope, fingerprint), []).append(memory_id)
+            for key in self._band_keys(fingerprint, scope):
+                self._buckets.setdefault(key, set()).add(fingerprint)
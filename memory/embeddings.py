@@ -0,0 +1,92 @@
+﻿from typing import List, Optional
+import threading
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8", "fastembed")
+
+# Pre-exported int8 weights shipped in the all-MiniLM-L6-v2 model repo
+DEFAULT_INT8_ONNX_FILE = "onnx/model_qint8_avx2.onnx"
+
+
+class FastEmbedEmbeddings:
+    """Adapter exposing fastembed's ONNX Runtime model through the LangChain embeddings interface."""
+
+    def __init__(self, model_name: str):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError(
+                "The 'fastembed' embedding backend requires the fastembed package: pip install fastembed"
+            ) from e
+        self.model = TextEmbedding(model_name=model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self.model.embed(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_embedding_model(model_name: str, backend: str = "torch", onnx_file_name: Optional[str] = None):
+    """
+    Instantiate the embedding model for the given backend.
+
+    Args:
+        model_name: Hugging Face model id
+        backend: "torch" (sentence-transformers default), "onnx" (ONNX Runtime),
+            "onnx-int8" (ONNX Runtime with int8-quantized weights) or "fastembed"
+            (ONNX Runtime without importing torch)
+        onnx_file_name: ONNX weights file inside the model repo for the "onnx-int8" backend
+
+    Returns:
+        An object with embed_query/embed_documents
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
+    if backend == "fastembed":
+        return FastEmbedEmbeddings(model_name)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if backend == "onnx":
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"backend": "onnx"})
+    if backend == "onnx-int8":
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={
+                "backend": "onnx",
+                "model_kwargs": {"file_name": onnx_file_name or DEFAULT_INT8_ONNX_FILE}
+            }
+        )
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+class LazyEmbeddings:
+    """Defers loading the embedding model until the first text actually needs embedding."""
+
+    def __init__(self, model_name: str, backend: str = "torch", onnx_file_name: Optional[str] = None):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file_name = onnx_file_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_embedding_model(self.model_name, self.backend, self.onnx_file_name)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
@@ -1,13 +1,124 @@
 ﻿from typing import Dict, List, Any, Optional
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    FieldCondition,
+    Filter,
+    HnswConfigDiff,
+    IsEmptyCondition,
+    MatchValue,
+    PayloadField,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+import threading
 import uuid
 
-from langchain_huggingface import HuggingFaceEmbeddings
+from memory.dedup import FingerprintIndex, simhash
+from memory.embeddings import LazyEmbeddings
+from utils.latency import LatencyRecorder
+from utils.similarity import maximal_marginal_relevance
 
 import os
 
+QUANTIZATION_MODES = (None, "scalar", "binary")
+
+# One client (and connection pool / gRPC channel) per endpoint per process
+_clients: Dict[tuple, QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_qdrant_client(
+    url: str,
+    api_key: Optional[str] = None,
+    prefer_grpc: bool = False,
+    grpc_port: int = 6334
+) -> QdrantClient:
+    """Return the process-wide client for this endpoint and transport, creating it once."""
+    key = (url, api_key, prefer_grpc, grpc_port)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
+        return _clients[key]
+
+
+def build_quantization_config(quantization: Optional[str], always_ram: bool = True):
+    """Translate a quantization mode name into a Qdrant quantization config."""
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode {quantization!r}, expected one of {QUANTIZATION_MODES}")
+    if quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    return None
+
+
+def build_hnsw_config(m: Optional[int] = None, ef_construct: Optional[int] = None) -> Optional[HnswConfigDiff]:
+    """Build an HNSW config diff, or None to keep the server defaults."""
+    if m is None and ef_construct is None:
+        return None
+    return HnswConfigDiff(m=m, ef_construct=ef_construct)
+
+
+def build_search_params(
+    quantization: Optional[str] = None,
+    search_ef: Optional[int] = None,
+    rescore: bool = True,
+    oversampling: Optional[float] = None
+) -> Optional[SearchParams]:
+    """Build per-query search params matching the collection's index settings."""
+    quantization_params = None
+    if quantization is not None:
+        quantization_params = QuantizationSearchParams(
+            ignore=False,
+            rescore=rescore,
+            oversampling=oversampling
+        )
+    if search_ef is None and quantization_params is None:
+        return None
+    return SearchParams(hnsw_ef=search_ef, quantization=quantization_params)
+
+
+def build_collection_config(
+    vector_dimension: int,
+    quantization: Optional[str] = None,
+    on_disk_vectors: bool = False,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construct: Optional[int] = None
+) -> Dict[str, Any]:
+    """Keyword arguments for create_collection from the index settings."""
+    return {
+        "vectors_config": VectorParams(
+            size=vector_dimension,
+            distance=Distance.COSINE,
+            on_disk=on_disk_vectors
+        ),
+        "hnsw_config": build_hnsw_config(hnsw_m, hnsw_ef_construct),
+        # Keep the compressed vectors in RAM when the originals live on disk
+        "quantization_config": build_quantization_config(quantization, always_ram=True),
+    }
+
+
+def build_metadata_filter(metadata_filter: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """Build an exact-match filter on the stored metadata fields."""
+    if not metadata_filter:
+        return None
+    return Filter(must=[
+        FieldCondition(key=f"metadata.{key}", match=MatchValue(value=value))
+        for key, value in metadata_filter.items()
+    ])
+
+
 class QdrantMemoryStore:
     """Memory store using Qdrant for semantic storage and retrieval with HuggingFace Embeddings."""
 
@@ -17,61 +128,218 @@ class QdrantMemoryStore:
         api_key: Optional[str] = None,
         collection_name: str = "pitchpilot",
         vector_dimension: int = 384 ,
-        model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "torch",
+        onnx_file_name: Optional[str] = None,
+        quantization: Optional[str] = None,
+        quantization_rescore: bool = True,
+        quantization_oversampling: Optional[float] = None,
+        on_disk_vectors: bool = False,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        search_ef: Optional[int] = None,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        dedupe_enabled: bool = True,
+        dedupe_max_distance: int = 8,
+        dedupe_vector_threshold: Optional[float] = None,
+        dedupe_mode: str = "skip"
     ):
-        self.client = QdrantClient(url=url, api_key=api_key)
+        self.client = get_qdrant_client(url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
+        self.transport = "grpc" if prefer_grpc else "rest"
+        self.latency = LatencyRecorder()
         self.collection_name = collection_name
         self.vector_dimension = vector_dimension
-        self.embedding_model = HuggingFaceEmbeddings(model_name=model_name)
+        # The model is only loaded the first time something is embedded
+        self.embedding_model = LazyEmbeddings(model_name, backend=embedding_backend, onnx_file_name=onnx_file_name)
+
+        # Index settings (only applied when the collection is created)
+        self.quantization = quantization
+        self.on_disk_vectors = on_disk_vectors
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.search_params = build_search_params(
+            quantization=quantization,
+            search_ef=search_ef,
+            rescore=quantization_rescore,
+            oversampling=quantization_oversampling
+        )
+
+        # Near-duplicate detection before embedding/upserting
+        if dedupe_mode not in ("skip", "merge"):
+            raise ValueError(f"Unknown dedupe mode {dedupe_mode!r}, expected 'skip' or 'merge'")
+        self.dedupe_enabled = dedupe_enabled
+        self.dedupe_vector_threshold = dedupe_vector_threshold
+        self.dedupe_mode = dedupe_mode
+        self.fingerprints = FingerprintIndex(max_distance=dedupe_max_distance)
+        self._fingerprinted_scopes = set()
+        self._fingerprint_load_lock = threading.Lock()
+        self.dedupe_stats = {
+            "checked": 0,
+            "written": 0,
+            "skipped_fingerprint": 0,
+            "skipped_vector": 0,
+            "merged": 0,
+            "chars_skipped": 0
+        }
+        self._duplicate_counts: Dict[str, int] = {}
+        self._dedupe_lock = threading.Lock()
 
         # Ensure collection exists
         self._ensure_collection()
 
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
+        """
+        Create collection if it doesn't exist.
+
+        Quantization, on-disk storage and HNSW settings are only applied at creation
+        time; an existing collection keeps whatever it was created with.
+        """
         collections = self.client.get_collections().collections
         collection_names = [collection.name for collection in collections]
         if self.collection_name not in collection_names:
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.vector_dimension,
-                    distance=Distance.COSINE
+                **build_collection_config(
+                    self.vector_dimension,
+                    quantization=self.quantization,
+                    on_disk_vectors=self.on_disk_vectors,
+                    hnsw_m=self.hnsw_m,
+                    hnsw_ef_construct=self.hnsw_ef_construct
                 )
             )
 
+    def _scope_filter(self, scope: Optional[str]) -> Filter:
+        """Points stored for one startup, or for none when scope is None."""
+        if scope is None:
+            return Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="metadata.startup"))])
+        return build_metadata_filter({"startup": scope})
+
+    def _load_fingerprints(self, scope: Optional[str]):
+        """
+        Seed the fingerprint index with a scope's stored memories, once per store.
+
+        Stores are created per generation, so without this only duplicates
+        written within the same run would be caught. Points written before
+        fingerprints were stored in the payload are fingerprinted from their text.
+        """
+        if scope in self._fingerprinted_scopes:
+            return
+        with self._fingerprint_load_lock:
+            if scope in self._fingerprinted_scopes:
+                return
+            offset, loaded = None, 0
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=self._scope_filter(scope),
+                    limit=256,
+                    offset=offset,
+                    with_payload=["simhash", "text"],
+                    with_vectors=False
+                )
+                for point in points:
+                    payload = point.payload or {}
+                    if "simhash" in payload:
+                        fingerprint = int(payload["simhash"], 16)
+                    else:
+                        fingerprint = simhash(payload.get("text", ""))
+                    self.fingerprints.add(fingerprint, str(point.id), scope)
+                    loaded += 1
+                if offset is None:
+                    break
+            self._fingerprinted_scopes.add(scope)
+        if loaded:
+            print(f"[Memory] Loaded {loaded} fingerprints for {scope or 'unscoped'} memories")
+
     def add_to_memory(self, text: str, metadata: Dict[str, Any] = None) -> str:
         """
         Add text to memory with associated metadata.
 
+        Near-duplicates of a memory already stored for the same startup are not
+        written again; the existing memory's ID is returned instead.
+
         Args:
             text: The text to store
             metadata: Associated metadata
 
         Returns:
-            ID of the stored memory
+            ID of the stored (or already existing) memory
         """
+        metadata = metadata or {}
+        scope = metadata.get("startup")
+
+        # Cheap fingerprint check first, so duplicates are never embedded
+        fingerprint = None
+        if self.dedupe_enabled:
+            self._load_fingerprints(scope)
+            fingerprint = simhash(text)
+            with self._dedupe_lock:
+                self.dedupe_stats["checked"] += 1
+            duplicate_id = self.fingerprints.find(fingerprint, scope)
+            if duplicate_id is not None:
+                return self._record_duplicate(duplicate_id, text, "skipped_fingerprint")
+
         # Generate a UUID for the memory
         memory_id = str(uuid.uuid4())
 
         # Generate vector embedding for the text
         vector = self.embedding_model.embed_query(text)
 
-        # Create the point
+        # Optional semantic check against this startup's stored memories
+        if self.dedupe_enabled and self.dedupe_vector_threshold is not None:
+            matches = self.search(
+                limit=1,
+                metadata_filter={"startup": scope} if scope else None,
+                query_vector=vector
+            )
+            if matches and matches[0]["score"] >= self.dedupe_vector_threshold:
+                self.fingerprints.add(fingerprint, str(matches[0]["id"]), scope)
+                return self._record_duplicate(str(matches[0]["id"]), text, "skipped_vector")
+
+        # Create the point; the fingerprint is kept so later stores can seed their index
+        payload = {
+            "text": text,
+            "metadata": metadata
+        }
+        if fingerprint is not None:
+            payload["simhash"] = format(fingerprint, "016x")
         point = PointStruct(
             id=memory_id,
             vector=vector,
-            payload={
-                "text": text,
-                "metadata": metadata or {}
-            }
+            payload=payload
         )
 
         # Insert the point
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[point]
-        )
+        with self.latency.time(f"upsert.{self.transport}"):
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=[point]
+            )
+
+        if fingerprint is not None:
+            self.fingerprints.add(fingerprint, memory_id, scope)
+        with self._dedupe_lock:
+            self.dedupe_stats["written"] += 1
+
+        return memory_id
+
+    def _record_duplicate(self, memory_id: str, text: str, reason: str) -> str:
+        """Count a skipped duplicate and, in merge mode, bump the stored memory's duplicate count."""
+        with self._dedupe_lock:
+            self.dedupe_stats[reason] += 1
+            self.dedupe_stats["chars_skipped"] += len(text)
+            self._duplicate_counts[memory_id] = self._duplicate_counts.get(memory_id, 0) + 1
+            duplicate_count = self._duplicate_counts[memory_id]
+
+        if self.dedupe_mode == "merge":
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"duplicate_count": duplicate_count},
+                points=[memory_id]
+            )
+            with self._dedupe_lock:
+                self.dedupe_stats["merged"] += 1
 
         return memory_id
 
@@ -90,12 +358,99 @@ class QdrantMemoryStore:
         vector = self.embedding_model.embed_query(query)
 
         # Search for relevant points
-        search_results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=vector,
-            limit=limit
-        )
+        with self.latency.time(f"search.{self.transport}"):
+            search_results = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=vector,
+                limit=limit,
+                search_params=self.search_params
+            )
 
         # Extract texts from results
         texts = [result.payload["text"] for result in search_results]
         return texts
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        limit: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search memories and return them with their metadata and similarity scores.
+
+        Args:
+            query: The query text (ignored when query_vector is given)
+            limit: Maximum number of memories to retrieve
+            metadata_filter: Exact-match conditions on metadata fields, e.g. {"type": "research"}
+            query_vector: A precomputed query embedding
+
+        Returns:
+            List of dicts with id, text, metadata and score, best match first
+        """
+        if query_vector is None:
+            query_vector = self.embedding_model.embed_query(query)
+
+        with self.latency.time(f"search.{self.transport}"):
+            search_results = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                query_filter=build_metadata_filter(metadata_filter),
+                limit=limit,
+                search_params=self.search_params
+            )
+
+        return [
+            {
+                "id": result.id,
+                "text": result.payload["text"],
+                "metadata": result.payload.get("metadata", {}),
+                "score": result.score
+            }
+            for result in search_results
+        ]
+
+    def retrieve_diverse(
+        self,
+        query: str,
+        limit: int = 5,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5
+    ) -> List[str]:
+        """
+        Retrieve relevant memories while skipping near-duplicates of each other.
+
+        Fetches fetch_k candidates with their stored vectors and re-ranks them with
+        maximal marginal relevance, so repeated copies of earlier outputs don't
+        crowd out everything else.
+
+        Args:
+            query: The query text
+            limit: Maximum number of memories to return
+            fetch_k: Number of nearest candidates to re-rank
+            lambda_mult: Relevance/diversity trade-off (1.0 = plain similarity search)
+
+        Returns:
+            List of memory texts in MMR order
+        """
+        vector = self.embedding_model.embed_query(query)
+
+        with self.latency.time(f"search.{self.transport}"):
+            search_results = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=vector,
+                limit=max(fetch_k, limit),
+                with_vectors=True,
+                search_params=self.search_params
+            )
+        if not search_results:
+            return []
+
+        selected = maximal_marginal_relevance(
+            vector,
+            [result.vector for result in search_results],
+            k=limit,
+            lambda_mult=lambda_mult
+        )
+        return [search_results[idx].payload["text"] for idx in selected]
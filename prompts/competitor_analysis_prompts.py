@@ -1,11 +1,8 @@
-﻿COMPETITOR_ANALYSIS_PROMPT_TEMPLATE = """
-You are a specialized competitor analysis agent tasked with analyzing the competitive landscape.
+﻿from prompts.prompt_assembly import PromptTemplate
 
-Startup Information:
-- Name: {startup_name}
-- Industry: {industry}
-- Problem Statement: {problem_statement}
-- Solution: {solution}
+# Startup details come from the shared system block (see prompt_assembly)
+COMPETITOR_ANALYSIS_PROMPT_TEMPLATE = """
+You are the competitor analysis agent, tasked with analyzing the competitive landscape.
 
 Market Trends:
 {market_trends}
@@ -18,3 +15,5 @@ Please analyze the competitive landscape for this startup. For each identified c
 
 Also, identify key competitive advantages that the startup can leverage.
 """
+
+COMPETITOR_ANALYSIS_PROMPT = PromptTemplate(COMPETITOR_ANALYSIS_PROMPT_TEMPLATE)
@@ -0,0 +1,16 @@
+﻿from prompts.prompt_assembly import PromptTemplate
+
+DISTILLATION_PROMPT_TEMPLATE = """
+You are a specialized distillation agent that compresses context for later prompts.
+
+Compress the following {kind} into a compact fact sheet:
+- Short bullet points only, no prose or introductions
+- Keep every number, percentage, market figure, company and product name
+- Drop repetition, hedging and generic statements
+- At most {max_tokens} tokens in total
+
+{kind}:
+{text}
+"""
+
+DISTILLATION_PROMPT = PromptTemplate(DISTILLATION_PROMPT_TEMPLATE)
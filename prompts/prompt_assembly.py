@@ -0,0 +1,85 @@
+﻿from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+from string import Formatter
+
+# Startup fields in the order they appear in the shared system block
+STARTUP_FIELDS: List[Tuple[str, str]] = [
+    ("name", "Name"),
+    ("industry", "Industry"),
+    ("problem_statement", "Problem Statement"),
+    ("solution", "Solution"),
+    ("target_market", "Target Market"),
+    ("business_model", "Business Model"),
+    ("traction", "Traction"),
+    ("team", "Team"),
+]
+
+SYSTEM_PREAMBLE = """You are PitchPilot, a team of specialized agents that research, write and design investor pitch decks.
+Every request in this conversation is about the startup below.
+
+Startup Information:
+"""
+
+
+class PromptTemplate:
+    """
+    A prompt template parsed once at import time.
+
+    Only plain named fields are supported ("{name}", no format specs or
+    conversions), so a template can be checked when it is compiled instead of
+    failing on the first call.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in Formatter().parse(template):
+            if field is not None and (format_spec or conversion or not field.isidentifier()):
+                raise ValueError(f"Unsupported template field {{{field}}}: only plain named fields are allowed")
+            self._parts.append((literal, field))
+        self.fields = frozenset(field for _, field in self._parts if field)
+
+    def render(self, **values: Any) -> str:
+        """Fill the template; raises KeyError on a missing field, like str.format."""
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(", ".join(sorted(missing)))
+        return "".join(literal + (str(values[field]) if field else "") for literal, field in self._parts)
+
+
+class AssembledPrompt(NamedTuple):
+    """A prompt split into the shared, cacheable system block and the per-call request."""
+    system: str
+    user: str
+
+
+def _canonical(value: Any) -> str:
+    """Collapse whitespace so equal inputs always produce byte-identical, single-line text."""
+    return " ".join(str(value or "").split()) or "Not provided"
+
+
+@lru_cache(maxsize=256)
+def _system_block(values: Tuple[str, ...]) -> str:
+    details = "\n".join(f"- {label}: {value}" for (_, label), value in zip(STARTUP_FIELDS, values))
+    return SYSTEM_PREAMBLE + details + "\n"
+
+
+def build_system_prompt(startup_info: Dict[str, Any]) -> str:
+    """
+    Canonical system block for a startup.
+
+    Every agent sends this unchanged as its system message, so all calls for a
+    deck share a prefix the provider can cache.
+
+    Args:
+        startup_info: Dictionary containing information about the startup
+
+    Returns:
+        The system message text
+    """
+    return _system_block(tuple(_canonical(startup_info.get(key)) for key, _ in STARTUP_FIELDS))
+
+
+def assemble_prompt(template: PromptTemplate, startup_info: Dict[str, Any], **values: Any) -> AssembledPrompt:
+    """Pair the startup's system block with the rendered task template."""
+    return AssembledPrompt(build_system_prompt(startup_info), template.render(**values))
@@ -1,11 +1,8 @@
-﻿RESEARCH_PROMPT_TEMPLATE = """
-You are a specialized research agent tasked with gathering information about startups and their markets.
+﻿from prompts.prompt_assembly import PromptTemplate
 
-Please conduct research on the following startup:
-- Name: {startup_name}
-- Industry: {industry}
-- Problem Statement: {problem_statement}
-- Solution: {solution}
+# Startup details come from the shared system block (see prompt_assembly)
+RESEARCH_PROMPT_TEMPLATE = """
+You are the research agent, tasked with gathering information about the startup and its market.
 
 Focus on the following areas:
 1. Market trends in the {industry} industry
@@ -15,3 +12,5 @@ Focus on the following areas:
 
 Provide comprehensive research findings organized by these areas.
 """
+
+RESEARCH_PROMPT = PromptTemplate(RESEARCH_PROMPT_TEMPLATE)
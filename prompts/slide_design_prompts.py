@@ -1,16 +1,15 @@
-﻿SLIDE_DESIGN_PROMPT_TEMPLATE = """
-You are a specialized slide design agent tasked with creating compelling pitch deck slides.
+﻿from prompts.prompt_assembly import PromptTemplate
 
-Startup Information:
-- Name: {startup_name}
-- Industry: {industry}
+# Startup details come from the shared system block (see prompt_assembly)
+SLIDE_DESIGN_PROMPT_TEMPLATE = """
+You are the slide design agent, tasked with creating compelling pitch deck slides.
 
 Slide Type: {slide_type}
 
 Relevant Content:
 {relevant_content}
 
-You are a specialized slide-design agent. For the {slide_type} slide:
+For the {slide_type} slide:
 1. Give me a one-line, high-impact title.
 2. Provide exactly 3 bullet points, each no more than 8 words.
 3. Describe 2 visual elements (icons, charts) only.
@@ -18,3 +17,5 @@ You are a specialized slide-design agent. For the {slide_type} slide:
 Be ruthless: no extra sentences or fluff.
 Focus on clarity, impact, and visual appeal. The slide should communicate key information at a glance.
 """
+
+SLIDE_DESIGN_PROMPT = PromptTemplate(SLIDE_DESIGN_PROMPT_TEMPLATE)
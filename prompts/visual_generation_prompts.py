@@ -0,0 +1,22 @@
+﻿from prompts.prompt_assembly import PromptTemplate
+
+CHART_SPEC_PROMPT_TEMPLATE = """
+You are the visual design agent. Turn a slide visual description into a chart spec.
+
+Description: '{description}'
+
+Respond with only a JSON object:
+{{"type": one of {chart_types},
+ "title": short chart title,
+ "labels": category, stage or milestone names,
+ "series": [{{"name": series name, "values": one value per label}}],
+ "unit": e.g. "$", "%", "users" (optional)}}
+
+- bar/line: one or more numeric series; pie/funnel/tam_sam_som: one numeric series
+- timeline: milestones as labels, one series of short text notes
+- comparison_table: criteria as labels, one series per company (the startup first), text values
+- Use plausible figures consistent with the description; no more than 8 labels
+- If the description is not a chart (an icon, photo or illustration), respond with {{"type": "none"}}
+"""
+
+CHART_SPEC_PROMPT = PromptTemplate(CHART_SPEC_PROMPT_TEMPLATE)
@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from utils import token_counting
+
+
+class _WhitespaceEncoding:
+    """Offline stand-in for the tiktoken encoding (tests must not download it)."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def offline_token_counting(monkeypatch):
+    monkeypatch.setattr(token_counting, "_encoding", _WhitespaceEncoding())
+
+
+class _Generation:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Result:
+    def __init__(self, text):
+        self.generations = [[_Generation(text)]]
+
+
+class FakeLLM:
+    """LLM whose reply comes from respond(prompt, kwargs); calls are recorded as (prompt, kwargs)."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompts, **kwargs):
+        with self._lock:
+            self.calls.append((prompts[0], kwargs))
+        return _Result(self.respond(prompts[0], kwargs))
+
+    def profile_calls(self, profile):
+        return [call for call in self.calls if call[1].get("profile") == profile]
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeLLM
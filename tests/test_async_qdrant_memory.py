@@ -0,0 +1,32 @@
+import asyncio
+import gc
+
+from memory import async_qdrant_memory
+from memory.async_qdrant_memory import close_async_qdrant_clients, get_async_qdrant_client
+
+URL = "http://localhost:6333"
+
+
+def test_clients_are_shared_per_loop_and_dropped_with_it():
+    async def get_twice():
+        first = get_async_qdrant_client(URL)
+        assert get_async_qdrant_client(URL) is first
+        assert get_async_qdrant_client(URL, prefer_grpc=True) is not first
+        return first
+
+    first = asyncio.run(get_twice())
+    gc.collect()
+    # The finished loop was collected, and its clients with it
+    assert len(async_qdrant_memory._async_clients) == 0
+    assert asyncio.run(get_twice()) is not first
+
+
+def test_close_evicts_the_running_loops_clients():
+    async def run():
+        client = get_async_qdrant_client(URL)
+        await close_async_qdrant_clients()
+        assert asyncio.get_running_loop() not in async_qdrant_memory._async_clients
+        assert get_async_qdrant_client(URL) is not client
+        await close_async_qdrant_clients()
+
+    asyncio.run(run())
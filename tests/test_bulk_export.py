@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+from pptx import Presentation
+
+from utils import bulk_export
+from utils.bulk_export import ExportResult, _output_path, export_decks
+
+
+@pytest.mark.parametrize("name, file_name", [
+    ("Acme Co", "000_Acme_Co_Pitch_Deck.pptx"),
+    ("Acme/Co", "000_Acme_Co_Pitch_Deck.pptx"),
+    ("../../etc/passwd", "000_etc_passwd_Pitch_Deck.pptx"),
+    ("/abs", "000_abs_Pitch_Deck.pptx"),
+    ("..", "000_deck_0_Pitch_Deck.pptx"),
+    ("", "000_deck_0_Pitch_Deck.pptx"),
+    ("Café-2.0", "000_Café-2.0_Pitch_Deck.pptx"),
+])
+def test_output_path_stays_inside_output_dir(tmp_path, name, file_name):
+    path = _output_path(str(tmp_path), {"startup_info": {"name": name}}, 0)
+    assert path == os.path.join(str(tmp_path), file_name)
+
+
+def test_export_decks_writes_sanitized_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("templates")
+    Presentation().save(os.path.join("templates", "Generic.pptx"))
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    decks = [
+        {"title": "A", "startup_info": {"name": "Acme/Co", "industry": "Generic"},
+         "slides": [{"title": "Problem", "content": ["x"]}]},
+        {"title": "B", "startup_info": {"name": "..", "industry": "Generic"}, "slides": []},
+    ]
+
+    results = sorted(export_decks(decks, workers=2, output_dir="out"), key=lambda result: result.index)
+
+    assert [result.error for result in results] == [None, None]
+    assert sorted(os.listdir("out")) == ["000_Acme_Co_Pitch_Deck.pptx", "001_deck_1_Pitch_Deck.pptx"]
+    assert all(result.size == os.path.getsize(result.output_path) for result in results)
+
+
+def test_defaults_come_from_config(monkeypatch):
+    seen = {}
+
+    class RecordingPool:
+        """Runs nothing; records the pool size and visual box and returns empty results."""
+
+        def __init__(self, max_workers, **kwargs):
+            seen["workers"] = max_workers
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, index, *args):
+            seen["visual_box"] = args[-1]
+            future = Future()
+            future.set_result(ExportResult(index, "", b"", None, 0.0, 0))
+            return future
+
+    monkeypatch.setattr(bulk_export, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(bulk_export, "PitchPilotConfig", lambda: SimpleNamespace(export_workers=3, visual_box_in=(5.0, 1.0, 4.0, 3.0)))
+
+    assert len(list(export_decks([{}] * 8))) == 8
+    assert seen == {"workers": 3, "visual_box": (5.0, 1.0, 4.0, 3.0)}
+    list(export_decks([{}] * 8, workers=5, visual_box=(1.0, 1.0, 2.0, 2.0)))
+    assert seen == {"workers": 5, "visual_box": (1.0, 1.0, 2.0, 2.0)}
@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from utils.chart_renderer import CHART_TYPES, ChartSpecError, _number, normalize_chart_spec, render_chart
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.mark.parametrize("value, number", [
+    (12, 12.0),
+    ("1,200", 1200.0),
+    ("$1.2B", 1.2e9),
+    ("35%", 35.0),
+    ("3.5k", 3500.0),
+    ("-$5M", -5e6),
+    ("$-5M", -5e6),
+    ("−€2.5K", -2500.0),
+    ("+12%", 12.0),
+])
+def test_number_parses_signed_currency_and_suffixes(value, number):
+    assert _number(value) == number
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", "1e999", math.nan, math.inf, "--5", "-$-5", "abc", "", True])
+def test_number_rejects_values_that_cant_be_drawn(value):
+    with pytest.raises(ChartSpecError):
+        _number(value)
+
+
+@pytest.mark.parametrize("chart_type", ["pie", "funnel", "tam_sam_som"])
+def test_size_charts_reject_negative_values(chart_type):
+    with pytest.raises(ChartSpecError):
+        normalize_chart_spec({"type": chart_type, "labels": ["TAM", "SAM"], "values": ["$5B", "-$1B"]})
+
+
+def test_pie_rejects_all_zero_values():
+    with pytest.raises(ChartSpecError):
+        normalize_chart_spec({"type": "pie", "labels": ["A", "B"], "values": [0, 0]})
+
+
+def test_bar_and_line_draw_negative_values():
+    for chart_type in ("bar", "line"):
+        spec = {"type": chart_type, "title": "Net income", "labels": ["2023", "2024"], "values": ["-$5M", "$2M"], "unit": "$"}
+        assert render_chart(spec, dpi=30).startswith(PNG_SIGNATURE)
+
+
+@pytest.mark.parametrize("chart_type", CHART_TYPES)
+def test_every_chart_type_renders(chart_type):
+    values = ["Seed", "Launch", "Series A"] if chart_type in ("timeline", "comparison_table") else ["$50B", "$5B", "$500M"]
+    spec = {"type": chart_type, "title": "Market", "labels": ["TAM", "SAM", "SOM"], "values": values, "unit": "$"}
+    assert render_chart(spec, dpi=30).startswith(PNG_SIGNATURE)
@@ -0,0 +1,47 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from utils.context_prioritization import ContextScorer, split_words
+
+STARTUP_INFO = {
+    "name": "Café Flow",
+    "industry": "FinTech",
+    "problem_statement": "Small businesses struggle with cash-flow management.",
+    "solution": "AI-powered cash flow prediction for b2b's, naïve forecasting replaced.",
+}
+
+WORDS = ("cash-flow Cash, flow. café naïve İstanbul b2b's SaaS $49/month/user predictions "
+         "prediction\tmanagement\nsmall businesses the and fintech").split(" ")
+
+
+def reference_term_frequencies(scorer, items):
+    term_freqs = np.zeros((len(items), len(scorer.vocabulary)))
+    for row, item in enumerate(items):
+        for term, count in Counter(split_words(item)).items():
+            if term in scorer.vocabulary:
+                term_freqs[row, scorer.vocabulary[term]] = count
+    lengths = np.array([len(split_words(item)) for item in items], dtype=np.float64)
+    return term_freqs, lengths
+
+
+def test_batch_tokenization_matches_split_words():
+    rng = random.Random(7)
+    scorer = ContextScorer(STARTUP_INFO)
+    for ascii_only in (True, False):
+        words = [word for word in WORDS if word.isascii() or not ascii_only]
+        items = [" ".join(rng.choices(words, k=rng.randint(0, 40))) for _ in range(300)] + ["", "  "]
+        term_freqs, lengths = scorer._term_frequencies(items)
+        expected_freqs, expected_lengths = reference_term_frequencies(scorer, items)
+        assert np.array_equal(term_freqs, expected_freqs)
+        assert np.array_equal(lengths, expected_lengths)
+
+
+def test_top_k_orders_by_score_and_keeps_ties_in_order():
+    scorer = ContextScorer(STARTUP_INFO)
+    items = ["unrelated", "cash flow", "also unrelated", "cash flow management", "cash flow", "nothing"]
+    assert scorer.top_k(items, 3) == ["cash flow management", "cash flow", "cash flow"]
+    assert scorer.top_k(items, 4)[3] == "unrelated"
+    assert scorer.top_k(items, 0) == []
+    assert ContextScorer({}).top_k(["a", "b"]) == ["a", "b"]
@@ -0,0 +1,21 @@
+from memory.dedup import FingerprintIndex, simhash
+
+TEXT = "Small businesses struggle with cash flow management across the United States."
+
+
+def test_find_returns_near_duplicates_within_the_scope():
+    index = FingerprintIndex(max_distance=8)
+    index.add(simhash(TEXT), "id-A", scope="A")
+    assert index.find(simhash(TEXT.upper() + "  "), scope="A") == "id-A"
+    assert index.find(simhash("Something else entirely about rockets and space travel."), scope="A") is None
+
+
+def test_same_text_in_two_scopes_keeps_each_scopes_id():
+    index = FingerprintIndex(max_distance=8)
+    fingerprint = simhash(TEXT)
+    index.add(fingerprint, "id-A", scope="A")
+    assert index.find(fingerprint, scope="B") is None
+    index.add(fingerprint, "id-B", scope="B")
+    assert index.find(fingerprint, scope="B") == "id-B"
+    assert index.find(fingerprint, scope="A") == "id-A"
+    assert index.find(fingerprint) is None
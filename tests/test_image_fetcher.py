@@ -0,0 +1,127 @@
+import asyncio
+from io import BytesIO
+
+import httpx
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from utils.image_fetcher import ImageFetcher, prefetch_slide_images
+from utils.preview_renderer import image_data_uri
+
+
+def encoded(image_format: str) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (8, 6), (200, 40, 40)).save(buf, format=image_format)
+    return buf.getvalue()
+
+
+JPEG = encoded("JPEG")
+WEBP = encoded("WEBP")
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="8" height="6"/>'
+
+
+class StubImageServer:
+    """Image API stub: one generated URL per prompt, slow JPEG downloads, optional failures per URL."""
+
+    def __init__(self, failures=None, bodies=None):
+        self.failures = dict(failures or {})
+        self.bodies = dict(bodies or {})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if request.method == "POST":
+                prompt = request.read().decode().split("illustration of: ")[1].split('"')[0]
+                url = f"http://images.test/{prompt.split()[0].lower()}.jpg"
+                return httpx.Response(200, json={"choices": [{"message": {"image_url": url}}]})
+            failures = self.failures.get(request.url.path, [])
+            if failures:
+                failure = failures.pop(0)
+                if failure == "connect":
+                    raise httpx.ConnectError("connection refused", request=request)
+                return httpx.Response(failure)
+            content_type, body = self.bodies.get(request.url.path, ("image/jpeg", JPEG))
+            return httpx.Response(200, headers={"content-type": content_type}, content=body)
+        finally:
+            self.in_flight -= 1
+
+
+def fetcher_kwargs(server, cache_dir, **kwargs):
+    return dict(base_url="http://api.test", api_key="test", cache_dir=str(cache_dir),
+                transport=httpx.MockTransport(server), retry_backoff=0, **kwargs)
+
+
+def test_prefetch_is_concurrent_but_bounded(tmp_path):
+    server = StubImageServer()
+    pitch_deck = {"slides": [{"type": "problem", "title": f"Slide{index} title"} for index in range(8)]}
+    images = prefetch_slide_images(pitch_deck, "fintech", slide_types={"problem"},
+                                   **fetcher_kwargs(server, tmp_path, max_concurrency=3))
+    assert images == {index: JPEG for index in range(8)}
+    assert server.max_in_flight == 3
+
+
+def test_transient_failures_are_retried(tmp_path):
+    server = StubImageServer({"/flaky.jpg": [503, "connect"], "/gone.jpg": [404], "/down.jpg": [502] * 3})
+
+    async def run():
+        async with ImageFetcher(**fetcher_kwargs(server, tmp_path, retries=2)) as fetcher:
+            results = [await fetcher.fetch_url(f"http://images.test/{name}.jpg") for name in ("flaky", "gone", "down")]
+            return results, fetcher.stats
+
+    (flaky, gone, down), stats = asyncio.run(run())
+    assert flaky == JPEG
+    assert gone is None  # 4xx isn't transient
+    assert down is None  # Gives up after retries
+    assert [path for _, path in server.requests].count("/flaky.jpg") == 3
+    assert [path for _, path in server.requests].count("/gone.jpg") == 1
+    assert [path for _, path in server.requests].count("/down.jpg") == 3
+    assert stats["retries"] == 4
+    assert stats["failures"] == 2
+
+
+def test_cache_hits_skip_the_network_and_keep_the_format(tmp_path):
+    server = StubImageServer()
+
+    async def fetch(prompt):
+        async with ImageFetcher(**fetcher_kwargs(server, tmp_path)) as fetcher:
+            return await fetcher.fetch_prompt(prompt), fetcher.stats
+
+    assert asyncio.run(fetch("Market size"))[0] == JPEG
+    assert len(server.requests) == 2
+    data, stats = asyncio.run(fetch("Market size"))
+    assert data == JPEG
+    assert len(server.requests) == 2
+    assert stats["cache_hits"] == 1
+    # JPEG bytes aren't stored under a .png name
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".img", ".img"]
+
+
+def test_downloads_are_converted_to_formats_powerpoint_embeds(tmp_path):
+    server = StubImageServer(bodies={"/photo.webp": ("image/webp", WEBP), "/logo.svg": ("image/svg+xml", SVG)})
+
+    async def run():
+        async with ImageFetcher(**fetcher_kwargs(server, tmp_path)) as fetcher:
+            results = [await fetcher.fetch_url(f"http://images.test/{name}") for name in ("photo.webp", "logo.svg")]
+            return results, fetcher.stats
+
+    (webp, svg), stats = asyncio.run(run())
+    assert Image.open(BytesIO(webp)).format == "PNG"
+    assert image_data_uri(webp).startswith("data:image/png;")
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+    assert slide.shapes.add_picture(BytesIO(webp), Inches(1), Inches(1)).image.ext == "png"
+    assert svg is None
+    assert stats["failures"] == 1
+    assert len(list(tmp_path.iterdir())) == 1  # Only the converted WebP is cached
+
+
+def test_preview_labels_image_formats():
+    assert image_data_uri(WEBP).startswith("data:image/webp;")
+    assert image_data_uri(JPEG).startswith("data:image/jpeg;")
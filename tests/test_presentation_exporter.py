@@ -0,0 +1,27 @@
+import os
+from io import BytesIO
+from types import SimpleNamespace
+
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.util import Inches
+
+from utils import presentation_exporter
+from utils.presentation_exporter import save_as_powerpoint
+
+
+def test_visuals_are_placed_in_the_configured_box(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("templates")
+    Presentation().save(os.path.join("templates", "Generic.pptx"))
+    monkeypatch.setattr(presentation_exporter, "PitchPilotConfig",
+                        lambda: SimpleNamespace(visual_box_in=(5.0, 1.0, 4.0, 3.0)))
+    buf = BytesIO()
+    Image.new("RGB", (400, 300), (30, 90, 200)).save(buf, format="PNG")
+    deck = {"title": "Deck", "slides": [{"title": "Market", "content": ["Big"], "generated_visuals": [buf.getvalue()]}]}
+
+    slide = Presentation(BytesIO(save_as_powerpoint(deck))).slides[1]
+
+    picture = next(shape for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE)
+    assert (picture.left, picture.top, picture.width) == (Inches(5), Inches(1), Inches(4))
@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import PointStruct
+
+from memory import qdrant_memory
+from memory.qdrant_memory import QdrantMemoryStore
+
+TEXT = "Small businesses struggle with cash flow management across the United States."
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [float(len(text)), 1.0, 0.0, 0.5]
+
+
+@pytest.fixture
+def new_store(monkeypatch):
+    """Builds stores over one in-memory Qdrant, like successive generations against one server."""
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(qdrant_memory, "get_qdrant_client", lambda *args, **kwargs: client)
+
+    def build():
+        store = QdrantMemoryStore("unused", vector_dimension=4)
+        store.embedding_model = FakeEmbeddings()
+        return store
+
+    return build
+
+
+def test_a_new_store_skips_duplicates_written_by_an_earlier_one(new_store):
+    first_id = new_store().add_to_memory(TEXT, {"startup": "Acme"})
+    unscoped_id = new_store().add_to_memory(TEXT)
+
+    store = new_store()
+    assert store.add_to_memory(TEXT.upper() + "  ", {"startup": "Acme"}) == first_id
+    assert store.add_to_memory(TEXT) == unscoped_id
+    assert store.add_to_memory(TEXT, {"startup": "Globex"}) not in (first_id, unscoped_id)
+    assert store.dedupe_stats["skipped_fingerprint"] == 2
+    assert store.dedupe_stats["written"] == 1
+
+
+def test_memories_without_a_stored_fingerprint_are_fingerprinted_from_their_text(new_store):
+    store = new_store()
+    legacy_id = str(uuid.uuid4())
+    store.client.upsert(collection_name=store.collection_name, points=[
+        PointStruct(id=legacy_id, vector=[1.0, 0.0, 0.0, 0.0], payload={"text": TEXT, "metadata": {"startup": "Acme"}})
+    ])
+    assert new_store().add_to_memory(TEXT, {"startup": "Acme"}) == legacy_id
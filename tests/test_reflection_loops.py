@@ -0,0 +1,56 @@
+import json
+import re
+
+import pytest
+
+from utils.reflection_loops import ReflectionSystem
+
+
+def scoring_llm(fake_llm, score_for):
+    """Scores each section with score_for(bullets); rewrites append a marker bullet."""
+    def respond(prompt, kwargs):
+        if kwargs["profile"] == "reflection_score":
+            sections = json.loads(re.search(r"bullet points\):\n(.*?)\n\nRespond", prompt, re.S).group(1))
+            return json.dumps({name: {"score": score_for(value), "suggestions": "more data"}
+                               for name, value in sections.items()})
+        content = json.loads(re.search(r"\(JSON\):\n(.*?)\n\nKeep", prompt, re.S).group(1))
+        return json.dumps(content + ["rewrite"])
+    return fake_llm(respond)
+
+
+def test_last_rewrite_is_scored_and_reverted_when_worse(fake_llm):
+    # Each rewrite adds a bullet; the second rewrite scores worse than the first
+    scores = {1: 0.3, 2: 0.5, 3: 0.4}
+    llm = scoring_llm(fake_llm, lambda bullets: scores[len(bullets)])
+    reflection = ReflectionSystem(llm, threshold=0.9, max_iterations=2)
+
+    result = reflection.improve_content({"Problem": ["a"]})
+
+    assert result == {"Problem": ["a", "rewrite"]}
+    assert reflection.telemetry[-1]["scores"] == {"Problem": 0.5}
+    assert len(llm.profile_calls("reflection_improve")) == 2
+    assert len(llm.profile_calls("reflection_score")) == 3
+
+
+def test_sections_still_weak_after_max_iterations_are_closed_with_their_score(fake_llm):
+    llm = scoring_llm(fake_llm, lambda bullets: 0.1 * len(bullets))
+    reflection = ReflectionSystem(llm, threshold=0.9, max_iterations=2)
+
+    result = reflection.improve_content({"Problem": ["a"], "Team": []})
+
+    assert result["Problem"] == ["a", "rewrite", "rewrite"]
+    assert result["Team"] == []
+    final = reflection.telemetry[-1]
+    assert final["scores"] == {"Problem": pytest.approx(0.3)}
+    assert final["iterations"][-1]["closed"] == {"Problem": "max_iterations"}
+
+
+def test_telemetry_accumulates_across_calls(fake_llm):
+    llm = scoring_llm(fake_llm, lambda bullets: 0.95)
+    reflection = ReflectionSystem(llm, threshold=0.9)
+
+    reflection.improve_content({"Problem": ["a"]})
+    reflection.improve_content({"Team": ["b"]})
+
+    assert [call["sections"] for call in reflection.telemetry] == [["Problem"], ["Team"]]
+    assert all(call["scores"] for call in reflection.telemetry)
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.render_pool import RenderError, RenderPool
+
+CODE = "plt.plot([1, 2, 3])"
+
+
+@pytest.fixture
+def pool():
+    with RenderPool(workers=1, timeout=30) as pool:
+        yield pool
+
+
+def idle_worker(pool):
+    worker = pool._idle.get()
+    pool._idle.put(worker)
+    return worker
+
+
+def test_worker_that_died_while_idle_is_replaced_before_the_job(pool):
+    dead = idle_worker(pool)
+    dead.process.kill()
+    dead.process.join()
+
+    assert pool.render(CODE).startswith(b"\x89PNG")
+    assert idle_worker(pool) is not dead
+    assert pool.stats["replaced"] == 1
+
+
+def test_failed_send_reaps_the_worker_instead_of_returning_it(pool):
+    broken = idle_worker(pool)
+    broken.conn.close()  # Any send on it now fails
+
+    with pytest.raises(RenderError, match="died"):
+        pool.render(CODE)
+
+    assert idle_worker(pool) is not broken
+    assert not broken.process.is_alive()
+    assert pool.render(CODE).startswith(b"\x89PNG")
+    assert pool.stats["replaced"] == 1
@@ -0,0 +1,82 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from agents.orchestrator import PitchPilotOrchestrator
+from utils.reflection_loops import ReflectionSystem
+from utils.section_stream import SectionStreamParser
+from utils.token_accounting import TokenLedger
+
+SLIDES = ["Title Slide", "Problem", "Solution", "Market Size", "Team", "Ask"]
+STREAM = (
+    "# Overview\nAcme forecasts cash flow.\n"
+    "# Problem\n- Late payments\n"
+    "# Solution\n- Forecasting\n"
+    "# Market Size\n- $10B\n"
+    "# Team\n- Two founders\n"
+    "# Ask\n- $2M seed\n"
+)
+
+
+class StreamingPitchAgent:
+    def create_pitch_content(self, startup_info, research, competitors, on_section=None, sections=None):
+        parser = SectionStreamParser()
+        for chunk in re.findall(r".{1,7}", STREAM, re.S):
+            for section, lines in parser.feed(chunk):
+                on_section(section, lines)
+        for section, lines in parser.close():
+            on_section(section, lines)
+        return parser.content
+
+
+class RecordingSlideDesigner:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def design_slide(self, startup_info, pitch_content, slide_template):
+        with self._lock:
+            self.calls.append((slide_template, pitch_content))
+        return {"type": slide_template, "content": next(iter(pitch_content.values()), [])}
+
+
+def passing_scores(prompt, kwargs):
+    time.sleep(0.05)  # Later sections finish streaming while the first batch is scored
+    sections = json.loads(re.search(r"bullet points\):\n(.*?)\n\nRespond", prompt, re.S).group(1))
+    return json.dumps({name: {"score": 0.95, "suggestions": ""} for name in sections})
+
+
+def make_orchestrator(llm):
+    orchestrator = PitchPilotOrchestrator.__new__(PitchPilotOrchestrator)
+    orchestrator.config = SimpleNamespace(pipeline_workers=4)
+    orchestrator.pitch_creation_agent = StreamingPitchAgent()
+    orchestrator.slide_design_agent = RecordingSlideDesigner()
+    orchestrator.reflection_system = ReflectionSystem(llm, threshold=0.9)
+    return orchestrator
+
+
+def test_parser_does_not_emit_empty_sections():
+    parser = SectionStreamParser()
+    emitted = parser.feed("# Problem\n- a\n# Empty\n# Ask\n- b\n") + parser.close()
+    assert emitted == [("problem", ["- a"]), ("ask", ["- b"])]
+    assert parser.content["overview"] == [] and parser.content["empty"] == []
+
+
+def test_each_slide_is_designed_once_with_batched_reflection(fake_llm):
+    llm = fake_llm(passing_scores)
+    orchestrator = make_orchestrator(llm)
+    ledger = TokenLedger()
+
+    with ledger.active():
+        content, slides = orchestrator._create_and_design_streaming({"name": "Acme"}, {}, {}, SLIDES, ledger)
+
+    design_calls = Counter(slide for slide, _ in orchestrator.slide_design_agent.calls)
+    assert design_calls == Counter(SLIDES)
+    assert [slide["type"] for slide in slides] == SLIDES
+    assert slides[0]["content"] == ["Acme forecasts cash flow."]
+    assert content["overview"] == ["Acme forecasts cash flow."]
+    # Sections are scored in batches, not once per section
+    assert len(llm.profile_calls("reflection_score")) <= 2
@@ -0,0 +1,29 @@
+from utils.visual_cache import VisualCache, visual_cache_key
+
+
+def test_overwriting_a_key_replaces_its_size(tmp_path):
+    cache = VisualCache(str(tmp_path), max_bytes=1000)
+    for _ in range(5):
+        cache.put("key", b"x" * 300)
+    assert cache._bytes == 300
+    assert cache.stats["evicted"] == 0
+    cache.put("key", b"x" * 100)
+    assert cache._bytes == 100
+
+
+def test_eviction_keeps_the_cache_within_budget(tmp_path):
+    cache = VisualCache(str(tmp_path), max_bytes=1000)
+    for index in range(5):
+        cache.put(f"key{index}", b"x" * 300)
+    assert cache._bytes <= 1000
+    assert cache._bytes == sum(entry.stat().st_size for entry in cache._entries())
+
+
+def test_get_or_create_bytes_creates_once(tmp_path):
+    cache = VisualCache(str(tmp_path))
+    calls = []
+    key = visual_cache_key("description", "Revenue  growth", "default", (8, 4.5, 100))
+    create = lambda: calls.append(1) or b"png"
+    assert cache.get_or_create_bytes(key, create) == b"png"
+    assert cache.get_or_create_bytes(visual_cache_key("description", "revenue growth", "default", (8, 4.5, 100)), create) == b"png"
+    assert len(calls) == 1
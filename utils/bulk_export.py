@@ -0,0 +1,100 @@
+﻿from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+import multiprocessing
+import os
+import re
+import time
+
+from config import PitchPilotConfig
+
+
+class ExportResult(NamedTuple):
+    index: int  # position of the deck in the input
+    name: str  # startup name
+    data: Optional[bytes]  # .pptx contents; None when written to output_path or on error
+    output_path: Optional[str]
+    seconds: float  # export time inside the worker
+    size: int  # .pptx size in bytes
+    error: Optional[str] = None
+
+
+def _init_worker():
+    """Index the templates once per worker; every export in the worker then reuses the registry."""
+    from utils.presentation_exporter import TEMPLATE_DIR
+    from utils.template_registry import get_template_registry
+    get_template_registry(TEMPLATE_DIR).refresh()
+
+
+def _export_one(index: int, pitch_deck: Dict[str, Any], industry: str, output_path: Optional[str],
+                visual_box: Optional[Tuple[float, float, float, float]]) -> ExportResult:
+    from utils.presentation_exporter import save_as_powerpoint
+
+    name = pitch_deck.get("startup_info", {}).get("name", "Unknown Startup")
+    start = time.perf_counter()
+    try:
+        data = save_as_powerpoint(pitch_deck, output_path, industry=industry, visual_box=visual_box)
+    except Exception as e:
+        return ExportResult(index, name, None, None, time.perf_counter() - start, 0, f"{type(e).__name__}: {e}")
+    seconds = time.perf_counter() - start
+    # Files stay in the worker; only their size crosses the process boundary
+    return ExportResult(index, name, None if output_path else data, output_path, seconds, len(data))
+
+
+def _output_path(output_dir: Optional[str], pitch_deck: Dict[str, Any], index: int) -> Optional[str]:
+    if not output_dir:
+        return None
+    # Startup names are user input: keep the file name to word characters, "." and "-",
+    # so separators or ".." can't leave output_dir
+    name = re.sub(r"[^\w.-]+", "_", str(pitch_deck.get("startup_info", {}).get("name") or "")).strip("._")
+    return os.path.join(output_dir, f"{index:03d}_{name or f'deck_{index}'}_Pitch_Deck.pptx")
+
+
+def export_decks(pitch_decks: Iterable[Dict[str, Any]],
+                 workers: Optional[int] = None,
+                 output_dir: Optional[str] = None,
+                 visual_box: Optional[Tuple[float, float, float, float]] = None) -> Iterator[ExportResult]:
+    """
+    Export many pitch decks across a process pool, yielding each result as it finishes.
+
+    Args:
+        pitch_decks: Generated pitch decks; the industry comes from each deck's startup_info
+        workers: Worker processes (defaults to config.export_workers, capped by the number of decks)
+        output_dir: Write each deck here instead of returning its bytes
+        visual_box: Visual placement in inches (left, top, width, height); defaults to config.visual_box_in
+
+    Returns:
+        Iterator of ExportResult in completion order; failed exports carry an error instead of raising
+    """
+    pitch_decks = list(pitch_decks)
+    if not pitch_decks:
+        return
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    config = PitchPilotConfig()
+    workers = max(1, min(workers or config.export_workers, len(pitch_decks)))
+    visual_box = visual_box or config.visual_box_in
+
+    start = time.perf_counter()
+    total_bytes = 0
+    # Spawn, as for the render pool: forking a process that holds threads and clients is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as executor:
+        futures = [
+            executor.submit(
+                _export_one, index, deck,
+                deck.get("startup_info", {}).get("industry", "Generic"),
+                _output_path(output_dir, deck, index), visual_box
+            )
+            for index, deck in enumerate(pitch_decks)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            total_bytes += result.size
+            if result.error:
+                print(f"[Export] {result.name}: failed after {result.seconds:.2f}s ({result.error})")
+            else:
+                print(f"[Export] {result.name}: {result.seconds:.2f}s, {result.size / 1024:.1f} KB")
+            yield result
+
+    print(f"[Export] {len(pitch_decks)} decks in {time.perf_counter() - start:.2f}s "
+          f"on {workers} workers ({total_bytes / 1024:.1f} KB)")
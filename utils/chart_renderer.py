@@ -0,0 +1,298 @@
+﻿from typing import Any, Dict, List, Optional
+import io
+import math
+
+import matplotlib
+matplotlib.use("Agg")  # Non-GUI backend
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+CHART_TYPES = ("bar", "line", "pie", "funnel", "tam_sam_som", "timeline", "comparison_table")
+
+# Palettes matching the app's color schemes
+THEMES: Dict[str, Dict[str, Any]] = {
+    "default": {"colors": ["#4285F4", "#34A853", "#FBBC05", "#EA4335", "#8E24AA", "#00ACC1"], "text": "#333333"},
+    "blue": {"colors": ["#0D47A1", "#1976D2", "#42A5F5", "#90CAF9", "#26C6DA", "#5C6BC0"], "text": "#1A237E"},
+    "purple": {"colors": ["#667EEA", "#764BA2", "#9575CD", "#B39DDB", "#CE93D8", "#7E57C2"], "text": "#311B92"},
+    "green": {"colors": ["#1B5E20", "#43A047", "#81C784", "#A5D6A7", "#00897B", "#C0CA33"], "text": "#1B5E20"},
+    "orange": {"colors": ["#E65100", "#FB8C00", "#FFB74D", "#FFE0B2", "#F4511E", "#FFCA28"], "text": "#BF360C"},
+}
+
+MAX_POINTS = 24
+# Chart types that draw values as sizes, so they can't be negative
+SIZE_CHART_TYPES = ("pie", "funnel", "tam_sam_som")
+
+
+class ChartSpecError(ValueError):
+    """Raised when a chart spec is malformed or of an unknown type."""
+
+
+def _display_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Escape "$" in every label, which would otherwise switch matplotlib into mathtext."""
+    def escape(value: Any) -> Any:
+        return value.replace("$", r"\$") if isinstance(value, str) else value
+    display = {key: escape(value) for key, value in spec.items()}
+    display["labels"] = [escape(label) for label in spec["labels"]]
+    display["series"] = [
+        {"name": escape(series["name"]), "values": [escape(value) for value in series["values"]]}
+        for series in spec["series"]
+    ]
+    return display
+
+
+def _number(value: Any) -> float:
+    """Coerce 12, "12", "$1.2B", "-$5M" or "35%" to a finite float."""
+    if isinstance(value, bool):
+        raise ChartSpecError(f"Expected a number, got {value!r}")
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip().replace(",", "").replace("\u2212", "-")
+        # One sign, before or after the currency symbol: "-$5M" or "$-5M"
+        sign = ""
+        if text[:1] in ("+", "-"):
+            sign, text = text[0], text[1:]
+        text = text.lstrip("$€£").rstrip("%")
+        if sign and text[:1] in ("+", "-"):
+            raise ChartSpecError(f"Expected a number, got {value!r}")
+        multiplier = {"k": 1e3, "m": 1e6, "b": 1e9, "t": 1e12}.get(text[-1:].lower(), 1)
+        if multiplier != 1:
+            text = text[:-1]
+        try:
+            number = float(sign + text) * multiplier
+        except ValueError:
+            raise ChartSpecError(f"Expected a number, got {value!r}")
+    # "nan", "inf" and 1e999 parse as floats but can't be drawn or labeled
+    if not math.isfinite(number):
+        raise ChartSpecError(f"Expected a finite number, got {value!r}")
+    return number
+
+
+def normalize_chart_spec(spec: Any) -> Dict[str, Any]:
+    """
+    Validate a chart spec and return it in canonical form.
+
+    A spec looks like:
+        {"type": "bar", "title": "Revenue", "labels": ["2023", "2024"],
+         "series": [{"name": "ARR", "values": [1.2, 3.4]}], "unit": "$M"}
+
+    bar/line take one or more numeric series; pie/funnel/tam_sam_som take one,
+    of non-negative values (and pie needs at least one positive value);
+    timeline takes milestone labels with optional text values; comparison_table
+    takes criteria as labels and one series (row) per company.
+
+    Raises:
+        ChartSpecError: If the spec can't be rendered
+    """
+    if not isinstance(spec, dict):
+        raise ChartSpecError("Chart spec must be an object")
+    chart_type = str(spec.get("type", "")).lower().replace("-", "_").replace(" ", "_")
+    if chart_type not in CHART_TYPES:
+        raise ChartSpecError(f"Unknown chart type {spec.get('type')!r}")
+
+    labels = [str(label) for label in spec.get("labels") or []][:MAX_POINTS]
+    if not labels:
+        raise ChartSpecError("Chart spec has no labels")
+
+    series = spec.get("series") or []
+    if isinstance(series, dict):
+        series = [series]
+    if not series and spec.get("values") is not None:
+        series = [{"name": spec.get("title", ""), "values": spec["values"]}]
+
+    normalized_series = []
+    for index, entry in enumerate(series[:8]):
+        if not isinstance(entry, dict):
+            entry = {"values": entry}
+        values = list(entry.get("values") or [])[:len(labels)]
+        if chart_type not in ("timeline", "comparison_table"):
+            values = [_number(value) for value in values]
+            if len(values) != len(labels):
+                raise ChartSpecError("Series length doesn't match labels")
+            if chart_type in SIZE_CHART_TYPES and any(value < 0 for value in values):
+                raise ChartSpecError(f"{chart_type} values can't be negative")
+            if chart_type == "pie" and not any(values):
+                raise ChartSpecError("pie needs at least one positive value")
+        else:
+            values = [str(value) for value in values]
+        normalized_series.append({"name": str(entry.get("name", f"Series {index + 1}")), "values": values})
+    if chart_type != "timeline" and not normalized_series:
+        raise ChartSpecError("Chart spec has no data")
+
+    theme = str(spec.get("theme") or "default").lower()
+    return {
+        "type": chart_type,
+        "title": str(spec.get("title") or ""),
+        "labels": labels,
+        "series": normalized_series,
+        "x_label": str(spec.get("x_label") or ""),
+        "y_label": str(spec.get("y_label") or ""),
+        "unit": str(spec.get("unit") or ""),
+        "theme": theme if theme in THEMES else "default",
+    }
+
+
+def _format_value(value: float, unit: str) -> str:
+    """Compact value label, e.g. 5e9 with unit "$" -> "$5B"."""
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            text = f"{value / threshold:.1f}".rstrip("0").rstrip(".") + suffix
+            break
+    else:
+        text = f"{value:.0f}" if value == int(value) else f"{value:.1f}"
+    if unit in (r"\$", "€", "£"):
+        return unit + text
+    return f"{text}{unit}" if unit in ("%", "x") else f"{text} {unit}".strip()
+
+
+def _draw_bar(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    count = len(spec["series"])
+    width = 0.8 / count
+    positions = range(len(spec["labels"]))
+    for index, series in enumerate(spec["series"]):
+        offsets = [p - 0.4 + width * (index + 0.5) for p in positions]
+        bars = ax.bar(offsets, series["values"], width, label=series["name"], color=colors[index % len(colors)])
+        if count == 1:
+            ax.bar_label(bars, labels=[_format_value(v, spec["unit"]) for v in series["values"]], padding=3)
+    ax.set_xticks(list(positions), spec["labels"])
+    _finish_axes(ax, spec, legend=count > 1)
+
+
+def _draw_line(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    for index, series in enumerate(spec["series"]):
+        ax.plot(spec["labels"], series["values"], marker="o", linewidth=2.5,
+                label=series["name"], color=colors[index % len(colors)])
+    _finish_axes(ax, spec, legend=len(spec["series"]) > 1)
+
+
+def _draw_pie(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    ax.pie(spec["series"][0]["values"], labels=spec["labels"], colors=colors, autopct="%1.0f%%",
+           startangle=90, wedgeprops={"width": 0.45, "edgecolor": "white"})
+    ax.set_aspect("equal")
+
+
+def _draw_funnel(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    values = spec["series"][0]["values"]
+    widest = max(values) or 1
+    for index, (label, value) in enumerate(zip(spec["labels"], values)):
+        width = max(value / widest, 0.05)
+        ax.barh(index, width, left=(1 - width) / 2, height=0.8, color=colors[index % len(colors)])
+        ax.text(0.5, index, f"{label}: {_format_value(value, spec['unit'])}", ha="center", va="center",
+                color="white", fontweight="bold")
+    ax.set_ylim(len(values) - 0.5, -0.5)
+    ax.set_axis_off()
+
+
+def _draw_tam_sam_som(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    values = spec["series"][0]["values"]
+    largest = max(values) or 1
+    for index, (label, value) in enumerate(zip(spec["labels"], values)):
+        # Circle area proportional to market size, all resting on the same baseline
+        radius = max((value / largest) ** 0.5, 0.08)
+        ax.add_patch(Circle((0, radius - 1), radius, color=colors[index % len(colors)], alpha=0.9))
+        # Labels sit to the right, level with the top of their circle
+        top = 2 * radius - 1
+        ax.annotate(f"{label}: {_format_value(value, spec['unit'])}", xy=(0, top), xytext=(1.15, top),
+                    va="center", fontweight="bold", color=colors[index % len(colors)],
+                    arrowprops={"arrowstyle": "-", "color": "#999999"})
+    ax.set_xlim(-1.05, 2.2)
+    ax.set_ylim(-1.05, 1.05)
+    ax.set_aspect("equal")
+    ax.set_axis_off()
+
+
+def _draw_timeline(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    notes = spec["series"][0]["values"] if spec["series"] else []
+    count = len(spec["labels"])
+    ax.plot([0, count - 1], [0, 0], color="#999999", linewidth=2, zorder=1)
+    for index, label in enumerate(spec["labels"]):
+        side = 1 if index % 2 == 0 else -1
+        ax.scatter(index, 0, s=120, color=colors[index % len(colors)], zorder=2)
+        text = label + (f"\n{notes[index]}" if index < len(notes) else "")
+        ax.annotate(text, (index, 0), xytext=(0, 24 * side), textcoords="offset points", ha="center",
+                    va="bottom" if side > 0 else "top", fontsize=9)
+    ax.set_xlim(-0.6, count - 0.4)
+    ax.set_ylim(-1, 1)
+    ax.set_axis_off()
+
+
+def _draw_comparison_table(fig: Figure, spec: Dict[str, Any], colors: List[str]):
+    ax = fig.add_subplot()
+    ax.set_axis_off()
+    cells = [
+        [row["values"][index] if index < len(row["values"]) else "" for index in range(len(spec["labels"]))]
+        for row in spec["series"]
+    ]
+    table = ax.table(cellText=cells, rowLabels=[row["name"] for row in spec["series"]], colLabels=spec["labels"],
+                     loc="center", cellLoc="center")
+    table.auto_set_font_size(False)
+    table.set_fontsize(10)
+    table.scale(1, 1.6)
+    for (row, col), cell in table.get_celld().items():
+        if row == 0 or col == -1:
+            cell.set_text_props(color="white", fontweight="bold")
+            cell.set_facecolor(colors[0])
+        elif row == 1:
+            # First row is the startup itself
+            cell.set_facecolor("#F1F3F4")
+
+
+def _finish_axes(ax, spec: Dict[str, Any], legend: bool):
+    ax.set_xlabel(spec["x_label"])
+    ax.set_ylabel(spec["y_label"] or spec["unit"])
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.grid(axis="y", alpha=0.3)
+    if legend:
+        ax.legend(frameon=False)
+
+
+_DRAWERS = {
+    "bar": _draw_bar,
+    "line": _draw_line,
+    "pie": _draw_pie,
+    "funnel": _draw_funnel,
+    "tam_sam_som": _draw_tam_sam_som,
+    "timeline": _draw_timeline,
+    "comparison_table": _draw_comparison_table,
+}
+
+
+def render_chart(
+    spec: Dict[str, Any],
+    width: float = 8.0,
+    height: float = 4.5,
+    dpi: int = 100,
+    theme: Optional[str] = None
+) -> bytes:
+    """
+    Render a chart spec to PNG bytes.
+
+    Uses the object-oriented Figure API only, with no pyplot global state, so it
+    is safe to call from several threads at once.
+
+    Args:
+        spec: Chart spec (see normalize_chart_spec); normalized here
+        width, height: Figure size in inches
+        dpi: Output resolution
+        theme: Overrides the spec's theme
+
+    Returns:
+        PNG image bytes
+    """
+    spec = _display_spec(normalize_chart_spec(spec))
+    palette = THEMES.get((theme or spec["theme"]).lower(), THEMES["default"])
+
+    fig = Figure(figsize=(width, height), dpi=dpi)
+    _DRAWERS[spec["type"]](fig, spec, palette["colors"])
+    if spec["title"]:
+        fig.suptitle(spec["title"], fontsize=14, fontweight="bold", color=palette["text"])
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", facecolor="white")
+    return buf.getvalue()
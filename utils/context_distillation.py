@@ -0,0 +1,86 @@
+﻿from typing import Dict, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
+from langchain.llms.base import BaseLLM
+
+from prompts.distillation_prompts import DISTILLATION_PROMPT
+from utils.token_counting import count_tokens, truncate_to_tokens
+from utils.token_accounting import submit_in_context
+
+
+def format_items(items: List[str]) -> str:
+    """Render a list of text items as bullet lines instead of a Python repr."""
+    return "\n".join(f"- {item.strip()}" for item in items if item and item.strip())
+
+
+def log_prompt_tokens(stage: str, raw_prompt: str, final_prompt: str):
+    """Log a stage's prompt size with raw context and with distilled context."""
+    print(f"[Distill] {stage}: prompt {count_tokens(raw_prompt)} -> {count_tokens(final_prompt)} tokens")
+
+
+class ContextDistiller:
+    """
+    Compresses research and competitor output into token-budgeted fact sheets.
+
+    Text already within budget is passed through without an LLM call. Distilled
+    results are kept in an in-process LRU cache keyed on the input, so the same
+    research feeding several downstream prompts is only distilled once.
+    """
+
+    def __init__(self, llm: BaseLLM, token_budget: int = 250, cache_size: int = 256):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"passthrough": 0, "cache_hits": 0, "distilled": 0}
+        self._lock = threading.Lock()
+
+    def distill(self, text: str, kind: str = "context", token_budget: int = None) -> str:
+        """
+        Compress text into a fact sheet of at most token_budget tokens.
+
+        Args:
+            text: Raw context
+            kind: What the text is, e.g. "market research"; used in the prompt
+            token_budget: Overrides the default budget
+
+        Returns:
+            The distilled text
+        """
+        budget = token_budget or self.token_budget
+        if count_tokens(text) <= budget:
+            with self._lock:
+                self.stats["passthrough"] += 1
+            return text
+
+        key = hashlib.sha256(f"{kind}\0{budget}\0{text}".encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self.cache[key]
+
+        prompt = DISTILLATION_PROMPT.render(kind=kind, max_tokens=budget, text=text)
+        response = self.llm.generate([prompt], profile="distillation")
+        # The model doesn't always respect the budget, so enforce it
+        distilled = truncate_to_tokens(response.generations[0][0].text.strip(), budget)
+
+        with self._lock:
+            self.stats["distilled"] += 1
+            self.cache[key] = distilled
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return distilled
+
+    def distill_fields(self, fields: Dict[str, str], kinds: Dict[str, str] = None, token_budget: int = None) -> Dict[str, str]:
+        """Distill several named fields, e.g. the sections of research results, concurrently."""
+        kinds = kinds or {}
+        names = list(fields)
+        with ThreadPoolExecutor(max_workers=max(1, len(names))) as executor:
+            futures = [
+                submit_in_context(executor, self.distill, fields[name], kinds.get(name, name.replace("_", " ")), token_budget)
+                for name in names
+            ]
+            return {name: future.result() for name, future in zip(names, futures)}
@@ -1,34 +1,215 @@
-﻿from typing import Dict, List, Any
+﻿from typing import Dict, List, Any, Optional, Tuple
+import string
 
-def prioritize_context(context_items: List[str], startup_info: Dict[str, str]) -> List[str]:
+import numpy as np
+
+# Punctuation becomes whitespace, except inside words like "cash-flow" or "b2b's"
+PUNCTUATION_TABLE = str.maketrans({char: " " for char in string.punctuation if char not in "-'"})
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to "
+    "was we were will with".split()
+)
+
+
+def split_words(text: str) -> List[str]:
+    """Lowercase word tokens."""
+    return text.lower().translate(PUNCTUATION_TABLE).split()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [token for token in split_words(text) if token not in STOPWORDS]
+
+
+# For batch tokenization: punctuation as above, and every character str.split()
+# treats as whitespace becomes a plain space, so token boundaries are just b" "
+SPACE_TABLE = str.maketrans({
+    **{chr(code): " " for code in range(0x3001) if chr(code).isspace()},
+    **{chr(code): " " for code in PUNCTUATION_TABLE},
+})
+# The same mapping plus lowercasing as a byte table, for all-ASCII batches
+ASCII_SPACE_TABLE = bytes(
+    ord(chr(code).lower().translate(SPACE_TABLE)) for code in range(128)
+) + bytes(range(128, 256))
+# Masks keeping the first n bytes of a little-endian uint64, n = 0..8
+BYTE_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64)
+KEY_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def _pack_keys(text: bytes, starts: np.ndarray, lengths: np.ndarray, n_words: int) -> np.ndarray:
+    """Each token's bytes, zero padded, as n_words little-endian uint64 words (one row per word)."""
+    # Unaligned 8-byte windows over the buffer: one gather reads 8 bytes of a token
+    padded = text + b"\0" * (8 * n_words)
+    windows = np.ndarray(shape=(len(padded) - 7,), dtype="<u8", buffer=padded, strides=(1,))
+    words = np.zeros((n_words, len(starts)), dtype=np.uint64)
+    np.bitwise_and(windows[starts], BYTE_MASKS[np.minimum(lengths, 8)], out=words[0])
+    for index in range(1, n_words):
+        # Later words only for the (few) tokens that reach them
+        longer = np.flatnonzero(lengths > 8 * index)
+        words[index, longer] = windows[starts[longer] + 8 * index] & BYTE_MASKS[np.minimum(lengths[longer] - 8 * index, 8)]
+    return words
+
+
+def _hash_slots(words: np.ndarray, multiplier: int, bits: int) -> np.ndarray:
+    """Multiplicative hash of packed keys into a 2**bits slot table."""
+    hashes = words[0].copy()
+    for column in words[1:]:
+        hashes ^= column * np.uint64(0x2545F4914F6CDD1D)
+    return ((hashes * np.uint64(multiplier)) >> np.uint64(64 - bits)).astype(np.intp)
+
+
+class ContextScorer:
+    """
+    BM25 scorer for context items against a fixed startup description.
+
+    The startup vocabulary is built once, as a small collision-free hash table
+    of packed UTF-8 keys. A batch of items is then tokenized as one byte buffer
+    with numpy: token boundaries come from a space mask, tokens are read as
+    integer words, looked up in the table and confirmed, so no per-token Python
+    objects are created.
+    """
+
+    def __init__(self, startup_info: Dict[str, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        startup_text = " ".join(value for value in startup_info.values() if isinstance(value, str))
+        query_terms = tokenize(startup_text)
+        self.vocabulary: Dict[str, int] = {}
+        for term in query_terms:
+            self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        # Terms repeated in the startup description count more
+        self.query_weights = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for term in query_terms:
+            self.query_weights[self.vocabulary[term]] += 1.0
+
+        self._build_lookup([term.encode("utf-8") for term in self.vocabulary])
+
+    def _build_lookup(self, encoded: List[bytes]):
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self._n_words = max(1, -(-int(lengths.max(initial=1)) // 8))
+        self._length_allowed = np.zeros(self._n_words * 8 + 2, dtype=bool)
+        self._length_allowed[lengths] = True
+        self._keys = _pack_keys(b"".join(encoded), np.cumsum(lengths) - lengths, lengths, self._n_words)
+
+        # Grow the table (and vary the multiplier) until every term has its own slot
+        self._bits = max(4, (4 * len(encoded)).bit_length())
+        self._multiplier = KEY_HASH_MULTIPLIER
+        while True:
+            slots = _hash_slots(self._keys, self._multiplier, self._bits)
+            if len(np.unique(slots)) == len(slots):
+                break
+            self._bits += 1
+            self._multiplier = (self._multiplier * 6364136223846793005 + 1442695040888963407) % 2 ** 64 | 1
+        self._slot_columns = np.full(2 ** self._bits, -1, dtype=np.intp)
+        self._slot_columns[slots] = np.arange(len(encoded))
+
+    def _term_frequencies(self, context_items: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(items x vocabulary) term counts and token counts per item."""
+        n_items = len(context_items)
+        joined = " ".join(context_items)
+        if joined.isascii():
+            # One byte-level pass lowercases, strips punctuation and normalizes whitespace
+            text = joined.encode("ascii").translate(ASCII_SPACE_TABLE)
+            sizes = np.fromiter(map(len, context_items), dtype=np.int64, count=n_items)
+        else:
+            processed = [item.lower().translate(SPACE_TABLE).encode("utf-8") for item in context_items]
+            text = b" ".join(processed)
+            sizes = np.fromiter(map(len, processed), dtype=np.int64, count=n_items)
+        item_starts = np.cumsum(sizes + 1) - (sizes + 1)
+
+        # Tokens are maximal runs of non-space bytes; boundaries alternate start, end
+        is_word = np.zeros(len(text) + 2, dtype=bool)
+        is_word[1:-1] = np.frombuffer(text, dtype=np.uint8) != 32
+        boundaries = np.flatnonzero(is_word[1:] != is_word[:-1])
+        starts = boundaries[0::2]
+        token_lengths = boundaries[1::2] - starts
+        lengths = np.diff(np.searchsorted(starts, item_starts), append=len(starts))
+        rows = np.repeat(np.arange(n_items), lengths)
+
+        # Only tokens as long as some vocabulary term can match one
+        candidates = np.flatnonzero(self._length_allowed[np.minimum(token_lengths, len(self._length_allowed) - 1)])
+        keys = _pack_keys(text, starts[candidates], token_lengths[candidates], self._n_words)
+
+        # Table lookup, then confirm the full key so collisions can't miscount
+        columns = self._slot_columns[_hash_slots(keys, self._multiplier, self._bits)]
+        matched = columns >= 0
+        for index in range(self._n_words):
+            matched &= self._keys[index][columns] == keys[index]
+        vocab_size = len(self.vocabulary)
+        term_freqs = np.bincount(
+            rows[candidates[matched]] * vocab_size + columns[matched],
+            minlength=n_items * vocab_size
+        ).reshape(n_items, vocab_size).astype(np.float64)
+        return term_freqs, lengths.astype(np.float64)
+
+    def score(self, context_items: List[str]) -> np.ndarray:
+        """
+        Score items by BM25 relevance to the startup description.
+
+        IDF is computed over the given items, so scores are relative to the batch.
+
+        Args:
+            context_items: List of context items
+
+        Returns:
+            Array of scores aligned with context_items
+        """
+        n_items = len(context_items)
+        if n_items == 0 or not self.vocabulary:
+            return np.zeros(n_items, dtype=np.float64)
+
+        term_freqs, lengths = self._term_frequencies(context_items)
+
+        doc_freqs = np.count_nonzero(term_freqs, axis=0)
+        idf = np.log1p((n_items - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+        avg_length = lengths.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        saturated = term_freqs * (self.k1 + 1) / (term_freqs + norm[:, None])
+        return saturated @ (idf * self.query_weights)
+
+    def top_k(self, context_items: List[str], k: Optional[int] = None) -> List[str]:
+        """
+        Return the k best-scoring items, highest first.
+
+        Ties keep their original order. k=None returns every item.
+        """
+        n_items = len(context_items)
+        if k is None or k >= n_items:
+            k = n_items
+        if k <= 0:
+            return []
+        scores = self.score(context_items)
+        if k < n_items:
+            # Partial selection: everything above the k-th score, then the
+            # earliest items tied with it
+            threshold = np.partition(scores, n_items - k)[n_items - k]
+            above = np.flatnonzero(scores > threshold)
+            tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+            best = np.concatenate([above, tied])
+        else:
+            best = np.arange(n_items)
+        best = best[np.lexsort((best, -scores[best]))]
+        return [context_items[idx] for idx in best]
+
+
+def prioritize_context(
+    context_items: List[str],
+    startup_info: Dict[str, str],
+    top_k: Optional[int] = None
+) -> List[str]:
     """
     Prioritize context items based on relevance to startup info.
     
     Args:
         context_items: List of context items
         startup_info: Dictionary containing information about the startup
+        top_k: Keep only the k most relevant items (all items when None)
         
     Returns:
         Prioritized list of context items
     """
-    # This is a simplified implementation
-    # In a real system, this would use sophisticated relevance scoring
-    
-    # Convert startup info to a single string for comparison
-    startup_text = " ".join(startup_info.values())
-    
-    # Score each context item by counting overlapping terms
-    scored_items = []
-    for item in context_items:
-        # Count how many words from startup_text appear in the item
-        words = set(startup_text.lower().split())
-        item_words = set(item.lower().split())
-        overlap = len(words.intersection(item_words))
-        
-        scored_items.append((item, overlap))
-    
-    # Sort by score (highest first)
-    scored_items.sort(key=lambda x: x[1], reverse=True)
-    
-    # Return the prioritized items
-    return [item for item, _ in scored_items]
+    return ContextScorer(startup_info).top_k(context_items, top_k)
@@ -0,0 +1,124 @@
+﻿"""
+Derive per-profile max_tokens budgets from recorded output lengths.
+
+Reads the JSONL file written by GroqHuggingFaceLLM when `output_length_log` is
+set and recommends a max_tokens per generation profile: the chosen percentile of
+observed completion lengths plus headroom, rounded up. Profiles that often hit
+their current limit (finish_reason "length") get a raised budget instead, since
+their real length distribution is being cut off. Defaults come from the
+budget_* settings in config.py.
+
+Usage:
+    python -m utils.generation_budgets output_lengths.jsonl [--percentile 99] [--headroom 1.2] [--json]
+"""
+from typing import Dict, List, Any, Optional
+import argparse
+import json
+import math
+
+import numpy as np
+
+from config import PitchPilotConfig
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def recommend_budgets(
+    records: List[Dict[str, Any]],
+    percentile: float = 99,
+    headroom: float = 1.2,
+    round_to: int = 16,
+    truncation_tolerance: float = 0.02,
+    truncation_growth: float = 1.5
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Recommend max_tokens per profile.
+
+    Args:
+        records: Output-length records with profile, completion_tokens, max_tokens, finish_reason
+        percentile: Percentile of completion length the budget must cover
+        headroom: Multiplier applied on top of that percentile
+        round_to: Round budgets up to a multiple of this
+        truncation_tolerance: Share of truncated outputs above which the current
+            limit is considered too tight
+        truncation_growth: Factor applied to a too-tight current limit
+
+    Returns:
+        Profile -> statistics and "recommended_max_tokens"
+    """
+    by_profile: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_profile.setdefault(record.get("profile", "default"), []).append(record)
+
+    recommendations = {}
+    for profile, rows in sorted(by_profile.items()):
+        lengths = np.array([row["completion_tokens"] for row in rows], dtype=np.float64)
+        truncated = sum(1 for row in rows if row.get("finish_reason") == "length")
+        current = max(row.get("max_tokens") or 0 for row in rows)
+        truncation_rate = truncated / len(rows)
+
+        target = np.percentile(lengths, percentile) * headroom
+        if truncation_rate > truncation_tolerance and current:
+            # Observed lengths are censored at the limit; grow it rather than fit to it
+            target = max(target, current * truncation_growth)
+        recommended = int(math.ceil(target / round_to) * round_to)
+
+        recommendations[profile] = {
+            "samples": len(rows),
+            "p50": float(np.percentile(lengths, 50)),
+            "p95": float(np.percentile(lengths, 95)),
+            "p99": float(np.percentile(lengths, 99)),
+            "max": float(lengths.max()),
+            "truncation_rate": truncation_rate,
+            "current_max_tokens": current,
+            "recommended_max_tokens": max(recommended, round_to),
+        }
+    return recommendations
+
+
+def main(argv: Optional[List[str]] = None):
+    config = PitchPilotConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log_path")
+    parser.add_argument("--percentile", type=float, default=config.budget_percentile)
+    parser.add_argument("--headroom", type=float, default=config.budget_headroom)
+    parser.add_argument("--json", action="store_true", help="Print generation_profiles-style JSON")
+    args = parser.parse_args(argv)
+
+    recommendations = recommend_budgets(
+        load_records(args.log_path),
+        percentile=args.percentile,
+        headroom=args.headroom,
+        round_to=config.budget_round_to,
+        truncation_tolerance=config.budget_truncation_tolerance,
+        truncation_growth=config.budget_truncation_growth
+    )
+    if args.json:
+        print(json.dumps(
+            {profile: {"max_tokens": row["recommended_max_tokens"]} for profile, row in recommendations.items()},
+            indent=4
+        ))
+        return
+
+    print(f"{'profile':<22}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'trunc':>8}{'current':>9}{'recommend':>11}")
+    for profile, row in recommendations.items():
+        print(
+            f"{profile:<22}{row['samples']:>6}{row['p50']:>8.0f}{row['p95']:>8.0f}{row['p99']:>8.0f}"
+            f"{row['max']:>8.0f}{row['truncation_rate']:>8.1%}{row['current_max_tokens']:>9}"
+            f"{row['recommended_max_tokens']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+﻿from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+
+import httpx
+
+from utils.image_optimization import pptx_compatible_image
+from utils.visual_cache import VisualCache
+from utils.visual_planning import IMPORTANT_SLIDE_TYPES
+
+PERPLEXITY_BASE_URL = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai")
+IMAGE_GEN_MODEL = "sonar-pro"
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def image_cache_key(kind: str, value: str, model: str = "") -> str:
+    """Hex sha256 of an image URL ("url") or an illustration prompt ("prompt", per model)."""
+    payload = json.dumps([kind, model, value], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def illustration_prompt(slide_data: Dict[str, Any], industry: str) -> str:
+    return f"{slide_data.get('title')} for a {industry} startup pitch deck"
+
+
+class ImageFetcher:
+    """
+    Remote illustration acquisition over one pooled async HTTP client.
+
+    Use as `async with ImageFetcher(...) as fetcher:`; every request inside the
+    block shares the client's connection pool. Downloads are cached on disk by
+    URL hash and prompt hash, at most `max_concurrency` requests are in flight,
+    and every request is bounded by `timeout`. Connection errors, timeouts and
+    429/5xx responses are retried up to `retries` times with exponential
+    backoff. `base_url` and `transport` make the fetcher testable against a
+    local stub server.
+
+    Downloads python-pptx can't embed (e.g. WebP) are converted to PNG, and
+    unreadable ones (e.g. SVG) count as failures. The rest stay PNG, JPEG, GIF,
+    BMP or TIFF, so the cache stores them under a format-neutral `.img` name.
+    """
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: str = PERPLEXITY_BASE_URL,
+                 model: str = IMAGE_GEN_MODEL,
+                 cache_dir: Optional[str] = "images",
+                 cache_max_mb: Optional[int] = 200,
+                 max_concurrency: int = 4,
+                 timeout: float = 10.0,
+                 generation_timeout: float = 30.0,
+                 max_bytes: int = MAX_IMAGE_BYTES,
+                 retries: int = 2,
+                 retry_backoff: float = 0.5,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.api_key = api_key if api_key is not None else os.getenv("PERPLEXITY_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.cache = VisualCache(cache_dir, cache_max_mb * 1024 * 1024 if cache_max_mb else None,
+                                 extension=".img") if cache_dir else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.generation_timeout = httpx.Timeout(generation_timeout, connect=min(generation_timeout, 5.0))
+        self.max_bytes = max_bytes
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff
+        self.transport = transport
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0, "failures": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport,
+                                         follow_redirects=True)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    def _cached(self, key: str) -> Optional[bytes]:
+        data = self.cache.get_bytes(key) if self.cache else None
+        if data is not None:
+            self.stats["cache_hits"] += 1
+        return data
+
+    def _store(self, key: str, data: bytes):
+        if self.cache:
+            self.cache.put(key, data)
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+                    response = None
+            if response is not None and (last_attempt or response.status_code not in RETRY_STATUSES):
+                response.raise_for_status()
+                return response
+            # Back off outside the semaphore so other requests keep the slot busy
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def generate_image_url(self, prompt: str) -> Optional[str]:
+        """Ask the image model for an illustration of `prompt` and return its URL (if any)."""
+        try:
+            response = await self._request(
+                "POST", f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "stream": False,
+                    "messages": [
+                        {"role": "user", "content": f"Generate a realistic, clean, business-style illustration of: {prompt}"}
+                    ]
+                },
+                timeout=self.generation_timeout
+            )
+            # Adapt once Perplexity confirms the actual image key structure
+            return response.json()["choices"][0]["message"].get("image_url")
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"[Images] Generation failed for '{prompt[:60]}': {type(e).__name__} {e}")
+            return None
+
+    async def fetch_url(self, url: str) -> Optional[bytes]:
+        """Download an image (as a format PowerPoint embeds), from the disk cache when this URL was fetched before."""
+        key = image_cache_key("url", url)
+        data = self._cached(key)
+        if data is not None:
+            return data
+        try:
+            response = await self._request("GET", url)
+            content_type = response.headers.get("content-type", "")
+            if content_type and not content_type.startswith("image/"):
+                raise ValueError(f"not an image ({content_type})")
+            if len(response.content) > self.max_bytes:
+                raise ValueError(f"image too large ({len(response.content)} bytes)")
+            data = pptx_compatible_image(response.content)
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"[Images] Download failed for {url}: {type(e).__name__} {e}")
+            return None
+        self._store(key, data)
+        return data
+
+    async def fetch_prompt(self, prompt: str) -> Optional[bytes]:
+        """Illustration bytes for a prompt: prompt cache, then generate a URL and download it."""
+        key = image_cache_key("prompt", prompt, self.model)
+        data = self._cached(key)
+        if data is not None:
+            return data
+        url = await self.generate_image_url(prompt)
+        data = await self.fetch_url(url) if url else None
+        if data is not None:
+            self._store(key, data)
+        return data
+
+    async def prefetch(self, prompts: Dict[Any, str]) -> Dict[Any, bytes]:
+        """
+        Fetch illustrations for many prompts concurrently.
+
+        Args:
+            prompts: Mapping of caller keys (e.g. slide index) to prompts
+
+        Returns:
+            Mapping of the same keys to image bytes; failed prompts are omitted
+        """
+        keys = list(prompts)
+        results = await asyncio.gather(*(self.fetch_prompt(prompts[key]) for key in keys))
+        return {key: data for key, data in zip(keys, results) if data is not None}
+
+
+async def _run(fetcher_kwargs: Dict[str, Any], method: str, *args):
+    async with ImageFetcher(**fetcher_kwargs) as fetcher:
+        return await getattr(fetcher, method)(*args)
+
+
+def prefetch_slide_images(pitch_deck: Dict[str, Any],
+                          industry: str,
+                          slide_types: Optional[Iterable[str]] = None,
+                          **fetcher_kwargs) -> Dict[int, bytes]:
+    """
+    Fetch illustrations for the deck's key slides before export, concurrently.
+
+    Args:
+        pitch_deck: Generated pitch deck
+        industry: Startup industry, used in the illustration prompts
+        slide_types: Slide types that get an illustration (defaults to the important ones)
+        **fetcher_kwargs: ImageFetcher settings (base_url, cache_dir, max_concurrency, timeout, retries, ...)
+
+    Returns:
+        Mapping of slide index to image bytes, for save_as_powerpoint(illustrations=...)
+    """
+    slide_types = set(IMPORTANT_SLIDE_TYPES if slide_types is None else slide_types)
+    prompts = {
+        index: illustration_prompt(slide_data, industry)
+        for index, slide_data in enumerate(pitch_deck.get("slides", []))
+        if slide_data.get("type") in slide_types
+    }
+    if not prompts:
+        return {}
+    images = asyncio.run(_run(fetcher_kwargs, "prefetch", prompts))
+    print(f"[Images] {len(images)}/{len(prompts)} slide illustrations fetched")
+    return images
+
+
+def fetch_image(url: str, **fetcher_kwargs) -> Optional[bytes]:
+    """Synchronous single download (cached, with timeouts); prefer prefetch for many images."""
+    return asyncio.run(_run(fetcher_kwargs, "fetch_url", url))
+
+
+def generate_image_url(prompt: str, **fetcher_kwargs) -> Optional[str]:
+    """Synchronous single illustration request; returns the image URL (if any)."""
+    return asyncio.run(_run(fetcher_kwargs, "generate_image_url", prompt))
@@ -0,0 +1,93 @@
+﻿from typing import Optional, Tuple
+from io import BytesIO
+
+from PIL import Image
+
+# Formats python-pptx can embed (besides WMF, which PIL can't read)
+PPTX_IMAGE_FORMATS = {"PNG", "JPEG", "GIF", "BMP", "TIFF"}
+
+
+def box_pixels(width_in: float, height_in: float, ppi: int) -> Tuple[int, int]:
+    """Pixel size of a placement box in inches at the target pixels per inch."""
+    return int(round(width_in * ppi)), int(round(height_in * ppi))
+
+
+def render_dpi(figure_width_in: float, box_width_px: int) -> int:
+    """
+    DPI at which a figure of the given width renders to the box's pixel width.
+
+    Keeping the figure's design size (and so its font proportions) and lowering
+    the DPI yields an image that needs no downscaling in the slide.
+    """
+    return max(int(box_width_px / figure_width_in), 30)
+
+
+def fit_to_box(image: Image.Image, max_size: Tuple[int, int]) -> Image.Image:
+    """Downscale an image to fit within max_size, keeping its aspect ratio."""
+    if image.width <= max_size[0] and image.height <= max_size[1]:
+        return image
+    image = image.copy()
+    image.thumbnail(max_size, Image.LANCZOS)
+    return image
+
+
+def pptx_compatible_image(data: bytes) -> bytes:
+    """
+    Image bytes python-pptx can embed.
+
+    PNG, JPEG, GIF, BMP and TIFF pass through unchanged; anything else PIL
+    can read (WebP, AVIF with a plugin, ...) is converted to PNG.
+
+    Raises:
+        ValueError: If the bytes aren't an image PIL can read (e.g. SVG)
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        if image.format in PPTX_IMAGE_FORMATS:
+            return data
+        image.load()
+    except Exception as e:
+        raise ValueError(f"unreadable image: {e}") from e
+    if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buf = BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def optimize_png(data: bytes, max_size: Optional[Tuple[int, int]] = None, max_colors: int = 256) -> bytes:
+    """
+    Shrink a rendered PNG for embedding.
+
+    Fits it to max_size, drops an alpha channel that is fully opaque, and
+    quantizes to a palette, which suits flat chart colors. Returns the
+    original bytes if the result isn't smaller.
+
+    Args:
+        data: PNG bytes
+        max_size: Optional (width, height) in pixels to fit within
+        max_colors: Palette size; 0 disables quantization
+
+    Returns:
+        PNG bytes
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except Exception as e:
+        print(f"[ImageOpt] Could not read image: {e}")
+        return data
+
+    if image.mode in ("RGBA", "LA") and image.getchannel("A").getextrema()[0] == 255:
+        image = image.convert("RGB")
+    if max_size:
+        image = fit_to_box(image, max_size)
+    if max_colors and image.mode in ("RGB", "L"):
+        image = image.quantize(colors=max_colors, method=Image.Quantize.MEDIANCUT)
+    elif max_colors and image.mode == "RGBA":
+        image = image.quantize(colors=max_colors, method=Image.Quantize.FASTOCTREE)
+
+    buf = BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    optimized = buf.getvalue()
+    return optimized if len(optimized) < len(data) else data
@@ -0,0 +1,98 @@
+﻿from typing import Any, List, Optional
+import ast
+import json
+import re
+
+_FENCE_PATTERN = re.compile(r"```[a-zA-Z0-9_-]*")
+_TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Stop after this many opening brackets so pathological outputs stay linear-ish
+MAX_CANDIDATES = 32
+
+
+def _scan_fragment(text: str, start: int) -> str:
+    """
+    Walk forward from an opening bracket, tracking strings and nesting, and return
+    the balanced fragment. If the text ends first (a truncated completion), the
+    open string and brackets are closed so the fragment can still be parsed.
+    """
+    stack: List[str] = []
+    in_string = False
+    quote = ""
+    escaped = False
+    for idx in range(start, len(text)):
+        char = text[idx]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                in_string = False
+            continue
+        if char in "\"'":
+            in_string = True
+            quote = char
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                break
+            stack.pop()
+            if not stack:
+                return text[start:idx + 1]
+    fragment = text[start:].rstrip().rstrip(",")
+    if in_string:
+        fragment += quote
+    return fragment + "".join(reversed(stack))
+
+
+def _parse_fragment(fragment: str) -> Optional[Any]:
+    """Try strict JSON, then JSON without trailing commas, then a Python literal."""
+    repaired = _TRAILING_COMMA_PATTERN.sub(r"\1", fragment)
+    for candidate in (fragment, repaired):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+    try:
+        return ast.literal_eval(repaired)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def extract_json(text: str, expected_type: Optional[type] = None) -> Optional[Any]:
+    """
+    Extract the first JSON object or array from an LLM response.
+
+    Tolerates prose around the JSON, markdown code fences, trailing commas,
+    single-quoted Python-style literals and completions cut off mid-object.
+
+    Args:
+        text: The raw response text
+        expected_type: dict or list to only accept that kind of value
+
+    Returns:
+        The parsed value, or None if nothing usable was found
+    """
+    if not text:
+        return None
+    text = _FENCE_PATTERN.sub("", text)
+    openers = "{" if expected_type is dict else "[" if expected_type is list else "{["
+    decoder = json.JSONDecoder()
+
+    tried = 0
+    for idx, char in enumerate(text):
+        if char not in openers:
+            continue
+        tried += 1
+        if tried > MAX_CANDIDATES:
+            break
+        try:
+            value, _ = decoder.raw_decode(text, idx)
+        except ValueError:
+            value = _parse_fragment(_scan_fragment(text, idx))
+        if value is not None and (expected_type is None or isinstance(value, expected_type)):
+            return value
+    return None
@@ -0,0 +1,82 @@
+﻿from typing import Dict, List, Any
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+# Bucket upper bounds in milliseconds, roughly log-spaced from 0.25ms to 10s
+DEFAULT_BUCKETS_MS = [
+    0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000, 10000
+]
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram."""
+
+    def __init__(self, buckets_ms: List[float] = None):
+        self.buckets_ms = list(buckets_ms or DEFAULT_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # last bucket is overflow
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Record one observation given in seconds."""
+        ms = seconds * 1000
+        idx = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile in ms (upper bound of the bucket that contains it)."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = pct / 100 * self.count
+            seen = 0
+            for idx, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(self.buckets_ms[idx], self.max_ms) if idx < len(self.buckets_ms) else self.max_ms
+            return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, p50/p95/p99 and max in ms."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class LatencyRecorder:
+    """Named latency histograms, one per operation."""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram()
+            return self.histograms[name]
+
+    @contextmanager
+    def time(self, name: str):
+        """Time the enclosed block into the named histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: histogram.summary() for name, histogram in list(self.histograms.items())}
@@ -1,12 +1,18 @@
-import os, httpx, requests, random, difflib
+import os, time
+from io import BytesIO
+from typing import Dict, Optional, Tuple, Union
 from pptx import Presentation
 from pptx.util import Inches
 
+from config import PitchPilotConfig
+from utils.image_fetcher import IMAGE_GEN_MODEL, fetch_image, generate_image_url
+from utils.template_registry import TemplateRegistry, get_template_registry
+
 TEMPLATE_DIR = "templates"
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
-IMAGE_GEN_MODEL = "sonar-pro"
 
-IMPORTANT_SLIDE_TYPES = {"Problem", "Solution", "Product"}  # Slide types eligible for image generation
+# Vertical gap between visuals stacked in the visual box (config.visual_box_in), in inches
+VISUAL_GAP_IN = 0.2
 
 
 def generate_image_via_perplexity(prompt: str) -> str:
@@ -14,26 +20,7 @@ def generate_image_via_perplexity(prompt: str) -> str:
     Calls Perplexity API to generate an image based on the prompt.
     Returns the image URL (if available).
     """
-    try:
-        resp = httpx.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers={"Authorization": f"Bearer {PERPLEXITY_API_KEY}"},
-            json={
-                "model": IMAGE_GEN_MODEL,
-                "stream": False,
-                "messages": [
-                    {"role": "user", "content": f"Generate a realistic, clean, business-style illustration of: {prompt}"}
-                ]
-            },
-            timeout=30
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        # You'll need to adapt this once Perplexity confirms the actual image key structure
-        return data["choices"][0]["message"].get("image_url")  # Placeholder path
-    except Exception as e:
-        print(f"Perplexity API Error: {e}")
-        return None
+    return generate_image_url(prompt, api_key=PERPLEXITY_API_KEY, model=IMAGE_GEN_MODEL, cache_dir=None)
 
 
 def download_image(url: str, dest_folder="images", filename=None) -> str:
@@ -46,55 +33,58 @@ def download_image(url: str, dest_folder="images", filename=None) -> str:
         filename = f"img_{int(time.time())}.jpg"
     path = os.path.join(dest_folder, filename)
 
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        with open(path, "wb") as f:
-            f.write(response.content)
-        return path
-    except Exception as e:
-        print(f"Image download failed: {e}")
+    # Cached by URL and bounded by the fetcher's timeouts
+    data = fetch_image(url, cache_dir=dest_folder)
+    if data is None:
         return None
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
 
 
-def add_image_to_slide(slide, image_path, left=Inches(6), top=Inches(1.5), width=Inches(3)):
+def add_image_to_slide(slide, image: Union[str, bytes], left=Inches(6), top=Inches(1.5), width=Inches(3)):
     """
     Add image to the given slide.
+
+    `image` is a file path or in-memory image bytes. Returns the picture shape,
+    or None on failure.
     """
     try:
-        slide.shapes.add_picture(image_path, left, top, width=width)
+        source = BytesIO(image) if isinstance(image, (bytes, bytearray)) else image
+        return slide.shapes.add_picture(source, left, top, width=width)
     except Exception as e:
         print(f"Failed to add image to slide: {e}")
+        return None
 
 
 def save_as_powerpoint(pitch_deck: dict,
-                       output_filename: str = "pitch_deck.pptx",
-                       industry: str = "Generic") -> None:
-    # 1. Gather all templates
-    all_templates = [
-        os.path.join(TEMPLATE_DIR, f)
-        for f in os.listdir(TEMPLATE_DIR)
-        if f.lower().endswith(".pptx")
-    ]
-    if not all_templates:
-        raise RuntimeError(f"No .pptx templates found in {TEMPLATE_DIR!r}")
-
-    # 2. Match industry template
-    industry_lc = industry.lower()
-    direct_matches = [path for path in all_templates if industry_lc in os.path.basename(path).lower()]
-
-    if not direct_matches:
-        basenames = {os.path.splitext(os.path.basename(path))[0].lower(): path for path in all_templates}
-        closest = difflib.get_close_matches(industry_lc, basenames.keys(), n=1, cutoff=0.6)
-        if closest:
-            direct_matches = [basenames[closest[0]]]
-
-    # 3. Final fallback
-    chosen_template = random.choice(direct_matches if direct_matches else all_templates)
-    prs = Presentation(chosen_template)
+                       output_filename: Optional[str] = None,
+                       industry: str = "Generic",
+                       visual_box: Optional[Tuple[float, float, float, float]] = None,
+                       illustrations: Optional[Dict[int, bytes]] = None) -> bytes:
+    """
+    Build the pitch deck presentation in memory.
+
+    Args:
+        pitch_deck: Generated pitch deck (title, startup_info, slides)
+        output_filename: Optional path to also write the .pptx to
+        industry: Industry used to pick the template
+        visual_box: Visual placement in inches (left, top, width, height); defaults to
+            config.visual_box_in, the box the visuals were sized for
+        illustrations: Prefetched images by slide index (see utils.image_fetcher.prefetch_slide_images)
+
+    Returns:
+        The .pptx file contents
+    """
+    # 1-3. Pick a template for the industry from the cached index (name match,
+    # then closest name, then any) and start from an in-memory copy
+    visual_box = visual_box or PitchPilotConfig().visual_box_in
+    template = get_template_registry(TEMPLATE_DIR).choose(industry)
+    chosen_template = template["path"]
+    prs = TemplateRegistry.open(template)
 
     # 4. Title Slide
-    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide = prs.slides.add_slide(prs.slide_layouts[template["title_layout"]])
     slide.shapes.title.text = pitch_deck.get("title", "Pitch Deck")
 
     startup_name = pitch_deck.get('startup_info', {}).get('name', 'Unknown Startup')
@@ -103,7 +93,7 @@ def save_as_powerpoint(pitch_deck: dict,
 
     # 5. Content Slides
     for i, slide_data in enumerate(pitch_deck.get("slides", [])):
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide = prs.slides.add_slide(prs.slide_layouts[template["content_layout"]])
         slide.shapes.title.text = slide_data.get("title", "Untitled Slide")
 
         # Content bullets
@@ -115,19 +105,17 @@ def save_as_powerpoint(pitch_deck: dict,
                 p.text = bullet
                 p.level = 0
 
-        # # Image generation for key slides
-        # if slide_data.get("type") in IMPORTANT_SLIDE_TYPES:
-        #     prompt = f"{slide_data.get('title')} for a {industry} startup pitch deck"
-        #     print(f"Generating image for slide '{slide_data['title']}' using Perplexity: {prompt}")
-        #     image_url = generate_image_via_perplexity(prompt)
-        #     if image_url:
-        #         image_path = download_image(image_url, filename=f"slide_{i}.jpg")
-        #         if image_path:
-        #             add_image_to_slide(slide, image_path)
-        # Add generated visuals directly into slide
-        if slide_data.get("generated_visuals"):
-            for img_path in slide_data["generated_visuals"]:
-                add_image_to_slide(slide, img_path)
+        # Prefetched illustration (key slides) and generated visuals (bytes or paths),
+        # stacked in the visual box
+        images = ([illustrations[i]] if illustrations and i in illustrations else []) \
+            + list(slide_data.get("generated_visuals") or [])
+        if images:
+            left, top, width, _ = visual_box
+            next_top = Inches(top)
+            for image in images:
+                picture = add_image_to_slide(slide, image, Inches(left), next_top, Inches(width))
+                if picture is not None:
+                    next_top += picture.height + Inches(VISUAL_GAP_IN)
 
         # Notes with visuals (optional)
         visuals = slide_data.get("visual_elements", [])
@@ -142,5 +130,14 @@ def save_as_powerpoint(pitch_deck: dict,
             except (AttributeError, TypeError):
                 print(f"Warning: Could not add visuals to notes for slide '{slide_data.get('title', 'Untitled')}'")
 
-    prs.save(output_filename)
-    print(f"\n✅ Saved {output_filename} using template '{os.path.basename(chosen_template)}'")
+    # 6. Serialize once; the same bytes serve downloads and the optional file
+    buffer = BytesIO()
+    prs.save(buffer)
+    data = buffer.getvalue()
+    if output_filename:
+        with open(output_filename, "wb") as f:
+            f.write(data)
+        print(f"\n✅ Saved {output_filename} using template '{os.path.basename(chosen_template)}'")
+    else:
+        print(f"\n✅ Built pitch deck ({len(data) / 1024:.1f} KB) using template '{os.path.basename(chosen_template)}'")
+    return data
@@ -0,0 +1,128 @@
+﻿from typing import Any, Dict, List, Optional, Union
+import base64
+import html
+
+ImageSource = Union[str, bytes]
+
+PREVIEW_CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; background: #f3f4f6; margin: 0; padding: 16px; }
+.deck-title { text-align: center; color: #1f2937; margin: 0 0 16px; }
+.slide { background: #fff; border-radius: 8px; box-shadow: 0 1px 4px rgba(0,0,0,.15); aspect-ratio: 16 / 9;
+         max-width: 960px; margin: 0 auto 20px; padding: 28px 36px; box-sizing: border-box; display: flex;
+         flex-direction: column; overflow: hidden; }
+.slide h2 { margin: 0 0 4px; color: #1f2937; }
+.slide .meta { color: #9ca3af; font-size: 12px; margin-bottom: 12px; }
+.slide .body { display: flex; gap: 24px; flex: 1; min-height: 0; }
+.slide ul { flex: 3; margin: 0; padding-left: 20px; color: #374151; font-size: 16px; line-height: 1.5; }
+.slide .visuals { flex: 2; display: flex; flex-direction: column; gap: 8px; min-height: 0; }
+.slide .visuals img { max-width: 100%; max-height: 100%; object-fit: contain; min-height: 0; }
+.slide .notes { color: #6b7280; font-size: 12px; margin-top: 8px; }
+"""
+
+
+def _image_mime(data: bytes) -> str:
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"BM"):
+        return "image/bmp"
+    if data.startswith((b"II*\x00", b"MM\x00*")):
+        return "image/tiff"
+    return "image/png"
+
+
+def image_data_uri(image: ImageSource) -> Optional[str]:
+    """Inline `data:` URI for image bytes or an image file path; None if the file is unreadable."""
+    if not isinstance(image, (bytes, bytearray)):
+        try:
+            with open(image, "rb") as f:
+                image = f.read()
+        except OSError:
+            return None
+    return f"data:{_image_mime(image)};base64,{base64.b64encode(image).decode('ascii')}"
+
+
+def _slide_images(slide: Dict[str, Any], index: int, illustrations: Optional[Dict[int, bytes]]) -> List[str]:
+    # Same order the exporter stacks them in: illustration first, then generated visuals
+    images = ([illustrations[index]] if illustrations and index in illustrations else []) \
+        + list(slide.get("generated_visuals") or [])
+    return [uri for uri in map(image_data_uri, images) if uri]
+
+
+def render_html(pitch_deck: Dict[str, Any], illustrations: Optional[Dict[int, bytes]] = None) -> str:
+    """
+    Render the deck as one self-contained HTML page (inline CSS, base64 images).
+
+    Args:
+        pitch_deck: Generated pitch deck (title, startup_info, slides)
+        illustrations: Prefetched images by slide index, as passed to save_as_powerpoint
+
+    Returns:
+        HTML document
+    """
+    title = html.escape(pitch_deck.get("title", "Pitch Deck"))
+    info = pitch_deck.get("startup_info", {})
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{title}</title><style>{PREVIEW_CSS}</style></head><body>",
+        f"<h1 class=\"deck-title\">{title}</h1>",
+    ]
+    subtitle = " · ".join(html.escape(str(info[key])) for key in ("name", "industry") if info.get(key))
+    if subtitle:
+        parts.append(f"<p class=\"deck-title\">{subtitle}</p>")
+
+    for i, slide in enumerate(pitch_deck.get("slides", [])):
+        parts.append("<section class=\"slide\">")
+        parts.append(f"<h2>{html.escape(slide.get('title', 'Untitled Slide'))}</h2>")
+        parts.append(f"<div class=\"meta\">Slide {i + 1}"
+                     + (f" · {html.escape(slide['type'])}" if slide.get("type") else "") + "</div>")
+        parts.append("<div class=\"body\"><ul>")
+        parts.extend(f"<li>{html.escape(str(bullet))}</li>" for bullet in slide.get("content", []))
+        parts.append("</ul>")
+        images = _slide_images(slide, i, illustrations)
+        if images:
+            parts.append("<div class=\"visuals\">")
+            parts.extend(f"<img src=\"{uri}\" alt=\"Slide {i + 1} visual\">" for uri in images)
+            parts.append("</div>")
+        parts.append("</div>")
+        if slide.get("visual_elements"):
+            visuals = "; ".join(html.escape(str(visual)) for visual in slide["visual_elements"])
+            parts.append(f"<div class=\"notes\">Suggested visuals: {visuals}</div>")
+        parts.append("</section>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def render_markdown(pitch_deck: Dict[str, Any], illustrations: Optional[Dict[int, bytes]] = None,
+                    embed_images: bool = True) -> str:
+    """
+    Render the deck as Markdown, one `##` section per slide.
+
+    Args:
+        pitch_deck: Generated pitch deck (title, startup_info, slides)
+        illustrations: Prefetched images by slide index
+        embed_images: Inline images as base64 data URIs (otherwise they are left out)
+
+    Returns:
+        Markdown text
+    """
+    lines = [f"# {pitch_deck.get('title', 'Pitch Deck')}", ""]
+    info = pitch_deck.get("startup_info", {})
+    subtitle = " · ".join(str(info[key]) for key in ("name", "industry") if info.get(key))
+    if subtitle:
+        lines += [f"*{subtitle}*", ""]
+
+    for i, slide in enumerate(pitch_deck.get("slides", [])):
+        lines += [f"## {i + 1}. {slide.get('title', 'Untitled Slide')}", ""]
+        lines += [f"- {bullet}" for bullet in slide.get("content", [])]
+        lines.append("")
+        if embed_images:
+            for uri in _slide_images(slide, i, illustrations):
+                lines += [f"![Slide {i + 1} visual]({uri})", ""]
+        if slide.get("visual_elements"):
+            lines += ["> Suggested visuals: " + "; ".join(str(v) for v in slide["visual_elements"]), ""]
+    return "\n".join(lines)
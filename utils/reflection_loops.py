@@ -1,103 +1,268 @@
-﻿from typing import Dict, Any
+﻿from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import threading
 from langchain.llms.base import BaseLLM
 
+from prompts.prompt_assembly import PromptTemplate, build_system_prompt
+from utils.json_extraction import extract_json
+from utils.token_counting import count_tokens
+from utils.token_accounting import submit_in_context
+
+SECTION_SCORES_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {
+        "type": "object",
+        "properties": {
+            "score": {"type": "number", "minimum": 0, "maximum": 1},
+            "suggestions": {"type": "string"}
+        },
+        "required": ["score", "suggestions"]
+    }
+}
+
+SECTION_CONTENT_SCHEMA = {"type": "array", "items": {"type": "string"}, "minItems": 1}
+
+SECTION_SCORING_PROMPT = PromptTemplate("""
+Evaluate each section of this pitch deck for quality, clarity, and persuasiveness.
+
+Sections (JSON, section name -> bullet points):
+{sections}
+
+Respond with only a JSON object matching this JSON schema, with one key per section name:
+{schema}
+
+"score" is from 0.0 to 1.0, where 1.0 is excellent. "suggestions" lists one or two
+specific improvements, or is "" if none are needed.
+""")
+
+SECTION_IMPROVEMENT_PROMPT = PromptTemplate("""
+Improve the "{section}" section of a pitch deck based on these suggestions:
+{suggestions}
+
+Current bullet points (JSON):
+{content}
+
+Keep the same style: concise, data-driven bullet points.
+Respond with only a JSON array matching this JSON schema:
+{schema}
+""")
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _section_hash(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+SECTION_SCORES_SCHEMA_JSON = _compact_json(SECTION_SCORES_SCHEMA)
+SECTION_CONTENT_SCHEMA_JSON = _compact_json(SECTION_CONTENT_SCHEMA)
+
+
 class ReflectionSystem:
-    """System for reflection loops to improve content."""
+    """
+    System for reflection loops to improve content.
+
+    Reflection works per section: every iteration scores all open sections in one
+    call, then rewrites only the sections below the threshold, in parallel. A
+    section is closed as soon as another pass can't help: it scores above the
+    threshold, its score can't be parsed, the rewrite can't be parsed or doesn't
+    change it, or the rewrite scores no better than the previous version (which
+    is then kept). The last rewrite is scored too, so every returned section is
+    the best-scoring version seen and its reported score describes it.
+    """
     
-    def __init__(self, llm: BaseLLM, threshold: float = 0.7):
+    def __init__(self, llm: BaseLLM, threshold: float = 0.7, max_iterations: int = 3, max_workers: int = 4):
         self.llm = llm
         self.threshold = threshold
+        self.max_iterations = max_iterations
+        self.max_workers = max_workers
+
+        # One entry per improve_content call: sections, final scores and per-iteration records
+        self.telemetry: List[Dict[str, Any]] = []
+        self._telemetry_lock = threading.Lock()
     
-    def improve_content(self, content: Dict[str, Any]) -> Dict[str, Any]:
+    def improve_content(self, content: Dict[str, Any], startup_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Improve content through reflection loops.
         
         Args:
-            content: The content to improve
+            content: The content to improve, section name -> section content
+            startup_info: If given, its shared system block is sent with every call
             
         Returns:
             Improved content
         """
-        max_iterations = 3
-        current_content = content
+        # Built locally so concurrent calls (one per streamed section) don't interleave
+        iterations: List[Dict[str, Any]] = []
+        system = build_system_prompt(startup_info) if startup_info else None
+        current_content = dict(content)
+        open_sections = [name for name, value in current_content.items() if value]
+        section_hashes = {name: _section_hash(current_content[name]) for name in open_sections}
+        # Best version seen so far per section, with its score
+        best_versions: Dict[str, Any] = {}
+        best_scores: Dict[str, float] = {}
         
-        for i in range(max_iterations):
-            # Generate reflections on the current content
-            reflections = self._generate_reflections(current_content)
+        # max_iterations rewrites, plus a final scoring pass for the last of them
+        for i in range(self.max_iterations + 1):
+            if not open_sections:
+                break
+            record = {
+                "iteration": i + 1,
+                "scores": {},
+                "parse_failures": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "improved": [],
+                "closed": {}
+            }
+            iterations.append(record)
+
+            # Score every open section in a single call
+            reflections = self._generate_reflections(
+                {name: current_content[name] for name in open_sections},
+                record,
+                system
+            )
             
-            # Check if we've reached the quality threshold
-            if reflections["quality_score"] >= self.threshold:
+            weak_sections = []
+            for name in open_sections:
+                reflection = reflections.get(name)
+                if reflection is None:
+                    # Don't return an unscored rewrite over a scored version
+                    if name in best_versions:
+                        current_content[name] = best_versions[name]
+                    record["closed"][name] = "unscored"
+                    continue
+                score = reflection["quality_score"]
+                record["scores"][name] = score
+                if name in best_scores and score <= best_scores[name]:
+                    # The last rewrite didn't help; keep the better earlier version
+                    current_content[name] = best_versions[name]
+                    record["closed"][name] = "no_gain"
+                    continue
+                best_versions[name] = current_content[name]
+                best_scores[name] = score
+                if score >= self.threshold:
+                    record["closed"][name] = "passed"
+                elif i == self.max_iterations:
+                    record["closed"][name] = "max_iterations"
+                else:
+                    weak_sections.append(name)
+            if not weak_sections:
                 break
             
-            # Apply improvements based on reflections
-            current_content = self._apply_improvements(current_content, reflections)
+            # Rewrite the weak sections in parallel
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(weak_sections))) as executor:
+                futures = [
+                    submit_in_context(
+                        executor, self._apply_improvements, name, current_content[name], reflections[name], record, system
+                    )
+                    for name in weak_sections
+                ]
+                improved = [future.result() for future in futures]
+
+            # Only sections that actually changed are worth scoring again
+            open_sections = []
+            for name, new_value in zip(weak_sections, improved):
+                new_hash = _section_hash(new_value) if new_value is not None else section_hashes[name]
+                if new_hash == section_hashes[name]:
+                    record["closed"][name] = "unchanged"
+                    continue
+                current_content[name] = new_value
+                section_hashes[name] = new_hash
+                record["improved"].append(name)
+                open_sections.append(name)
         
+        with self._telemetry_lock:
+            self.telemetry.append({
+                "sections": list(content),
+                "scores": best_scores,
+                "iterations": iterations
+            })
         return current_content
     
-    def _generate_reflections(self, content: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate reflections on content."""
-        # This is a simplified implementation
-        # In a real system, this would use the LLM to evaluate the content
-        reflection_prompt = f"""
-        Please evaluate the following pitch deck content for quality, clarity, and persuasiveness:
-        
-        {json.dumps(content, indent=2)}
-        
-        Provide a score from 0.0 to 1.0, where 1.0 is excellent.
-        Also provide specific suggestions for improvement.
+    def _generate(self, prompt: str, record: Dict[str, Any], profile: str, system: Optional[str] = None) -> str:
+        """Call the LLM and account the tokens spent in the iteration record."""
+        response = self.llm.generate([prompt], profile=profile, system=system)
+        text = response.generations[0][0].text
+        prompt_tokens = count_tokens((system or "") + prompt)
+        completion_tokens = count_tokens(text)
+        with self._telemetry_lock:
+            record["prompt_tokens"] += prompt_tokens
+            record["completion_tokens"] += completion_tokens
+        return text
+
+    def _generate_reflections(
+        self,
+        sections: Dict[str, Any],
+        record: Dict[str, Any],
+        system: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
+        Score each section and collect suggestions, in one LLM call.
+
+        Returns:
+            Section name -> {"quality_score", "suggestions"} for every section whose
+            score could be parsed; sections without a usable score are left out
+        """
+        reflection_prompt = SECTION_SCORING_PROMPT.render(
+            sections=_compact_json(sections),
+            schema=SECTION_SCORES_SCHEMA_JSON
+        )
+        reflection_text = self._generate(reflection_prompt, record, "reflection_score", system)
         
-        reflection_response = self.llm.generate([reflection_prompt])
-        reflection_text = reflection_response.generations[0][0].text
-        
-        # Parse the reflection response
-        lines = reflection_text.split("\n")
-        quality_score = 0.7  # Default value
+        parsed = extract_json(reflection_text, expected_type=dict)
+        if parsed is None:
+            record["parse_failures"] += 1
+            return {}
         
-        for line in lines:
-            if "Score:" in line:
-                try:
-                    quality_score = float(line.split("Score:")[1].strip())
-                except:
-                    pass
+        reflections = {}
+        for name in sections:
+            entry = parsed.get(name)
+            try:
+                quality_score = float(entry["score"] if isinstance(entry, dict) else entry)
+            except (KeyError, TypeError, ValueError):
+                record["parse_failures"] += 1
+                continue
+            suggestions = entry.get("suggestions") if isinstance(entry, dict) else ""
+            if isinstance(suggestions, list):
+                suggestions = "\n".join(str(item) for item in suggestions)
+            reflections[name] = {
+                "quality_score": min(max(quality_score, 0.0), 1.0),
+                "suggestions": str(suggestions or "")
+            }
         
-        return {
-            "quality_score": quality_score,
-            "suggestions": reflection_text
-        }
+        return reflections
     
     def _apply_improvements(
         self, 
-        content: Dict[str, Any], 
-        reflections: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Apply improvements based on reflections."""
-        # This is a simplified implementation
-        improvement_prompt = f"""
-        Please improve the following pitch deck content based on these suggestions:
-        
-        Content:
-        {json.dumps(content, indent=2)}
-        
-        Suggestions:
-        {reflections["suggestions"]}
-        
-        Provide the improved content in the same format.
+        section: str,
+        section_content: Any,
+        reflection: Dict[str, Any],
+        record: Dict[str, Any],
+        system: Optional[str] = None
+    ) -> Optional[List[str]]:
         """
+        Rewrite one section based on its reflection, sending only that section.
+
+        Returns:
+            The improved bullet points, or None if the response couldn't be parsed
+        """
+        improvement_prompt = SECTION_IMPROVEMENT_PROMPT.render(
+            section=section,
+            suggestions=reflection["suggestions"] or "Make it more specific and persuasive.",
+            content=_compact_json(section_content),
+            schema=SECTION_CONTENT_SCHEMA_JSON
+        )
+        improvement_text = self._generate(improvement_prompt, record, "reflection_improve", system)
         
-        improvement_response = self.llm.generate([improvement_prompt])
-        improvement_text = improvement_response.generations[0][0].text
-        
-        # Try to parse the improved content
-        try:
-            # Extract JSON from the response
-            start_idx = improvement_text.find("{")
-            end_idx = improvement_text.rfind("}") + 1
-            json_str = improvement_text[start_idx:end_idx]
-            
-            improved_content = json.loads(json_str)
-            return improved_content
-        except:
-            # If parsing fails, return the original content
-            return content
+        improved_content = extract_json(improvement_text, expected_type=list)
+        if not improved_content:
+            with self._telemetry_lock:
+                record["parse_failures"] += 1
+            return None
+        return [str(item) for item in improved_content]
@@ -0,0 +1,220 @@
+﻿from typing import Dict, List, Optional
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; workers then run without a memory cap
+    resource = None
+
+# One warm pool per (workers, timeout, memory limit, dpi) per process
+_pools: Dict[tuple, "RenderPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class RenderError(Exception):
+    """Raised when generated plotting code fails in its worker."""
+
+
+class RenderTimeout(RenderError):
+    """Raised when a render job exceeds its wall-clock limit; the worker is replaced."""
+
+
+def _apply_memory_limit(memory_limit_mb: Optional[int]):
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(conn, memory_limit_mb: Optional[int], dpi: int):
+    """Worker loop: import matplotlib once, then render jobs until told to stop."""
+    import io
+    import matplotlib
+    matplotlib.use("Agg")  # Non-GUI backend
+    import matplotlib.pyplot as plt
+
+    _apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            code = conn.recv()
+        except (EOFError, OSError):
+            break
+        if code is None:
+            break
+        try:
+            plt.figure()
+            exec(code, {"plt": plt}, {})
+            buf = io.BytesIO()
+            plt.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+            conn.send(("ok", buf.getvalue()))
+        except BaseException as e:  # Includes MemoryError and SystemExit from generated code
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        finally:
+            plt.close("all")
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb: Optional[int], dpi: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit_mb, dpi),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class RenderPool:
+    """
+    Pool of warm worker processes that execute generated matplotlib code.
+
+    Each job runs in its own process with matplotlib already imported, an
+    address-space limit and a wall-clock timeout. A worker that times out or
+    dies is killed and replaced, so a runaway script costs one job rather than
+    the whole deck. `render` is thread-safe; up to `workers` jobs run at once.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 20.0,
+        memory_limit_mb: Optional[int] = 1024,
+        dpi: int = 100
+    ):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.dpi = dpi
+        # spawn, not fork: the parent runs LLM and Qdrant client threads
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"rendered": 0, "errors": 0, "timeouts": 0, "replaced": 0}
+        for _ in range(max(1, workers)):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.memory_limit_mb, self.dpi)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+            self.stats["replaced"] += 1
+        return self._spawn()
+
+    def render(self, code: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Run plotting code in a worker and return the current figure as PNG bytes.
+
+        Args:
+            code: Python code using `plt`; it should draw but not save the figure
+            timeout: Wall-clock limit in seconds (defaults to the pool's)
+
+        Returns:
+            PNG image bytes
+
+        Raises:
+            RenderTimeout: If the job ran past the timeout
+            RenderError: If the code raised, or the worker died
+        """
+        if self._closed:
+            raise RenderError("Render pool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        try:
+            if not worker.process.is_alive():
+                # Died while idle; replace it before handing it the job
+                worker = self._replace(worker)
+            start = time.perf_counter()
+            try:
+                worker.conn.send(code)
+            except (BrokenPipeError, OSError):
+                self._count("errors")
+                worker = self._replace(worker)
+                raise RenderError("Render worker died")
+            if not worker.conn.poll(timeout):
+                self._count("timeouts")
+                worker = self._replace(worker)
+                raise RenderTimeout(f"Render exceeded {timeout:.0f}s")
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # Killed by the OS, e.g. for exceeding the memory limit in native code
+                self._count("errors")
+                worker = self._replace(worker)
+                raise RenderError("Render worker died")
+            if status != "ok":
+                self._count("errors")
+                raise RenderError(payload)
+            self._count("rendered")
+            print(f"[RenderPool] Rendered {len(payload)} bytes in {time.perf_counter() - start:.2f}s")
+            return payload
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        """Stop all workers."""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_render_pool(
+    workers: int = 2,
+    timeout: float = 20.0,
+    memory_limit_mb: Optional[int] = 1024,
+    dpi: int = 100
+) -> RenderPool:
+    """Shared warm pool for these settings, started on first use and stopped at exit."""
+    key = (workers, timeout, memory_limit_mb, dpi)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = RenderPool(workers=workers, timeout=timeout, memory_limit_mb=memory_limit_mb, dpi=dpi)
+        return _pools[key]
+
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,70 @@
+﻿from typing import Dict, List, Tuple
+
+
+def section_key(heading: str) -> str:
+    """Normalise a "# Heading" title into a pitch content key, e.g. "Market Size" -> "market_size"."""
+    return heading.lower().replace(" ", "_")
+
+
+class SectionStreamParser:
+    """
+    Incremental parser for "# Section" formatted text.
+
+    Feed it chunks of a streamed completion; each section is returned as soon as the
+    next heading shows it is complete. Lines before the first heading go to
+    "overview". Sections without any content lines (such as an empty implicit
+    "overview") are never returned. After close(), `content` holds the same
+    structure the batch parser produced.
+    """
+
+    def __init__(self):
+        self.content: Dict[str, List[str]] = {"overview": []}
+        self._current = "overview"
+        self._partial_line = ""
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, List[str]]]:
+        """
+        Consume a chunk of text.
+
+        Returns:
+            (section key, lines) for every section completed by this chunk
+        """
+        completed = []
+        lines = (self._partial_line + chunk).split("\n")
+        self._partial_line = lines.pop()
+        for line in lines:
+            finished = self._consume_line(line)
+            if finished is not None:
+                completed.append(finished)
+        return completed
+
+    def close(self) -> List[Tuple[str, List[str]]]:
+        """
+        Flush the last partial line and the final section.
+
+        Returns:
+            (section key, lines) for the sections completed by the end of the stream
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        completed = []
+        if self._partial_line:
+            finished = self._consume_line(self._partial_line)
+            self._partial_line = ""
+            if finished is not None:
+                completed.append(finished)
+        if self.content[self._current]:
+            completed.append((self._current, self.content[self._current]))
+        return completed
+
+    def _consume_line(self, line: str):
+        if line.startswith("# "):
+            finished = (self._current, self.content[self._current]) if self.content[self._current] else None
+            self._current = section_key(line[2:])
+            self.content[self._current] = []
+            return finished
+        if line.strip():
+            self.content[self._current].append(line)
+        return None
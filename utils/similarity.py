@@ -0,0 +1,63 @@
+﻿from typing import List, Sequence
+
+import numpy as np
+
+
+def cosine_similarities(query: Sequence[float], vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Cosine similarity between one query vector and each row of a matrix.
+
+    Args:
+        query: Query vector
+        vectors: Candidate vectors
+
+    Returns:
+        Array of similarities, one per candidate
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    query_vec = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec)
+    norms[norms == 0] = 1.0
+    return (matrix @ query_vec) / norms
+
+
+def maximal_marginal_relevance(
+    query: Sequence[float],
+    vectors: Sequence[Sequence[float]],
+    k: int = 5,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Select k candidates that are relevant to the query but not redundant with each other.
+
+    Args:
+        query: Query vector
+        vectors: Candidate vectors
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+
+    Returns:
+        Indices of the selected candidates in selection order
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.size == 0 or k <= 0:
+        return []
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    relevance = cosine_similarities(query, matrix)
+    pairwise = matrix @ matrix.T
+
+    selected = [int(relevance.argmax())]
+    # Highest similarity of every candidate to anything already selected
+    redundancy = pairwise[selected[0]].copy()
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(scores.argmax())
+        selected.append(best)
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
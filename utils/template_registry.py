@@ -0,0 +1,145 @@
+import os, random, difflib, threading
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+TITLE_TYPES = {PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE}
+BODY_TYPES = {PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT}
+
+# One registry per template directory per process
+_registries: Dict[str, "TemplateRegistry"] = {}
+_registries_lock = threading.Lock()
+
+
+def describe_layouts(prs) -> List[Dict[str, Any]]:
+    """Layout metadata: index, name and which placeholders each layout has."""
+    layouts = []
+    for index, layout in enumerate(prs.slide_layouts):
+        types = [placeholder.placeholder_format.type for placeholder in layout.placeholders]
+        layouts.append({
+            "index": index,
+            "name": layout.name,
+            "has_title": any(t in TITLE_TYPES for t in types),
+            "has_subtitle": PP_PLACEHOLDER.SUBTITLE in types,
+            "body_count": sum(t in BODY_TYPES for t in types),
+        })
+    return layouts
+
+
+def _pick_layout(layouts: List[Dict[str, Any]], wanted, default: int) -> int:
+    for layout in layouts:
+        if wanted(layout):
+            return layout["index"]
+    return default if default < len(layouts) else 0
+
+
+class TemplateRegistry:
+    """
+    Index of the .pptx templates in a directory.
+
+    Each template is read and parsed once: the registry keeps its raw bytes in
+    memory together with layout metadata (which layouts to use for title and
+    content slides). Industry lookups are memoized. The directory is re-checked
+    on every lookup, which costs one scandir, and only added or changed files
+    are parsed again.
+    """
+
+    def __init__(self, template_dir: str = "templates"):
+        self.template_dir = template_dir
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self._signature: Optional[Tuple] = None
+        self._matches: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        if not os.path.isdir(self.template_dir):
+            return {}
+        return {
+            entry.name: (entry.stat().st_mtime, entry.stat().st_size)
+            for entry in os.scandir(self.template_dir)
+            if entry.is_file() and entry.name.lower().endswith(".pptx")
+        }
+
+    def refresh(self) -> bool:
+        """Re-index the directory if any template was added, removed or changed. Returns True if it did."""
+        files = self._scan()
+        signature = tuple(sorted(files.items()))
+        with self._lock:
+            if signature == self._signature:
+                return False
+            templates = {}
+            for name, (mtime, size) in files.items():
+                cached = self.templates.get(name)
+                if cached and (cached["mtime"], cached["size"]) == (mtime, size):
+                    templates[name] = cached
+                    continue
+                try:
+                    templates[name] = self._load(name, mtime, size)
+                except Exception as e:
+                    print(f"[Templates] Skipping unreadable template {name}: {e}")
+            self.templates = templates
+            self._signature = signature
+            self._matches = {}
+        return True
+
+    def _load(self, name: str, mtime: float, size: int) -> Dict[str, Any]:
+        path = os.path.join(self.template_dir, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        prs = Presentation(BytesIO(data))
+        layouts = describe_layouts(prs)
+        return {
+            "name": name,
+            "path": path,
+            "mtime": mtime,
+            "size": size,
+            "data": data,
+            "layouts": layouts,
+            "title_layout": _pick_layout(layouts, lambda l: l["has_title"] and l["has_subtitle"], 0),
+            "content_layout": _pick_layout(layouts, lambda l: l["has_title"] and l["body_count"] == 1, 1),
+            "slide_width": prs.slide_width,
+            "slide_height": prs.slide_height,
+        }
+
+    def candidates(self, industry: str) -> List[Dict[str, Any]]:
+        """Templates matching an industry by file name, else the closest name, else all."""
+        self.refresh()
+        industry_lc = industry.lower()
+        with self._lock:
+            if industry_lc in self._matches:
+                return self._matches[industry_lc]
+            templates = list(self.templates.values())
+
+        matches = [t for t in templates if industry_lc in t["name"].lower()]
+        if not matches:
+            basenames = {os.path.splitext(t["name"])[0].lower(): t for t in templates}
+            closest = difflib.get_close_matches(industry_lc, basenames.keys(), n=1, cutoff=0.6)
+            if closest:
+                matches = [basenames[closest[0]]]
+        matches = matches or templates
+
+        with self._lock:
+            self._matches[industry_lc] = matches
+        return matches
+
+    def choose(self, industry: str) -> Dict[str, Any]:
+        """Pick a template for an industry (randomly among equal matches)."""
+        candidates = self.candidates(industry)
+        if not candidates:
+            raise RuntimeError(f"No .pptx templates found in {self.template_dir!r}")
+        return random.choice(candidates)
+
+    @staticmethod
+    def open(template: Dict[str, Any]):
+        """A fresh Presentation from the template's in-memory bytes."""
+        return Presentation(BytesIO(template["data"]))
+
+
+def get_template_registry(template_dir: str = "templates") -> TemplateRegistry:
+    """Shared registry for a template directory."""
+    key = os.path.abspath(template_dir)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = TemplateRegistry(template_dir)
+        return _registries[key]
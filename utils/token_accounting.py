@@ -0,0 +1,143 @@
+﻿from typing import Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+import contextvars
+import threading
+
+# Ledger and pipeline stage of the deck currently being generated. Context
+# variables keep concurrent decks apart; use submit_in_context to carry them
+# into thread pools.
+_current_ledger: contextvars.ContextVar = contextvars.ContextVar("pitchpilot_token_ledger", default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("pitchpilot_stage", default="unstaged")
+
+# Generation profiles that belong to the same agent
+PROFILE_AGENTS = {
+    "reflection_score": "reflection",
+    "reflection_improve": "reflection",
+}
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised when a deck has used up its token budget before a required stage."""
+
+    def __init__(self, message: str, usage: Dict[str, Any] = None):
+        super().__init__(message)
+        self.usage = usage or {}
+
+
+def get_current_ledger() -> Optional["TokenLedger"]:
+    return _current_ledger.get()
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that runs fn with the caller's ledger and stage."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _empty_usage() -> Dict[str, int]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "total_tokens": 0}
+
+
+def _snapshot(usage: Dict[str, int]) -> Dict[str, Any]:
+    """Copy of a usage bucket with the share of prompt tokens served from the provider's prefix cache."""
+    snapshot = dict(usage)
+    snapshot["cached_ratio"] = round(usage["cached_tokens"] / usage["prompt_tokens"], 4) if usage["prompt_tokens"] else 0.0
+    return snapshot
+
+
+class TokenLedger:
+    """
+    Token usage of one deck, aggregated per agent and per pipeline stage.
+
+    The LLM wrapper records every call into the ledger that is active in the
+    calling context (see `active`).
+    """
+
+    def __init__(self, budget: Optional[int] = None, costs_per_million: Dict[str, Tuple[float, float]] = None):
+        self.budget = budget
+        self.costs_per_million = costs_per_million or {}
+        self.total = _empty_usage()
+        self.by_agent: Dict[str, Dict[str, int]] = {}
+        self.by_stage: Dict[str, Dict[str, int]] = {}
+        self.by_model: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def active(self):
+        """Make this the ledger LLM calls in the current context record into."""
+        token = _current_ledger.set(self)
+        try:
+            yield self
+        finally:
+            _current_ledger.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Attribute LLM calls in the current context to a pipeline stage."""
+        token = _current_stage.set(name)
+        try:
+            yield
+        finally:
+            _current_stage.reset(token)
+
+    def record(
+        self,
+        model: str,
+        profile: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0
+    ):
+        """Add one LLM call's usage."""
+        agent = PROFILE_AGENTS.get(profile, profile or "default")
+        stage = _current_stage.get()
+        with self._lock:
+            for usage in (
+                self.total,
+                self.by_agent.setdefault(agent, _empty_usage()),
+                self.by_stage.setdefault(stage, _empty_usage()),
+                self.by_model.setdefault(model, _empty_usage()),
+            ):
+                usage["calls"] += 1
+                usage["prompt_tokens"] += prompt_tokens
+                usage["completion_tokens"] += completion_tokens
+                usage["cached_tokens"] += cached_tokens
+                usage["total_tokens"] += prompt_tokens + completion_tokens
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """Tokens left in the budget, or None without a budget."""
+        if self.budget is None:
+            return None
+        return max(self.budget - self.total["total_tokens"], 0)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.budget is not None and self.total["total_tokens"] >= self.budget
+
+    def check_budget(self, stage: str):
+        """Raise TokenBudgetExceeded if the budget is used up before a required stage."""
+        if self.exhausted:
+            raise TokenBudgetExceeded(
+                f"Token budget of {self.budget} exhausted ({self.total['total_tokens']} used) before {stage}",
+                usage=self.summary()
+            )
+
+    def estimated_cost(self) -> float:
+        """Estimated USD cost from per-million-token (input, output) prices per model."""
+        cost = 0.0
+        for model, usage in self.by_model.items():
+            input_price, output_price = self.costs_per_million.get(model, (0.0, 0.0))
+            cost += usage["prompt_tokens"] * input_price / 1e6 + usage["completion_tokens"] * output_price / 1e6
+        return cost
+
+    def summary(self) -> Dict[str, Any]:
+        """Plain-dict snapshot suitable for returning alongside the deck."""
+        with self._lock:
+            return {
+                "total": _snapshot(self.total),
+                "by_agent": {name: _snapshot(usage) for name, usage in self.by_agent.items()},
+                "by_stage": {name: _snapshot(usage) for name, usage in self.by_stage.items()},
+                "by_model": {name: _snapshot(usage) for name, usage in self.by_model.items()},
+                "budget": self.budget,
+                "estimated_cost_usd": round(self.estimated_cost(), 6),
+            }
@@ -0,0 +1,69 @@
+﻿from typing import List
+import threading
+
+import tiktoken
+
+# The Llama tokenizer isn't available through tiktoken; cl100k_base is a close
+# enough proxy for budgeting prompt sections.
+ENCODING_NAME = "cl100k_base"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """Return the shared tiktoken encoding, loading it on first use."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a piece of text."""
+    if not text:
+        return 0
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    tokens = get_encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return get_encoding().decode(tokens[:max_tokens])
+
+
+def pack_to_token_budget(items: List[str], budget: int, min_fragment_tokens: int = 32) -> List[str]:
+    """
+    Greedily pack items, in order, into a token budget.
+
+    Items that don't fit are skipped so later, shorter items can still be used.
+    Once nothing else fits whole, the next item is truncated into the remaining
+    space if at least min_fragment_tokens are left.
+
+    Args:
+        items: Candidate texts, most important first
+        budget: Maximum total number of tokens
+        min_fragment_tokens: Smallest truncated fragment worth including
+
+    Returns:
+        The packed items
+    """
+    packed = []
+    remaining = budget
+    overflow = None
+    for item in items:
+        tokens = count_tokens(item)
+        if tokens <= remaining:
+            packed.append(item)
+            remaining -= tokens
+        elif overflow is None:
+            overflow = item
+    if overflow is not None and remaining >= min_fragment_tokens:
+        packed.append(truncate_to_tokens(overflow, remaining))
+    return packed
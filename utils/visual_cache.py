@@ -0,0 +1,174 @@
+﻿from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+def visual_cache_key(kind: str, content: Any, theme: str, size: Any) -> str:
+    """
+    Content address of a visual.
+
+    Args:
+        kind: "description" or "spec"
+        content: The visual description, or a chart spec dict
+        theme: Chart theme name
+        size: Render size, e.g. (width, height, dpi)
+
+    Returns:
+        Hex sha256 digest
+    """
+    if isinstance(content, str):
+        # Identical descriptions modulo case and whitespace share one image
+        content = " ".join(content.split()).lower()
+    payload = json.dumps([kind, content, theme, size], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VisualCache:
+    """
+    Content-addressed on-disk store of rendered visuals.
+
+    Images live at `<directory>/<key><extension>`, are written atomically, and are
+    evicted least recently used first once the directory exceeds `max_bytes`.
+    `get_or_create` is single-flight: concurrent requests for one key (e.g. the
+    same description on two slides) generate the image once.
+    """
+
+    def __init__(self, directory: str = "generated_visuals", max_bytes: Optional[int] = 200 * 1024 * 1024,
+                 extension: str = ".png"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._bytes = sum(entry.stat().st_size for entry in self._entries())
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith(self.extension)]
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.extension}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached image, or None. A hit refreshes its LRU position."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # Evicted in between
+            return None
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store image bytes under a key atomically and return the path."""
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Overwriting a key replaces its bytes rather than adding to them
+            with self._lock:
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                self._bytes += len(data) - replaced
+                over_limit = self.max_bytes is not None and self._bytes > self.max_bytes
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if over_limit:
+            self.cleanup()
+        return path
+
+    def get_or_create(self, key: str, create: Callable[[], Optional[bytes]]) -> Optional[str]:
+        """
+        Return the cached image path for a key, creating it at most once.
+
+        Args:
+            key: Cache key (see visual_cache_key)
+            create: Produces the image bytes, or None on failure (not cached)
+
+        Returns:
+            Path to the image, or None if create failed
+        """
+        return self._get_or_create(key, create)[0]
+
+    def get_or_create_bytes(self, key: str, create: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """Like get_or_create, but return the image bytes; freshly created images aren't re-read."""
+        path, data = self._get_or_create(key, create)
+        if data is None and path is not None:
+            data = self.get_bytes(key)
+        return data
+
+    def _get_or_create(self, key: str, create: Callable[[], Optional[bytes]]) -> Tuple[Optional[str], Optional[bytes]]:
+        path = self.get(key)
+        if path is not None:
+            return path, None
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                # Another thread may have created it while we waited
+                path = self.get(key)
+                if path is not None:
+                    return path, None
+                with self._lock:
+                    self.stats["misses"] += 1
+                data = create()
+                if data is None:
+                    return None, None
+                return self.put(key, data), data
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def cleanup(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least recently used images until the store is within budget.
+
+        Evicts down to 90% of the limit so a full cache doesn't clean up on every put.
+
+        Returns:
+            Number of images removed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        if limit is None:
+            return 0
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        target = limit * 0.9
+        removed = 0
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+            self.stats["evicted"] += removed
+        if removed:
+            print(f"[VisualCache] Evicted {removed} images, {total / 1024 / 1024:.1f} MB kept")
+        return removed
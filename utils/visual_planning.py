@@ -0,0 +1,104 @@
+﻿from typing import Any, Dict, List
+import re
+
+IMPORTANT_SLIDE_TYPES = {"Problem", "Solution", "Product"}  # Slide types eligible for image generation
+
+# How much a visual helps each slide type; data-heavy slides benefit most
+SLIDE_TYPE_WEIGHTS = {
+    "Market Size": 1.0,
+    "Traction": 1.0,
+    "Financials": 1.0,
+    "Competition": 0.9,
+    "Business Model": 0.8,
+    "Problem": 0.6,
+    "Solution": 0.6,
+    "Product": 0.6,
+    "Ask": 0.5,
+    "Team": 0.3,
+    "Title Slide": 0.2,
+}
+IMPORTANT_SLIDE_BONUS = 0.2
+
+# Description words that signal a chart the renderer draws well, or decoration that adds little
+CHART_TERMS = {
+    "chart", "graph", "bar", "line", "pie", "donut", "funnel", "timeline", "roadmap", "table", "matrix",
+    "comparison", "growth", "revenue", "market", "tam", "sam", "som", "projection", "forecast", "breakdown",
+    "share", "trend", "metrics", "kpi", "users", "customers", "%",
+}
+DECORATIVE_TERMS = {"icon", "icons", "logo", "photo", "photograph", "image", "illustration", "background", "emoji"}
+
+_BULLET_PREFIX = re.compile(r"^\s*(?:[-*•]+|\d+[.)])\s*")
+_NON_VISUAL_PREFIXES = ("layout", "title", "bullet", "note")
+
+
+def clean_visual_description(line: str) -> str:
+    """Strip list markers and a leading "Visual:" label from a parsed visual line."""
+    text = _BULLET_PREFIX.sub("", line).strip()
+    if text.lower().startswith("visual:"):
+        text = text[len("visual:"):].strip()
+    return text.strip("*_ ")
+
+
+def score_visual(slide_type: str, description: str) -> float:
+    """
+    Rank a candidate visual; higher is more worth generating, 0 means skip.
+
+    Combines the slide type's weight with how chart-like the description is.
+    """
+    lowered = description.lower()
+    words = set(re.findall(r"[a-z%]+", lowered))
+    if len(words) < 2 or lowered.startswith(_NON_VISUAL_PREFIXES):
+        return 0.0
+
+    score = SLIDE_TYPE_WEIGHTS.get(slide_type, 0.5)
+    if slide_type in IMPORTANT_SLIDE_TYPES:
+        score += IMPORTANT_SLIDE_BONUS
+    score += 0.15 * min(len(words & CHART_TERMS), 3)
+    if any(char.isdigit() for char in description):
+        score += 0.1
+    if words & DECORATIVE_TERMS and not words & CHART_TERMS:
+        score -= 0.4
+    return max(score, 0.0)
+
+
+def plan_visuals(slides: List[Dict[str, Any]], max_per_slide: int = 1, max_per_deck: int = 6) -> List[Dict[str, Any]]:
+    """
+    Choose which visuals to generate for a deck, best first.
+
+    Args:
+        slides: Designed slides with "type" and "visual_elements"
+        max_per_slide: Cap on visuals per slide
+        max_per_deck: Cap on distinct visuals per deck; repeated descriptions
+            share one image (see the visual cache) and count once
+
+    Returns:
+        Planned visuals as {"slide_index", "description", "score"}, highest score
+        first, i.e. in the order they should be scheduled
+    """
+    candidates = []
+    for slide_index, slide in enumerate(slides):
+        seen = set()
+        for line in slide.get("visual_elements", []):
+            description = clean_visual_description(line)
+            key = description.lower()
+            if not description or key in seen:
+                continue
+            seen.add(key)
+            score = score_visual(slide.get("type", ""), description)
+            if score > 0:
+                candidates.append({"slide_index": slide_index, "description": description, "score": score})
+
+    candidates.sort(key=lambda candidate: (-candidate["score"], candidate["slide_index"]))
+    planned = []
+    per_slide: Dict[int, int] = {}
+    distinct = set()
+    for candidate in candidates:
+        if per_slide.get(candidate["slide_index"], 0) >= max_per_slide:
+            continue
+        key = " ".join(candidate["description"].lower().split())
+        if key not in distinct and len(distinct) >= max_per_deck:
+            continue
+        distinct.add(key)
+        per_slide[candidate["slide_index"]] = per_slide.get(candidate["slide_index"], 0) + 1
+        planned.append(candidate)
+    return planned